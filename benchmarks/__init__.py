@@ -0,0 +1,10 @@
+""" Benchmarks for the message scoring of the bot. Run them using:
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json
+
+Each layer of the scoring is timed separately: the string distance, the
+string score, the permutations, the cleaning of messages, the score of each
+command, and the full dispatch of messages by `GadiBot.on_message`. The
+messages are generated from a fixed seed, so results of different runs can be
+compared. """
@@ -0,0 +1,103 @@
+import sys
+import argparse
+
+from .corpus import LENGTHS, generate_corpora
+from .layers import LAYERS
+from .results import (
+    save_results,
+    load_results,
+    compare_results,
+    print_results,
+    print_comparisons,
+)
+from .stubs import stub_config
+
+
+def parse_arguments(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Times each layer of the message scoring of the bot.',
+    )
+
+    parser.add_argument(
+        '--layers', nargs='+', choices=LAYERS, default=list(LAYERS),
+        help='the layers to benchmark (default: all of them)')
+    parser.add_argument(
+        '--lengths', nargs='+', type=int, default=list(LENGTHS),
+        help='the lengths (in characters) of the generated messages')
+    parser.add_argument(
+        '--count', type=int, default=50,
+        help='the number of messages of each language and length')
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='the number of times each benchmark is repeated')
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='the seed of the generated messages')
+    parser.add_argument(
+        '--filter', default='',
+        help='only reports benchmarks that their name contains this string')
+    parser.add_argument(
+        '--output', metavar='PATH',
+        help='saves the results as a json file')
+    parser.add_argument(
+        '--baseline', metavar='PATH',
+        help='compares the results against results saved by --output')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.1,
+        help='the relative change that is not considered a regression')
+
+    arguments = parser.parse_args(args)
+
+    # The distance layer compares pairs of consecutive messages.
+    if arguments.count < 2:
+        parser.error('--count must be at least 2')
+
+    if arguments.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    return arguments
+
+
+def main(args=None) -> int:
+    arguments = parse_arguments(args)
+
+    corpora = generate_corpora(
+        arguments.lengths, arguments.count, arguments.seed)
+    config = stub_config()
+
+    results = list()
+    for layer in arguments.layers:
+        for result in LAYERS[layer](corpora, config, arguments.repeat):
+            if arguments.filter in result.name:
+                results.append(result)
+
+    print_results(results)
+
+    if arguments.output:
+        save_results(arguments.output, results, options={
+            'lengths': arguments.lengths,
+            'count': arguments.count,
+            'repeat': arguments.repeat,
+            'seed': arguments.seed,
+        })
+
+    if arguments.baseline:
+        baseline = load_results(arguments.baseline)
+        comparisons = compare_results(results, baseline)
+
+        print()
+        print_comparisons(comparisons, arguments.tolerance)
+
+        # A non zero exit code, so regressions can fail automated checks.
+        if any(
+            comparison.status(arguments.tolerance) == 'slower'
+            for comparison in comparisons
+        ):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
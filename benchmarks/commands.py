@@ -0,0 +1,88 @@
+""" Sample commands that the benchmarks score messages against. The bot
+itself doesn't have any commands yet, so these cover the different kinds of
+patterns that commands can declare. """
+
+import gadi.utils as utils
+from gadi.discord.handlers.base import BaseCommand, BaseMessageHandler
+from gadi.discord.handlers.patterns import CommandPattern
+
+# The command phrases, used by the corpus generator too.
+PHRASES = {
+    'en': ('hello', 'what is the time', 'tell me a joke', 'roll a dice', ),
+    'he': ('שלום', 'מה השעה', 'ספר לי בדיחה', 'הטל קובייה', ),
+}
+
+WAKE_WORDS = {
+    'en': ('gadi', 'Gadi', ),
+    'he': ('גדי', ),
+}
+
+
+class _ReplyCommand(BaseCommand):
+
+    __slots__ = ()
+
+    REPLY = ''
+
+    async def handle(self, context) -> None:
+        await utils.replay_to_message(context.message, self.REPLY)
+
+
+class HelloCommand(_ReplyCommand):
+    """ A keyword prefix, and a short phrase. """
+
+    __slots__ = ()
+
+    REPLY = 'Hello!'
+    PATTERNS = (
+        CommandPattern('hello'),
+        CommandPattern('שלום'),
+    )
+
+
+class TimeCommand(_ReplyCommand):
+    """ Words that can be rearranged. """
+
+    __slots__ = ()
+
+    REPLY = '12:00'
+    PATTERNS = (
+        CommandPattern('what is the time', allow_word_rearrange=True),
+        CommandPattern('מה השעה', allow_word_rearrange=True),
+    )
+
+
+class JokeCommand(_ReplyCommand):
+    """ A keyword anywhere in the message. """
+
+    __slots__ = ()
+
+    REPLY = 'No.'
+    PATTERNS = (
+        CommandPattern('tell me a joke', require_keyword=True),
+        CommandPattern('ספר לי בדיחה', require_keyword=True),
+    )
+
+
+class DiceCommand(_ReplyCommand):
+    """ Calculates the score by itself, so it is never filtered out by the
+    candidate index. """
+
+    __slots__ = ()
+
+    REPLY = '4'
+
+    def score(self, context):
+        return max(
+            self.compare_score(context, 'roll a dice'),
+            self.compare_score(context, 'הטל קובייה'),
+        )
+
+
+class BenchmarkHandler(BaseMessageHandler):
+    COMMANDS = (
+        HelloCommand,
+        TimeCommand,
+        JokeCommand,
+        DiceCommand,
+    )
@@ -0,0 +1,129 @@
+""" Generates synthetic message corpora in Hebrew and English. """
+
+import typing
+import random
+
+from .commands import PHRASES, WAKE_WORDS
+
+LANGUAGES = ('en', 'he', )
+
+# The lengths (in characters) of the generated messages.
+LENGTHS = (16, 64, 256, )
+
+WORDS = {
+    'en': (
+        'the', 'bot', 'is', 'not', 'what', 'time', 'today', 'math', 'class',
+        'homework', 'tomorrow', 'teacher', 'question', 'answer', 'please',
+        'help', 'me', 'with', 'this', 'exam', 'grade', 'why', 'when', 'how',
+        'server', 'channel', 'message', 'funny', 'really', 'think', 'about',
+        'school', 'lesson', 'board', 'number', 'prime', 'proof', 'good',
+    ),
+    'he': (
+        'מה', 'השעה', 'היום', 'מחר', 'שיעור', 'מתמטיקה', 'מורה', 'שאלה',
+        'תשובה', 'בבקשה', 'עזרה', 'עם', 'זה', 'מבחן', 'ציון', 'למה', 'מתי',
+        'איך', 'שרת', 'ערוץ', 'הודעה', 'מצחיק', 'באמת', 'חושב', 'על',
+        'בית', 'ספר', 'לוח', 'מספר', 'ראשוני', 'הוכחה', 'טוב', 'לא', 'כן',
+    ),
+}
+
+# Decorations that are added to some of the messages, so the cleaning of the
+# messages is timed too.
+DECORATIONS = (
+    '**{}**',
+    '_{}_',
+    '<@123456789012345678> {}',
+    '{} <#876543210987654321>',
+    '`{}`',
+)
+
+
+def sentence(rng: random.Random, language: str, length: int) -> str:
+    """ Returns random words of the given language, joined into a string of
+    (about) the given length. """
+
+    words = list()
+    total = 0
+
+    while total < length:
+        word = rng.choice(WORDS[language])
+        words.append(word)
+        total += len(word) + 1
+
+    return ' '.join(words)[:length].strip()
+
+
+def typo(rng: random.Random, string: str) -> str:
+    """ Returns the given string with a single random typo. """
+
+    if len(string) < 2:
+        return string
+
+    index = rng.randrange(len(string) - 1)
+    kind = rng.randrange(3)
+
+    if kind == 0:    # Swap two characters
+        return (
+            string[:index] + string[index + 1] + string[index]
+            + string[index + 2:]
+        )
+
+    if kind == 1:    # Remove a character
+        return string[:index] + string[index + 1:]
+
+    return string[:index] + string[index] + string[index:]   # Double it
+
+
+def generate_corpus(language: str,
+                    length: int,
+                    count: int = 50,
+                    seed: int = 0,
+                    command_ratio: float = 0.25,
+                    ) -> typing.List[str]:
+    """ Returns `count` messages in the given language, of about the given
+    length. About `command_ratio` of the messages are commands to the bot
+    (the wake word and a command phrase, sometimes with a typo, and padded to
+    the length with random words). The same arguments always generate the
+    same messages. """
+
+    rng = random.Random(f'{seed}-{language}-{length}')
+    messages = list()
+
+    for _ in range(count):
+        if rng.random() < command_ratio:
+            message = ' '.join((
+                rng.choice(WAKE_WORDS[language]),
+                rng.choice(PHRASES[language]),
+            ))
+
+            if rng.random() < 0.5:
+                message = typo(rng, message)
+
+            padding = length - len(message) - 1
+            if padding > 0:
+                message += ' ' + sentence(rng, language, padding)
+
+        else:
+            message = sentence(rng, language, length)
+
+        if rng.random() < 0.2:
+            message = rng.choice(DECORATIONS).format(message)
+
+        messages.append(message)
+
+    return messages
+
+
+Corpora = typing.Dict[typing.Tuple[str, int], typing.List[str]]
+
+
+def generate_corpora(lengths: typing.Iterable[int] = LENGTHS,
+                     count: int = 50,
+                     seed: int = 0,
+                     ) -> Corpora:
+    """ Returns a corpus for each language and length. """
+
+    return {
+        (language, length): generate_corpus(language, length, count, seed)
+        for language in LANGUAGES
+        for length in lengths
+    }
@@ -0,0 +1,262 @@
+""" The benchmarks of each layer of the message scoring, from the string
+distance up to the full dispatch of messages by the bot. """
+
+import time
+import typing
+import asyncio
+import itertools
+import statistics
+
+import gadi.utils as utils
+from gadi.config import Config
+from gadi.discord.context import MessageContext
+from gadi.discord.scoring import MessageScorer
+from gadi.discord.wakewords import WakeWordDetector
+
+from .commands import BenchmarkHandler, JokeCommand, WAKE_WORDS
+from .results import BenchmarkResult
+from .corpus import Corpora
+from .stubs import stub_messages
+
+THRESHOLD = 0.7
+
+
+def measure(name: str,
+            func: typing.Callable,
+            items: typing.Iterable,
+            repeat: int,
+            ) -> BenchmarkResult:
+    """ Calls the given function with each one of the items, `repeat` times,
+    and returns the time of a single call. """
+
+    items = list(items)
+    if not items or repeat < 1:
+        raise ValueError(f"Nothing to measure in the {name!r} benchmark")
+
+    times = list()
+
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for item in items:
+            func(item)
+        times.append((time.perf_counter_ns() - start) / len(items))
+
+    return BenchmarkResult(
+        name=name,
+        ops=len(items),
+        min_ns=min(times),
+        median_ns=statistics.median(times),
+    )
+
+
+def distance(corpora: Corpora,
+             config: Config,
+             repeat: int,
+             ) -> typing.Iterator[BenchmarkResult]:
+    """ `utils.levenshtein_distance` between pairs of messages, using each
+    algorithm, with and without a maximal distance. """
+
+    for (language, length), messages in corpora.items():
+        pairs = list(zip(messages, messages[1:]))
+        allowed = utils.max_distance_for_score(length, THRESHOLD)
+
+        for algorithm in ('table', 'myers'):
+            yield measure(
+                f'distance/{algorithm}/{language}/{length}',
+                lambda pair: utils.levenshtein_distance(
+                    *pair, algorithm=algorithm),
+                pairs, repeat,
+            )
+
+            yield measure(
+                f'distance/{algorithm}-bounded/{language}/{length}',
+                lambda pair: utils.levenshtein_distance(
+                    *pair, max_distance=allowed, algorithm=algorithm),
+                pairs, repeat,
+            )
+
+
+def score(corpora: Corpora,
+          config: Config,
+          repeat: int,
+          ) -> typing.Iterator[BenchmarkResult]:
+    """ `utils.best_levenshtein_score` of messages against many candidates
+    (the phrase of a pattern, with a wake word in each possible place), using
+    each backend. """
+
+    backends = ['python']
+    if utils.strings.numpy is not None:
+        backends.append('numpy')
+
+    for (language, length), messages in corpora.items():
+        pattern = next(
+            pattern for pattern in JokeCommand.PATTERNS
+            if (pattern.phrase.isascii()) == (language == 'en')
+        )
+        words = {tuple(pattern.phrase.split())}
+        candidates = sorted(
+            ' '.join(permutation)
+            for permutation in utils.union_permutation_sets(*[
+                utils.add_to_permutations(words, keyword)
+                for keyword in WAKE_WORDS[language]
+            ])
+        )
+
+        for backend in backends:
+            yield measure(
+                f'score/{backend}/{language}/{length}',
+                lambda message: utils.best_levenshtein_score(
+                    message, candidates, THRESHOLD, backend),
+                messages, repeat,
+            )
+
+
+def permutations(corpora: Corpora,
+                 config: Config,
+                 repeat: int,
+                 ) -> typing.Iterator[BenchmarkResult]:
+    """ `utils.add_to_permutations` of all of the permutations of phrases with
+    different number of words. """
+
+    words = ('what', 'is', 'the', 'time', 'now', 'please', )
+
+    for count in range(2, len(words)):
+        premutations = set(itertools.permutations(words[:count]))
+
+        yield measure(
+            f'permutations/add/{count}',
+            lambda keyword: utils.add_to_permutations(premutations, keyword),
+            ('gadi', 'גדי', ), repeat,
+        )
+
+
+def clean(corpora: Corpora,
+          config: Config,
+          repeat: int,
+          ) -> typing.Iterator[BenchmarkResult]:
+    """ Cleaning the content of messages (removing markdown, mentions and
+    whitespaces). """
+
+    for (language, length), messages in corpora.items():
+        yield measure(
+            f'clean/{language}/{length}',
+            # A new context each time, so the cleaned content isn't cached.
+            lambda message: MessageContext(message).cleaned(),
+            stub_messages(messages), repeat,
+        )
+
+
+def wake(corpora: Corpora,
+         config: Config,
+         repeat: int,
+         ) -> typing.Iterator[BenchmarkResult]:
+    """ Finding the wake words in (cleaned) messages, with and without
+    tolerating typos. """
+
+    words = config.get('settings', 'wake-words')
+    detectors = {
+        'exact': WakeWordDetector(words),
+        'typos': WakeWordDetector(words, max_typos=1),
+    }
+
+    for (language, length), messages in corpora.items():
+        cleaned = [utils.normalize(message) for message in messages]
+
+        for name, detector in detectors.items():
+            yield measure(
+                f'wake/{name}/{language}/{length}',
+                detector.detect, cleaned, repeat,
+            )
+
+
+def command(corpora: Corpora,
+            config: Config,
+            repeat: int,
+            ) -> typing.Iterator[BenchmarkResult]:
+    """ The score of each of the sample commands, and the selection of the
+    best command by `MessageScorer`. """
+
+    handler = BenchmarkHandler(config)
+    scorer = MessageScorer((handler, ), config)
+
+    for (language, length), messages in corpora.items():
+        stubs = stub_messages(messages)
+
+        for command in handler.commands:
+            yield measure(
+                f'command/{command.__class__.__name__}/{language}/{length}',
+                lambda message: command.score(scorer.context(message)),
+                stubs, repeat,
+            )
+
+        yield measure(
+            f'command/best/{language}/{length}',
+            lambda message: scorer.best_command(
+                scorer.context(message), THRESHOLD),
+            stubs, repeat,
+        )
+
+
+def dispatch(corpora: Corpora,
+             config: Config,
+             repeat: int,
+             ) -> typing.Iterator[BenchmarkResult]:
+    """ Messages that are received by `GadiBot.on_message`, until all of the
+    selected commands finish to handle them. """
+
+    for (language, length), messages in corpora.items():
+        yield asyncio.run(_dispatch(
+            f'dispatch/{language}/{length}', messages, config, repeat))
+
+
+async def _dispatch(name: str,
+                    messages: typing.List[str],
+                    config: Config,
+                    repeat: int,
+                    ) -> BenchmarkResult:
+    from gadi.discord.bot import GadiBot
+
+    bot = GadiBot(config, Handlers=(BenchmarkHandler, ))
+    stubs = stub_messages(messages)
+    times = list()
+
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+
+            for message in stubs:
+                await bot.on_message(message)
+                # Lets the dispatcher run between messages, as it does when
+                # the messages are received from discord.
+                await asyncio.sleep(0)
+
+            while not _drained(bot):
+                await asyncio.sleep(0)
+
+            times.append((time.perf_counter_ns() - start) / len(stubs))
+
+    finally:
+        await bot.close()
+
+    return BenchmarkResult(
+        name=name,
+        ops=len(stubs),
+        min_ns=min(times),
+        median_ns=statistics.median(times),
+    )
+
+
+def _drained(bot) -> bool:
+    stats = bot.dispatcher_stats()
+    return not stats.queued and not stats.in_flight
+
+
+LAYERS = {
+    'distance': distance,
+    'score': score,
+    'permutations': permutations,
+    'clean': clean,
+    'wake': wake,
+    'command': command,
+    'dispatch': dispatch,
+}
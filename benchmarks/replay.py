@@ -0,0 +1,359 @@
+""" Replays a stream of messages through `GadiBot.on_message`, without
+connecting to discord, and reports how fast the bot handled them.
+
+    python -m benchmarks.replay generate messages.jsonl --count 1000 --rate 50
+    python -m benchmarks.replay run messages.jsonl --mode accelerated
+
+Each line of the messages file is a json object with the `author`, `channel`,
+`content` and `timestamp` (seconds, or an ISO 8601 string) of a message. In
+the `realtime` mode the messages are received with the same gaps between them
+as in the file, in the `accelerated` mode the gaps are divided by `--speed`,
+and in the `max` mode the messages are received as fast as possible. """
+
+import sys
+import json
+import time
+import typing
+import random
+import asyncio
+import argparse
+import datetime
+import importlib
+import statistics
+
+from gadi.config import Config
+
+from .corpus import LANGUAGES, generate_corpus
+from .stubs import StubChannel, StubMessage, StubUser, stub_config
+
+MODES = ('realtime', 'accelerated', 'max', )
+
+
+class RecordedMessage(typing.NamedTuple):
+    author: str
+    channel: str
+    content: str
+    timestamp: float    # In seconds
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'RecordedMessage':
+        timestamp = data.get('timestamp', 0)
+        if isinstance(timestamp, str):
+            timestamp = datetime.datetime.fromisoformat(timestamp).timestamp()
+
+        return cls(
+            author=str(data.get('author', 'user')),
+            channel=str(data.get('channel', 'general')),
+            content=data['content'],
+            timestamp=float(timestamp),
+        )
+
+
+class ReplayChannel(StubChannel):
+    """ A channel that records when each response is sent. """
+
+    def __init__(self, name: str, report: 'ReplayReport'):
+        super().__init__(name)
+        self._report = report
+
+    async def send(self, content: str = None, *args, **kwargs) -> None:
+        await super().send(content, *args, **kwargs)
+
+        # The latency is known only for replies (see `replay_to_message`).
+        received = getattr(kwargs.get('reference'), 'received', None)
+        self._report.response(
+            None if received is None else time.perf_counter() - received)
+
+
+class ReplayReport:
+    """ Collects the timings of a replay. """
+
+    def __init__(self,):
+        self.messages = 0
+        self.responses = 0
+        self.scoring_latencies: typing.List[float] = list()
+        self.response_latencies: typing.List[float] = list()
+        self.started: float = None
+        self.finished: float = None
+        self.dispatcher: dict = dict()
+
+    def response(self, latency: typing.Optional[float]) -> None:
+        self.responses += 1
+        if latency is not None:
+            self.response_latencies.append(latency)
+
+    @property
+    def duration(self,) -> float:
+        return self.finished - self.started
+
+    def to_json(self,) -> dict:
+        return {
+            'messages': self.messages,
+            'responses': self.responses,
+            'duration': self.duration,
+            'messages_per_second': self.messages / self.duration,
+            'scoring_latency': percentiles(self.scoring_latencies),
+            'response_latency': percentiles(self.response_latencies),
+            'dispatcher': self.dispatcher,
+        }
+
+    def print(self, file: typing.TextIO = sys.stdout) -> None:
+        print(f'messages:      {self.messages}', file=file)
+        print(f'responses:     {self.responses}', file=file)
+        print(f'duration:      {self.duration:.2f} s', file=file)
+        print(
+            f'throughput:    {self.messages / self.duration:.1f} messages/s',
+            file=file,
+        )
+
+        for name, latencies in (
+            ('scoring', self.scoring_latencies),
+            ('response', self.response_latencies),
+        ):
+            print(f'{name} latency (ms):', file=file)
+            for key, value in percentiles(latencies).items():
+                print(f'    {key:<6}{value * 1000:>10.3f}', file=file)
+
+        print(f'dispatcher:    {self.dispatcher}', file=file)
+
+
+def percentiles(values: typing.List[float]) -> typing.Dict[str, float]:
+    if not values:
+        return dict()
+
+    if len(values) == 1:
+        return {'p50': values[0], 'max': values[0]}
+
+    points = statistics.quantiles(values, n=100, method='inclusive')
+    return {
+        'p50': points[49],
+        'p90': points[89],
+        'p99': points[98],
+        'max': max(values),
+    }
+
+
+def load_messages(path: str) -> typing.List[RecordedMessage]:
+    """ Loads the messages from a json lines file, sorted by their
+    timestamps. """
+
+    with open(path, encoding='utf8') as file:
+        messages = [
+            RecordedMessage.from_json(json.loads(line))
+            for line in file
+            if line.strip()
+        ]
+
+    return sorted(messages, key=lambda message: message.timestamp)
+
+
+def generate_messages(count: int,
+                      rate: float = 50,
+                      channels: int = 8,
+                      authors: int = 32,
+                      lengths: typing.Sequence[int] = (16, 64, ),
+                      seed: int = 0,
+                      ) -> typing.Iterator[RecordedMessage]:
+    """ Generates messages that are received at about `rate` messages per
+    second (with random gaps between them), in both languages. """
+
+    rng = random.Random(seed)
+    corpora = [
+        generate_corpus(language, length, count, seed)
+        for language in LANGUAGES
+        for length in lengths
+    ]
+
+    timestamp = 0
+    for index in range(count):
+        timestamp += rng.expovariate(rate)
+        yield RecordedMessage(
+            author=f'user-{rng.randrange(authors)}',
+            channel=f'channel-{rng.randrange(channels)}',
+            content=corpora[index % len(corpora)][index],
+            timestamp=timestamp,
+        )
+
+
+def import_handlers(paths: typing.Iterable[str]) -> typing.Tuple[type, ...]:
+    """ Imports handler classes from strings like `'module:attribute'`. The
+    attribute can be a handler class, or a tuple of handler classes. """
+
+    Handlers = list()
+
+    for path in paths:
+        module, _, attribute = path.partition(':')
+        value = getattr(importlib.import_module(module), attribute)
+
+        if isinstance(value, (tuple, list)):
+            Handlers.extend(value)
+        else:
+            Handlers.append(value)
+
+    return tuple(Handlers)
+
+
+async def replay(messages: typing.Sequence[RecordedMessage],
+                 config: Config,
+                 Handlers: typing.Iterable[type] = None,
+                 mode: str = 'max',
+                 speed: float = 10,
+                 ) -> ReplayReport:
+    """ Sends the given messages to a bot, and returns the report of the
+    replay. """
+
+    from gadi.discord.bot import GadiBot, MessageHandlers
+
+    if mode not in MODES:
+        raise ValueError(
+            f"Unknown mode {mode!r}, expected one of: " + ', '.join(MODES))
+
+    class ReplayBot(GadiBot):
+        user = StubUser('gadi', bot=True)
+
+    bot = ReplayBot(
+        config,
+        Handlers=MessageHandlers if Handlers is None else Handlers,
+    )
+
+    report = ReplayReport()
+    channels: typing.Dict[str, ReplayChannel] = dict()
+    authors: typing.Dict[str, StubUser] = dict()
+    tasks = list()
+
+    async def receive(message: StubMessage) -> None:
+        start = message.received = time.perf_counter()
+        await bot.on_message(message)
+        report.scoring_latencies.append(time.perf_counter() - start)
+
+    factor = {'realtime': 1, 'accelerated': speed, 'max': None}[mode]
+    first = messages[0].timestamp if messages else 0
+    report.started = time.perf_counter()
+
+    try:
+        for recorded in messages:
+            if factor is not None:
+                due = (recorded.timestamp - first) / factor
+                delay = due - (time.perf_counter() - report.started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            channel = channels.get(recorded.channel)
+            if channel is None:
+                channel = channels[recorded.channel] = ReplayChannel(
+                    recorded.channel, report)
+
+            author = authors.get(recorded.author)
+            if author is None:
+                author = authors[recorded.author] = StubUser(recorded.author)
+
+            # Each message is received in its own task, like the events that
+            # are received from discord.
+            message = StubMessage(recorded.content, channel, author)
+            tasks.append(asyncio.create_task(receive(message)))
+            report.messages += 1
+
+            if factor is None:
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*tasks)
+
+        while True:
+            stats = bot.dispatcher_stats()
+            if not stats.queued and not stats.in_flight:
+                break
+            await asyncio.sleep(0.001)
+
+        report.finished = time.perf_counter()
+        report.dispatcher = bot.dispatcher_stats()._asdict()
+
+    finally:
+        await bot.close()
+
+    return report
+
+
+def parse_arguments(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.replay',
+        description='Replays messages through the bot, without discord.',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser(
+        'generate', help='generates a messages file')
+    generate.add_argument('path', help='the json lines file to create')
+    generate.add_argument('--count', type=int, default=1000)
+    generate.add_argument(
+        '--rate', type=float, default=50,
+        help='the average number of messages each second')
+    generate.add_argument('--channels', type=int, default=8)
+    generate.add_argument('--authors', type=int, default=32)
+    generate.add_argument('--seed', type=int, default=0)
+
+    run = commands.add_parser('run', help='replays a messages file')
+    run.add_argument('path', help='a json lines file of messages')
+    run.add_argument('--mode', choices=MODES, default='max')
+    run.add_argument(
+        '--speed', type=float, default=10,
+        help='how much faster than real time the accelerated mode is')
+    run.add_argument(
+        '--handlers', nargs='+', metavar='MODULE:ATTRIBUTE',
+        help='the message handlers of the bot (default: the handlers of '
+        'the bot itself), for example: benchmarks.commands:BenchmarkHandler')
+    run.add_argument(
+        '--config', metavar='PATH',
+        help='the configuration folder (default: the benchmark settings)')
+    run.add_argument(
+        '--output', metavar='PATH', help='saves the report as a json file')
+
+    return parser.parse_args(args)
+
+
+def main(args=None) -> int:
+    arguments = parse_arguments(args)
+
+    if arguments.command == 'generate':
+        messages = generate_messages(
+            arguments.count,
+            rate=arguments.rate,
+            channels=arguments.channels,
+            authors=arguments.authors,
+            seed=arguments.seed,
+        )
+
+        with open(arguments.path, 'w', encoding='utf8') as file:
+            for message in messages:
+                file.write(
+                    json.dumps(message._asdict(), ensure_ascii=False) + '\n')
+
+        return 0
+
+    config = (
+        stub_config() if arguments.config is None
+        else Config(arguments.config)
+    )
+
+    Handlers = None
+    if arguments.handlers:
+        Handlers = import_handlers(arguments.handlers)
+
+    report = asyncio.run(replay(
+        load_messages(arguments.path),
+        config,
+        Handlers=Handlers,
+        mode=arguments.mode,
+        speed=arguments.speed,
+    ))
+
+    report.print()
+
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf8') as file:
+            json.dump(report.to_json(), file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
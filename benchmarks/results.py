@@ -0,0 +1,152 @@
+""" Saves benchmark results, and compares them against a saved baseline. """
+
+import sys
+import json
+import typing
+import platform
+import datetime
+
+# Changed whenever the format of the results file changes.
+RESULTS_VERSION = 1
+
+
+class BenchmarkResult(typing.NamedTuple):
+    name: str           # For example: 'distance/myers/en/64'
+    ops: int            # Operations in each repeat
+    min_ns: float       # Per operation, of the fastest repeat
+    median_ns: float    # Per operation, of the median repeat
+
+    def to_json(self,) -> dict:
+        return self._asdict()
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'BenchmarkResult':
+        return cls(**data)
+
+
+class Comparison(typing.NamedTuple):
+    name: str
+    baseline_ns: float
+    current_ns: float
+
+    @property
+    def ratio(self,) -> float:
+        """ The current time divided by the baseline time (lower is
+        faster). """
+        return self.current_ns / self.baseline_ns
+
+    def status(self, tolerance: float) -> str:
+        if self.ratio > 1 + tolerance:
+            return 'slower'
+        if self.ratio < 1 - tolerance:
+            return 'faster'
+        return 'same'
+
+
+def environment() -> dict:
+    """ Returns information about the environment the benchmarks run in, so
+    results from different machines aren't compared by mistake. """
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': numpy_version,
+    }
+
+
+def save_results(path: str,
+                 results: typing.Iterable[BenchmarkResult],
+                 options: dict = None,
+                 ) -> None:
+    """ Saves the given results as a json file. """
+
+    data = {
+        'version': RESULTS_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'options': options or dict(),
+        'results': [result.to_json() for result in results],
+    }
+
+    with open(path, 'w', encoding='utf8') as file:
+        json.dump(data, file, indent=2)
+
+
+def load_results(path: str) -> typing.List[BenchmarkResult]:
+    """ Loads results that were saved by `save_results`. """
+
+    with open(path, encoding='utf8') as file:
+        data = json.load(file)
+
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError(
+            f"The results file {path!r} is in an unsupported format")
+
+    return [BenchmarkResult.from_json(result) for result in data['results']]
+
+
+def compare_results(current: typing.Iterable[BenchmarkResult],
+                    baseline: typing.Iterable[BenchmarkResult],
+                    ) -> typing.List[Comparison]:
+    """ Returns a comparison of the median time of each benchmark that appears
+    in both of the given results. """
+
+    baseline = {result.name: result for result in baseline}
+
+    return [
+        Comparison(
+            name=result.name,
+            baseline_ns=baseline[result.name].median_ns,
+            current_ns=result.median_ns,
+        )
+        for result in current
+        if result.name in baseline and baseline[result.name].median_ns > 0
+    ]
+
+
+def format_time(nanoseconds: float) -> str:
+    for unit, size in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if nanoseconds >= size:
+            return f'{nanoseconds / size:.2f} {unit}'
+    return f'{nanoseconds:.0f} ns'
+
+
+def print_results(results: typing.Iterable[BenchmarkResult],
+                  file: typing.TextIO = sys.stdout,
+                  ) -> None:
+    print(f"{'benchmark':<40}{'ops':>6}{'min':>12}{'median':>12}", file=file)
+
+    for result in results:
+        print(
+            f'{result.name:<40}{result.ops:>6}'
+            f'{format_time(result.min_ns):>12}'
+            f'{format_time(result.median_ns):>12}',
+            file=file,
+        )
+
+
+def print_comparisons(comparisons: typing.Iterable[Comparison],
+                      tolerance: float,
+                      file: typing.TextIO = sys.stdout,
+                      ) -> None:
+    print(
+        f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'ratio':>8}",
+        file=file,
+    )
+
+    for comparison in comparisons:
+        print(
+            f'{comparison.name:<40}'
+            f'{format_time(comparison.baseline_ns):>12}'
+            f'{format_time(comparison.current_ns):>12}'
+            f'{comparison.ratio:>8.2f}  {comparison.status(tolerance)}',
+            file=file,
+        )
@@ -0,0 +1,97 @@
+""" Light replacements for the discord objects that the bot receives, so
+messages can be scored and handled without connecting to discord. """
+
+import os
+import json
+import shutil
+import atexit
+import typing
+import itertools
+import tempfile
+
+from gadi.config import Config
+
+from .commands import WAKE_WORDS
+
+_ids = itertools.count(10 ** 17)
+
+
+class StubUser:
+
+    def __init__(self, name: str = 'user', bot: bool = False):
+        self.id = next(_ids)
+        self.name = name
+        self.bot = bot
+
+    def __str__(self,) -> str:
+        return self.name
+
+
+class StubChannel:
+    """ A text channel that saves the messages that are sent to it, instead
+    of sending them. """
+
+    def __init__(self, name: str = 'general'):
+        self.id = next(_ids)
+        self.name = name
+        self.sent: typing.List[str] = list()
+
+    async def send(self, content: str = None, *args, **kwargs) -> None:
+        self.sent.append(content)
+
+
+class StubMessage:
+
+    def __init__(self,
+                 content: str,
+                 channel: StubChannel = None,
+                 author: StubUser = None,
+                 ):
+        self.id = next(_ids)
+        self.content = content
+        self.channel = channel or StubChannel()
+        self.author = author or StubUser()
+        self.guild = None
+        self.mentions = list()
+
+
+def stub_messages(contents: typing.Iterable[str],
+                  channels: int = 4,
+                  ) -> typing.List[StubMessage]:
+    """ Returns a message for each of the given contents, spread between the
+    given number of channels. """
+
+    channel_cycle = itertools.cycle([StubChannel() for _ in range(channels)])
+    author = StubUser()
+
+    return [
+        StubMessage(content, next(channel_cycle), author)
+        for content in contents
+    ]
+
+
+def stub_config(settings: dict = None) -> Config:
+    """ Returns a configuration that is loaded from a temporary folder, with
+    the given settings (and the wake words of the sample commands). """
+
+    folder = tempfile.mkdtemp(prefix='gadi-benchmarks-')
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+
+    # Json is valid yaml, so the files are written without importing yaml.
+    files = {
+        'token': None,
+        'settings': {
+            'score-threshold': 0.7,
+            'wake-words': [
+                word for words in WAKE_WORDS.values() for word in words],
+            'wake-word-typos': 1,
+            **(settings or dict()),
+        },
+    }
+
+    for name, content in files.items():
+        path = os.path.join(folder, name + Config.FILES_EXTENTION)
+        with open(path, 'w', encoding='utf8') as file:
+            json.dump(content, file, ensure_ascii=False)
+
+    return Config(folder, cache=False)
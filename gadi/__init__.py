@@ -1,2 +1,11 @@
-from .discord import GadiBot
 from .config import Config
+
+
+def __getattr__(name: str):
+    # The bot is imported only when it is used, since importing `discord`
+    # takes most of the startup time.
+    if name == 'GadiBot':
+        from .discord import GadiBot
+        return GadiBot
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
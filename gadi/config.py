@@ -1,9 +1,20 @@
 import os
+import typing
 import logging
-import yaml
+import asyncio
+import pickle
 
 logger = logging.getLogger(__name__)
 
+# The content of configuration files that failed to parse.
+_INVALID = object()
+
+# Returned when a configuration file isn't found in the parse cache.
+_MISSING = object()
+
+# Changed whenever the format of the parse cache files changes.
+CACHE_VERSION = 1
+
 
 class Config:
     """ A class that loads the configuration files, checks if all the needed
@@ -15,11 +26,21 @@ class Config:
 
     FILES_EXTENTION = '.yml'
 
-    def __init__(self, config_folder_path: str = None):
+    # The parsed configuration files are cached inside this folder (under
+    # the configuration folder), so they are parsed again only if they change.
+    CACHE_FOLDER = '__pycache__'
+
+    # Files that hold secrets (the bot token) are never written into the
+    # parse cache.
+    UNCACHED_FILES = REQUIRED_FILES
+
+    def __init__(self, config_folder_path: str = None, cache: bool = True):
         """ Recives the path to the configurations folder, and loads the data
         from there. If the configuration folder path isn't provided, tries
         to find the `config` folder by itself. Raises errors if the folder
-        isn't found, or if critical data is missing. """
+        isn't found, or if critical data is missing. If `cache` is `True`,
+        the parsed files are cached, so unchanged files are not parsed again
+        when the bot restarts. """
 
         options_for_folder = (
             config_folder_path,
@@ -38,20 +59,25 @@ class Config:
                 "Configure directory is not found or some configuration files are missing")
 
         self._folder = config_folder_path
+        self._cache = cache
+        self._files: typing.Dict[str, str] = dict()
         self._content = dict()
+        self._mtimes: typing.Dict[str, int] = dict()
+        self._handles: typing.List[ConfigHandle] = list()
         self.load_content()
 
-    def load_content(self,) -> None:
-        """ Opens the configuration files one by one, and loads the contents. """
+    def load_content(self, lazy: bool = True) -> None:
+        """ Finds the configuration files in the configuration folder. Each
+        file is loaded only when it is first used, unless `lazy` is
+        `False`. """
 
-        for filename in os.listdir(self._folder):
-            filepath = os.path.join(self._folder, filename)
-            name, ext = os.path.splitext(filename)
+        self._files = self._config_files()
+        self._content.clear()
+        self._mtimes.clear()
 
-            if os.path.isfile(filepath) and ext == self.FILES_EXTENTION:
-                # Only if a valid configuration file, open it.
-                with open(filepath, encoding='utf8') as file:
-                    self._content[name] = yaml.full_load(file)
+        if not lazy:
+            for name in self._files:
+                self._loaded(name)
 
     @classmethod
     def is_valid_config_folder(cls, path: str) -> bool:
@@ -71,8 +97,15 @@ class Config:
         and returns the configuration data. If the configuration is not
         found, a KeyError is thrown. """
 
-        data = self._content
-        for arg in args:
+        if not args:
+            # Loads only the files that aren't loaded yet, so the loaded ones
+            # (and the handles that are bound to them) stay as they are.
+            for name in self._files:
+                self._loaded(name)
+            return self._content
+
+        data = self._loaded(args[0])
+        for arg in args[1:]:
             data = data[arg]
         return data
 
@@ -86,6 +119,313 @@ class Config:
         except KeyError:
             return default
 
+    def bind(self, *args, default=None) -> 'ConfigHandle':
+        """ Recives a combination of strings that represent a configuration,
+        and returns a handle that holds its value (or the default value, if
+        the configuration isn't found). The value of the handle is looked up
+        only once, and again only when the configuration file changes, so it
+        is cheap to read it for every message. """
+
+        handle = ConfigHandle(self, args, default)
+        self._handles.append(handle)
+        return handle
+
+    def reload_changed(self,) -> typing.Set[str]:
+        """ Parses again only the configuration files that were changed (or
+        added, or removed) since they were loaded, and updates the bound
+        handles. Returns the names of the changed files. """
+        return self._apply_changes(*self._read_changes())
+
+    async def watch(self, interval: float = 5) -> None:
+        """ Checks for changes in the configuration files every `interval`
+        seconds, forever. The files are parsed outside of the event loop, and
+        the new values are swapped in by the event loop itself. A failed
+        check is logged, and the files are checked again after the next
+        interval. """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                files, changes = await loop.run_in_executor(
+                    None, self._read_changes)
+                self._apply_changes(files, changes)
+
+            except Exception:
+                logger.exception(
+                    "Failed to check for configuration changes in: %s",
+                    self._folder,
+                )
+
+    def __getstate__(self,):
+        # The handles (and their callbacks) belong to this process only.
+        state = self.__dict__.copy()
+        state['_handles'] = list()
+        return state
+
+    # - - - Private & Protected methods - - - #
+
+    def _config_files(self,) -> typing.Dict[str, str]:
+        """ Returns the path of each configuration file in the folder, by the
+        name of the configuration. """
+
+        files = dict()
+
+        for filename in os.listdir(self._folder):
+            filepath = os.path.join(self._folder, filename)
+            name, ext = os.path.splitext(filename)
+
+            if os.path.isfile(filepath) and ext == self.FILES_EXTENTION:
+                # Only if a valid configuration file, open it.
+                files[name] = filepath
+
+        return files
+
+    def _loaded(self, name: str):
+        """ Returns the content of the given configuration file, and loads it
+        if it isn't loaded yet. Raises a `KeyError` if there is no such
+        file. """
+
+        try:
+            return self._content[name]
+        except KeyError:
+            pass
+
+        filepath = self._files[name]
+
+        try:
+            mtime, content = self._read_file(filepath)
+        except OSError:
+            raise KeyError(name) from None
+
+        self._mtimes[name] = mtime
+        self._content[name] = content
+        return content
+
+    def _read_file(self, filepath: str) -> typing.Tuple[int, object]:
+        """ Returns the modification time and the content of the given
+        configuration file, from the parse cache if the file wasn't changed
+        since it was cached. """
+
+        stat = os.stat(filepath)
+        name = os.path.splitext(os.path.basename(filepath))[0]
+
+        if not self._cache or name in self.UNCACHED_FILES:
+            return stat.st_mtime_ns, self._parse_file(filepath)
+
+        # The cache is valid only for the exact same version of the file.
+        key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+        cache_filepath = self._cache_filepath(filepath)
+
+        content = self._read_cache(cache_filepath, key)
+        if content is _MISSING:
+            content = self._parse_file(filepath)
+            self._write_cache(cache_filepath, key, content, stat.st_mode)
+
+        return stat.st_mtime_ns, content
+
+    def _cache_filepath(self, filepath: str) -> str:
+        folder, filename = os.path.split(filepath)
+        return os.path.join(folder, self.CACHE_FOLDER, filename + '.pickle')
+
+    @staticmethod
+    def _read_cache(cache_filepath: str, key: tuple):
+        """ Returns the cached content of a configuration file, or `_MISSING`
+        if it isn't cached (or was cached for a different version of the
+        file). """
+
+        try:
+            with open(cache_filepath, 'rb') as file:
+                cached_key, content = pickle.load(file)
+
+        except FileNotFoundError:
+            return _MISSING
+
+        except Exception:
+            logger.debug(
+                "Ignoring the invalid '%s' cache file", cache_filepath,
+                exc_info=True,
+            )
+            return _MISSING
+
+        return content if cached_key == key else _MISSING
+
+    @staticmethod
+    def _write_cache(cache_filepath: str,
+                     key: tuple,
+                     content,
+                     mode: int = 0o600,
+                     ) -> None:
+        """ Caches the content of a configuration file. The cache file is
+        created with the permissions of the configuration file (`mode`), so
+        it isn't readable by anyone who can't read the configuration itself.
+        Caching is skipped if the cache file can't be written (for example,
+        in a read-only folder). """
+
+        temp_filepath = f'{cache_filepath}.{os.getpid()}.tmp'
+
+        try:
+            os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+
+            # A leftover temporary file might have other permissions.
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+            descriptor = os.open(
+                temp_filepath,
+                os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(
+                    os, 'O_BINARY', 0),
+                mode & 0o777,
+            )
+
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump((key, content), file, pickle.HIGHEST_PROTOCOL)
+
+            # Replaced at once, so a half written cache is never read.
+            os.replace(temp_filepath, cache_filepath)
+
+        except OSError:
+            logger.debug(
+                "Failed to write the '%s' cache file", cache_filepath,
+                exc_info=True,
+            )
+
+    @staticmethod
+    def _parse_file(filepath: str):
+        # Imported only when a file actually needs parsing.
+        import yaml
+
+        # The libyaml based loader is much faster, but isn't always installed.
+        Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+        with open(filepath, encoding='utf8') as file:
+            return yaml.load(file, Loader=Loader)
+
+    def _read_changes(self,) -> typing.Tuple[
+            typing.Dict[str, str],
+            typing.Dict[str, typing.Tuple[int, object]]]:
+        """ Returns the current configuration files, and the modification
+        time and the new content of each loaded configuration file that was
+        changed. The content of removed files is `None`, and the content of
+        files that fail to parse is `_INVALID` (so their old content is kept).
+        Doesn't change the loaded configuration. """
+
+        changes = dict()
+        files = self._config_files()
+
+        for name in set(self._mtimes) - set(files):
+            changes[name] = (None, None)
+
+        for name, filepath in files.items():
+            if name not in self._mtimes:
+                continue  # Not loaded yet, so it is loaded when it is used.
+
+            try:
+                mtime = os.stat(filepath).st_mtime_ns
+            except OSError:
+                continue  # Removed while checking, handled in the next check.
+
+            if mtime == self._mtimes[name]:
+                continue
+
+            try:
+                changes[name] = self._read_file(filepath)
+
+            except Exception:
+                logger.exception(
+                    "Failed to reload the '%s' configuration file", filepath)
+                changes[name] = (mtime, _INVALID)
+
+        return files, changes
+
+    def _apply_changes(self,
+                       files: typing.Dict[str, str],
+                       changes: typing.Dict[str, typing.Tuple[int, object]],
+                       ) -> typing.Set[str]:
+        """ Swaps in the content of the changed configuration files, and
+        updates the handles that are bound to them. """
+
+        # Files that were added (or removed) but weren't loaded.
+        changed = set(files).symmetric_difference(self._files)
+        self._files = files
+
+        for name, (mtime, content) in changes.items():
+            if mtime is None:
+                self._mtimes.pop(name, None)
+                self._content.pop(name, None)
+
+            elif content is _INVALID:
+                # Not loaded again until the file is fixed.
+                self._mtimes[name] = mtime
+                continue
+
+            else:
+                self._mtimes[name] = mtime
+                self._content[name] = content
+
+            changed.add(name)
+            logger.info("Reloaded the '%s' configuration", name)
+
+        if changed:
+            for handle in self._handles:
+                if handle.path and handle.path[0] in changed:
+                    handle.refresh()
+
+        return changed
+
+
+class ConfigHandle:
+    """ Holds the value of a single configuration, that is updated when the
+    configuration file changes. Created using `Config.bind`. """
+
+    __slots__ = ('_config', '_path', '_default', '_value', '_callbacks', )
+
+    def __init__(self, config: Config, path: typing.Tuple[str, ...], default):
+        self._config = config
+        self._path = tuple(path)
+        self._default = default
+        self._callbacks: typing.List[typing.Callable] = list()
+        self._value = config.get_safely(*self._path, default=default)
+
+    @property
+    def value(self,):
+        return self._value
+
+    @property
+    def path(self,) -> typing.Tuple[str, ...]:
+        return self._path
+
+    def on_change(self, callback: typing.Callable) -> typing.Callable:
+        """ Registers a callback that is called with the new value every time
+        the value changes. Returns the callback, so it can be used as a
+        decorator. """
+
+        self._callbacks.append(callback)
+        return callback
+
+    def refresh(self,) -> bool:
+        """ Looks up the configuration again, and calls the callbacks if the
+        value has changed. Returns `True` if it has. """
+
+        value = self._config.get_safely(*self._path, default=self._default)
+        if value == self._value:
+            return False
+
+        self._value = value
+
+        for callback in self._callbacks:
+            try:
+                callback(value)
+            except Exception:
+                logger.exception(
+                    "A callback of the '%s' configuration failed",
+                    '.'.join(self._path),
+                )
+
+        return True
+
 
 class ConfigDirectoryNotFoundError(FileNotFoundError):
     """ Raised by the constructor of the `Config` object if the configuration
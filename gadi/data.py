@@ -4,13 +4,33 @@ import json
 import asyncio
 import atexit
 import os
-from datetime import datetime
+import sys
+import time
+import heapq
+import weakref
+import itertools
+import sqlite3
+import tempfile
+import threading
+import collections
+
+from . import serializers, metrics
 
 logger = logging.getLogger(__name__)
 
+LOAD_SECONDS = metrics.histogram(
+    'gadi_data_load_seconds',
+    'The time it takes to read and parse a dynamic data file',
+)
+
+EVICT_SECONDS = metrics.histogram(
+    'gadi_data_evict_seconds',
+    'The time it takes to save and evict the data of a dynamic data file',
+)
+
 # - - - Typing hints - - - #
 JsonSuppored = typing.Union[None, dict, list, int, float, bool, ]
-UnixTimestamp = float
+MonotonicTimestamp = float
 
 
 class DynamicData:
@@ -22,7 +42,22 @@ class DynamicData:
     loaded to memory and will stay in memory for X seconds. If the data
     isn't accessed another time in those X seconds, the data will be saved
     to local storage and will be deleted from the memory, to save up
-    RAM. """
+    RAM.
+
+    Changes that are made using `set` and `delete` are tracked, and data that
+    wasn't changed is never written back to the storage. In journal mode,
+    those changes are appended as compact records to a journal file next to
+    the data file, instead of rewriting the whole file. The journal is folded
+    back into the data file once it grows bigger than `compact_ratio` times
+    the size of the data file.
+
+    The data file is never truncated in place: a new file is written next to
+    it, synced to the disk and then renamed over the old one, so a crash in
+    the middle of a write can't corrupt it. The `aget`, `aflush` and
+    `athrow_data` coroutines do the parsing, serialization and disk access in
+    an executor, without blocking the event loop. """
+
+    JOURNAL_EXTENTION = '.journal'
 
     def __init__(self,
                  filepath: str,
@@ -30,15 +65,27 @@ class DynamicData:
                  check_every: int = 60,
                  save_atexit: bool = True,
                  default_data: typing.Union[dict, list] = None,
+                 journal: bool = False,
+                 compact_ratio: float = 1.0,
+                 scheduler: 'DataScheduler' = None,
+                 serializer: typing.Union[str,
+                                          serializers.Serializer] = 'json',
                  ):
         """ Creates a dynamic data instance. When calling the constructor,
         the file is not actually read.
         `hold_for` is the number of seconds that the data will be stored
         in the memory before moving it to the local storage. By default,
         the data will be stored in the memory for 15 seconds.
-        `check_every` determines how frequently the instance preforms checks
-        for last updated time. `check_every` is the amount of seconds between
-        checks, and it's set to 1 minute by default. """
+        `check_every` is kept for compatibility only: the data is evicted by
+        a `DataScheduler` (by default, the one that is shared by the whole
+        process), that wakes up exactly when some data expires.
+        If `journal` is `True`, the changes are saved into a journal file
+        (see the class documentation).
+        `serializer` is the format that the file is stored in (see
+        `gadi.serializers`). If a format other than plain json is chosen, and
+        `filepath` doesn't end with the extension of the format, its
+        extension is replaced, and an existing file in the old path (in any
+        format) is migrated when it is first saved. """
 
         if (  # Checks if default_data is valid
             not default_data is None
@@ -46,31 +93,226 @@ class DynamicData:
         ):
             raise TypeError("Default data should be a dict or a list")
 
+        self._serializer = serializers.get_serializer(serializer)
         self._filepath = filepath
+
+        if (
+            self._serializer.NAME != serializers.JsonSerializer.NAME
+            and not filepath.endswith(self._serializer.EXTENTION)
+        ):
+            self._filepath = (
+                os.path.splitext(filepath)[0] + self._serializer.EXTENTION)
+
+        self._legacy_filepath = (
+            filepath if filepath != self._filepath else None)
+
         self._hold_for = hold_for
-        self._check_every = check_every
         self._default_data = default_data
 
+        self._journal = journal
+        self._compact_ratio = compact_ratio
+
         self._data: JsonSuppored = DataNotLoaded()
-        self._last_accessed: UnixTimestamp = None
+        self._last_accessed: MonotonicTimestamp = None
+
+        # Updated by each tracked change. After the data is accessed with
+        # `data()`, it is estimated again at the next access.
+        self._estimated_size = 0
+        self._size_outdated = False
+
+        # `_modified` is set when the data may have been changed without
+        # being tracked (and the whole file has to be rewritten), and
+        # `_changes` holds the tracked changes that were not saved yet.
+        self._modified = False
+        self._changes: typing.List[list] = list()
+
+        # Guards the data while it is serialized in an executor thread.
+        self._mutation_lock = threading.Lock()
+        # Makes sure that only a single write happens at a time.
+        self._write_lock: asyncio.Lock = None
+        # The pending load of the file, shared by concurrent first accesses.
+        self._loading: asyncio.Future = None
+        # Data that is being written by `athrow_data`. If it is accessed
+        # again in the meantime, it is restored instead of read again.
+        self._evicting: JsonSuppored = None
+
+        self._scheduler = scheduler or DataScheduler.shared()
+        self._scheduler.register(self)
 
         if save_atexit:
             atexit.register(self.throw_data)
 
+    @property
+    def loaded(self,) -> bool:
+        """ `True` if the data is currently loaded into the memory. """
+        return not isinstance(self._data, DataNotLoaded)
+
+    @property
+    def estimated_size(self,) -> int:
+        """ A rough estimation of the memory that the loaded data takes, in
+        bytes. """
+        return self._estimated_size if self.loaded else 0
+
+    @property
+    def journal_filepath(self,) -> str:
+        """ The path of the journal file of the instance. """
+        return self._filepath + self.JOURNAL_EXTENTION
+
+    def compare_formats(self,
+                        names: typing.Iterable[str] = None,
+                        ) -> typing.List[serializers.SerializerStats]:
+        """ Measures the size, dump time and load time of the data of the
+        instance in each of the given formats (all of the formats by
+        default), to help choosing a format for the file. """
+        return serializers.compare_serializers(self.get(), names)
+
     def data(self,) -> JsonSuppored:
         """ Returns the data that is saved in the file.
+        Loads the file if needed. Since the returned data can be changed
+        directly, the whole file will be written when the data is thrown. Use
+        `get`, `set` and `delete` to avoid that. """
+
+        data = self._access()
+        self._modified = True
+        self._size_outdated = True
+        return data
+
+    def get(self, *keys) -> JsonSuppored:
+        """ Recives a combination of keys (and list indexes), and returns the
+        stored value. If the value is not found, a KeyError (or IndexError)
+        is thrown. The returned value should not be changed. Like in json,
+        the keys of dicts are always strings (see `_json_key`). """
+
+        data = self._access()
+        for key in keys:
+            data = data[_json_key(data, key)]
+        return data
+
+    def set(self, *keys, value: JsonSuppored) -> None:
+        """ Recives a combination of keys (and list indexes), and sets the
+        value that is stored in the last key. """
+
+        if not keys:
+            raise ValueError("At least a single key is required")
+
+        target, keys = self._resolve(keys)
+
+        with self._mutation_lock:
+            previous = _item_size(target, keys[-1])
+            target[keys[-1]] = value
+            self._track(['set', keys, value])
+            self._estimated_size += _item_size(target, keys[-1]) - previous
+
+        self._scheduler.resized(self)
+
+    def delete(self, *keys) -> None:
+        """ Recives a combination of keys (and list indexes), and deletes the
+        value that is stored in the last key. """
+
+        if not keys:
+            raise ValueError("At least a single key is required")
+
+        target, keys = self._resolve(keys)
+
+        with self._mutation_lock:
+            previous = _item_size(target, keys[-1])
+            del target[keys[-1]]
+            self._track(['del', keys])
+            self._estimated_size += sys.getsizeof(target) - previous
+
+        self._scheduler.resized(self)
+
+    async def aget(self, *keys) -> JsonSuppored:
+        """ The same as `get`, but if the file isn't loaded yet, it is read
+        and parsed in an executor. Concurrent calls share a single load. """
+
+        if isinstance(self._data, DataNotLoaded) and self._evicting is None:
+            if self._loading is None:
+                self._loading = asyncio.ensure_future(self._load_in_executor())
+
+            await asyncio.shield(self._loading)
+
+        return self.get(*keys)
+
+    async def aflush(self,) -> None:
+        """ The same as `save_data`, but the data is serialized and written
+        in an executor. """
+
+        if not isinstance(self._data, DataNotLoaded):
+            await self._asave(self._data)
+
+    async def athrow_data(self,) -> None:
+        """ The same as `throw_data`, but the data is serialized and written
+        in an executor. """
+
+        if isinstance(self._data, DataNotLoaded):
+            return
+
+        start = time.perf_counter()
+        self._evicting, self._data = self._data, DataNotLoaded()
+        self._scheduler.forget(self)
+
+        try:
+            await self._asave(self._evicting)
+
+        except BaseException:
+            # The changes weren't saved, so the data is kept in the memory
+            # (unless it was already accessed again in the meantime), and
+            # saving it is tried again when it expires.
+            if isinstance(self._data, DataNotLoaded):
+                self._data = self._evicting
+                self._last_accessed = time.monotonic()
+                self._scheduler.touched(self)
+            raise
+
+        finally:
+            self._evicting = None
+            EVICT_SECONDS.observe(time.perf_counter() - start)
+
+    def _resolve(self,
+                 keys: typing.Sequence,
+                 ) -> typing.Tuple[JsonSuppored, typing.List]:
+        """ Returns the value that contains the last of the given keys, and
+        the keys as they are stored (see `_json_key`). """
+
+        target = self._access()
+        resolved = list()
+
+        for key in keys[:-1]:
+            key = _json_key(target, key)
+            target = target[key]
+            resolved.append(key)
+
+        resolved.append(_json_key(target, keys[-1]))
+        return target, resolved
+
+    def _track(self, change: list) -> None:
+        """ Marks the data as changed, and stores the change in journal mode
+        (where it will be written to the journal file). """
+
+        if self._journal:
+            self._changes.append(change)
+        else:
+            self._modified = True
+
+    def _access(self,) -> JsonSuppored:
+        """ Returns the loaded data, and updates the last accessed time.
         Loads the file if needed. """
 
         if isinstance(self._data, DataNotLoaded):
-            self.load_data()
+            if self._evicting is not None:
+                self._data = self._evicting
+            else:
+                self.load_data()
 
-        # Update last accessed timestamp
-        now = datetime.now().timestamp()
-        first_time = self._last_accessed is None
-        self._last_accessed = now
+        if self._size_outdated:
+            # The data might have been changed through `data()`.
+            self._size_outdated = False
+            self._estimated_size = estimate_size(self._data)
 
-        if first_time:
-            asyncio.create_task(self._update_check_loop())
+        # Update last accessed timestamp
+        self._last_accessed = time.monotonic()
+        self._scheduler.touched(self)
 
         return self._data
 
@@ -78,65 +320,801 @@ class DynamicData:
         """ When called, loads the file from the storage (overwrites already
         loaded data if needed). """
 
-        if os.path.isfile(self._filepath):
-            with open(self._filepath) as file:
-                self._data = json.load(file,)
+        self._set_loaded(*self._read_data())
+
+    def load_default_data(self,) -> None:
+        """ Loads the default data provided to the constructor as the dynamic
+        data of this instance. """
+
+        data = self._get_default_data()
+        self._set_loaded(data, True, estimate_size(data))
 
-            logger.debug("Loaded dynamic data: %s", self._filepath)
+    def throw_data(self,) -> None:
+        """ When called, deletes the data file from the memory, and saves it
+        into the storage. """
+
+        if isinstance(self._data, DataNotLoaded):
+            return  # if data is already not loaded, does nothing silently.
+
+        start = time.perf_counter()
+        self.save_data()
+        self._data = DataNotLoaded()
+        self._scheduler.forget(self)
+        EVICT_SECONDS.observe(time.perf_counter() - start)
 
-        else:   # If file doesn't exist
-            logger.warning(
-                "File not found while loading dynamic data: %s",
-                self._filepath
+    def save_data(self,) -> None:
+        """ Saves the changes that were made to the loaded data into the
+        storage, without removing the data from the memory. Does nothing if
+        the data wasn't changed. """
+
+        if isinstance(self._data, DataNotLoaded):
+            return
+
+        modified, changes = self._take_changes()
+
+        try:
+            self._write_data(self._data, modified, changes)
+        except BaseException:
+            self._restore_changes(modified, changes)
+            raise
+
+    # - - - Loading - - - #
+
+    def _read_data(self,) -> typing.Tuple[JsonSuppored, bool, int]:
+        """ Reads and parses the data file and its journal. Returns the data,
+        whether it has to be written again (as a whole) to the storage, and
+        the estimated size of it in memory. Doesn't change the state of the
+        instance, so it can run in an executor. """
+
+        start = time.perf_counter()
+        try:
+            return self._read_files()
+        finally:
+            LOAD_SECONDS.observe(time.perf_counter() - start)
+
+    def _read_files(self,) -> typing.Tuple[JsonSuppored, bool, int]:
+        """ The implementation of `_read_data`. """
+
+        for filepath in (self._filepath, self._legacy_filepath):
+            if filepath is None or not os.path.isfile(filepath):
+                continue
+
+            with open(filepath, 'rb') as file:
+                content = file.read()
+
+            # The format is detected, so files in other formats are migrated.
+            serializer = serializers.detect_serializer(content)
+            data = serializer.loads(content)
+
+            logger.debug("Loaded dynamic data: %s", filepath)
+
+            complete = self._replay_journal(
+                data, filepath + self.JOURNAL_EXTENTION)
+
+            migrate = (
+                filepath != self._filepath
+                or serializer.NAME != self._serializer.NAME
             )
 
-            self.load_default_data()
+            return data, migrate or not complete, estimate_size(data)
 
-    def load_default_data(self,) -> None:
-        """ Loads the default data provided to the constructor as the dynamic
-        data of this instance. """
+        # If file doesn't exist
+        logger.warning(
+            "File not found while loading dynamic data: %s",
+            self._filepath
+        )
+
+        data = self._get_default_data()
+        return data, True, estimate_size(data)
+
+    def _get_default_data(self,) -> JsonSuppored:
+        """ Returns the default data provided to the constructor. """
 
         if self._default_data is None:
             raise ValueError("Dynamic default data is not provided")
 
-        self._data = self._default_data
-
         logger.warning(
             "Loaded default data to dynamic data instance: %s", self._filepath)
 
-    def throw_data(self,) -> None:
-        """ When called, deletes the data file from the memory, and saves it
-        into the storage. """
+        return self._default_data
 
-        if isinstance(self._data, DataNotLoaded):
-            return  # if data is already not loaded, does nothing silently.
+    def _set_loaded(self,
+                    data: JsonSuppored,
+                    modified: bool,
+                    size: int,
+                    ) -> None:
+        """ Stores the given data as the loaded data of the instance. """
 
-        with open(self._filepath, 'w') as file:
-            json.dump(self._data, file)
+        self._data = data
+        self._modified = modified
+        self._changes = list()
+        self._estimated_size = size
+        self._size_outdated = False
 
-        self._data = DataNotLoaded()
+    async def _load_in_executor(self,) -> None:
+        """ Reads and parses the data file in an executor, and stores the
+        result as the loaded data. """
+
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self._read_data)
+
+            # The data might have been loaded synchronously in the meantime.
+            if isinstance(self._data, DataNotLoaded):
+                self._set_loaded(*result)
+
+        finally:
+            self._loading = None
+
+    # - - - Saving - - - #
+
+    def _take_changes(self,) -> typing.Tuple[bool, typing.List[list]]:
+        """ Returns the changes that were not saved yet, and marks them as
+        saved. """
+
+        modified, changes = self._modified, self._changes
+        self._modified, self._changes = False, list()
+        return modified, changes
+
+    def _restore_changes(self, modified: bool, changes: typing.List[list]):
+        """ Marks the given changes as not saved again (after a failed
+        write). """
+
+        self._modified = self._modified or modified
+        self._changes = changes + self._changes
+
+    async def _asave(self, data: JsonSuppored) -> None:
+        """ Saves the changes of the given data in an executor. """
+
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+
+        async with self._write_lock:
+            modified, changes = self._take_changes()
+            if not modified and not changes:
+                return
+
+            loop = asyncio.get_running_loop()
+
+            try:
+                await loop.run_in_executor(
+                    None, self._write_data, data, modified, changes)
+            except BaseException:
+                self._restore_changes(modified, changes)
+                raise
+
+    def _write_data(self,
+                    data: JsonSuppored,
+                    modified: bool,
+                    changes: typing.List[list],
+                    ) -> None:
+        """ Writes the given changes of the data to the storage. Can run in
+        an executor. """
+
+        with self._mutation_lock:
+            if modified:
+                self._write_snapshot(data)
+
+            elif changes:
+                self._write_journal(changes)
+
+                if self._should_compact():
+                    self._write_snapshot(data)
+
+            else:
+                return  # Nothing was changed, the file is up to date.
 
         logger.debug("Saved dynamic data: %s", self._filepath)
 
-    async def _update_check_loop(self,):
-        """ A loop that runs while the file is loaded. Sleeps must of the time,
-        but once in a while wakes up and checks if the file is old enough. If
-        it is (and it haven't been accessed), the data is throwen. """
+    def _write_snapshot(self, data: JsonSuppored) -> None:
+        """ Writes the whole data into the data file, and removes the journal
+        (since all of the changes in it are included in the new file). """
+
+        _atomic_write(self._filepath, self._serializer.dumps(data))
+        self._estimated_size = estimate_size(data)
 
-        while self._last_accessed is not None:
-            await asyncio.sleep(self._check_every)
+        if os.path.isfile(self.journal_filepath):
+            os.remove(self.journal_filepath)
 
-            now = datetime.now().timestamp()
-            delta = now - self._last_accessed
+        if self._legacy_filepath is not None:
+            # The data was migrated into the new file.
+            for filepath in (
+                self._legacy_filepath,
+                self._legacy_filepath + self.JOURNAL_EXTENTION,
+            ):
+                if os.path.isfile(filepath):
+                    os.remove(filepath)
+                    logger.info("Migrated dynamic data file: %s", filepath)
+
+    # - - - Journal - - - #
+
+    def _write_journal(self, changes: typing.List[list]) -> None:
+        """ Appends the given changes to the journal file, one compact json
+        record in each line. """
+
+        with open(self.journal_filepath, 'a') as file:
+            file.writelines(
+                json.dumps(change, separators=(',', ':')) + '\n'
+                for change in changes
+            )
 
-            if delta >= self._hold_for:
-                self.throw_data()
-                self._last_accessed = None
+            file.flush()
+            os.fsync(file.fileno())
 
+    def _should_compact(self,) -> bool:
+        """ Returns `True` if the journal is big enough, compared to the data
+        file, to be folded into a new data file. """
+
+        try:
+            journal_size = os.path.getsize(self.journal_filepath)
+            data_size = os.path.getsize(self._filepath)
+        except FileNotFoundError:
+            return True
+
+        return journal_size > data_size * self._compact_ratio
+
+    def _replay_journal(self, data: JsonSuppored, journal_filepath: str):
+        """ Applies the changes stored in the given journal file (if there is
+        one) to the given data. Returns `False` if a broken record was found
+        (and the data should be written again as a whole). """
+
+        if not os.path.isfile(journal_filepath):
+            return True
+
+        with open(journal_filepath) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+
+                try:
+                    operation, keys, *value = json.loads(line)
+                except ValueError:
+                    # A partially written record, from a crash in the middle
+                    # of an append. Nothing after it can be trusted.
+                    logger.warning(
+                        "Ignored a broken journal record in: %s",
+                        journal_filepath,
+                    )
+                    return False
+
+                # Older records might contain keys that aren't strings.
+                *path, last = keys
+                target = data
+                for key in path:
+                    target = target[_json_key(target, key)]
+
+                last = _json_key(target, last)
+                if operation == 'set':
+                    target[last] = value[0]
+                elif operation == 'del':
+                    del target[last]
+
+        logger.debug("Replayed dynamic data journal: %s", journal_filepath)
+
+        return True
 
 # - - - Other objects - - - #
 
 
+class KeyedDynamicData:
+
+    """ A variant of `DynamicData` for big collections of independent
+    records (for example, one for each guild or user), that are accessed by
+    a key. The records are stored in a local sqlite file, which keeps an
+    on-disk index of the keys, so only the records that are actually accessed
+    are read, parsed and held in the memory. The cached records are evicted
+    (and the changes are saved) after `hold_for` seconds without access, by
+    the same `DataScheduler` that evicts `DynamicData` instances. """
+
+    def __init__(self,
+                 filepath: str,
+                 hold_for: int = 15 * 60,
+                 save_atexit: bool = True,
+                 scheduler: 'DataScheduler' = None,
+                 ):
+        """ Creates a keyed dynamic data instance. When calling the
+        constructor, the file is not actually opened. """
+
+        self._filepath = filepath
+        self._hold_for = hold_for
+
+        self._connection: sqlite3.Connection = None
+        # Guards the connection and the pending changes, which are also used
+        # from executor threads.
+        self._lock = threading.RLock()
+
+        self._records: typing.Dict[str, JsonSuppored] = dict()
+        self._sizes: typing.Dict[str, int] = dict()
+        self._size = 0  # The sum of `_sizes`
+        self._changed: typing.Set[str] = set()
+        self._deleted: typing.Set[str] = set()
+
+        self._last_accessed: MonotonicTimestamp = None
+
+        self._scheduler = scheduler or DataScheduler.shared()
+        self._scheduler.register(self)
+
+        if save_atexit:
+            atexit.register(self.throw_data)
+
+    @property
+    def loaded(self,) -> bool:
+        """ `True` if any records are currently held in the memory. """
+        with self._lock:
+            return bool(self._records or self._deleted)
+
+    @property
+    def estimated_size(self,) -> int:
+        """ A rough estimation of the memory that the cached records take, in
+        bytes. """
+        return self._size
+
+    def get(self, key: str, default: JsonSuppored = None) -> JsonSuppored:
+        """ Returns the record that is stored under the given key, or the
+        default value if there is no such record. The returned value should
+        not be changed (use `set` instead). """
+
+        self._touch()
+
+        # The records might be saved or thrown in an executor thread at the
+        # same time.
+        with self._lock:
+            if key in self._records:
+                return self._records[key]
+
+            if key in self._deleted:
+                return default
+
+            row = self._execute(
+                'SELECT value FROM records WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                return default
+
+            value = json.loads(row[0])
+            self._cache(key, value)
+
+        self._scheduler.resized(self)
+        return value
+
+    def set(self, key: str, value: JsonSuppored) -> None:
+        """ Stores the given value under the given key. """
+
+        self._touch()
+
+        with self._lock:
+            self._cache(key, value)
+            self._changed.add(key)
+            self._deleted.discard(key)
+
+        self._scheduler.resized(self)
+
+    def delete(self, key: str) -> None:
+        """ Deletes the record that is stored under the given key (if there
+        is one). """
+
+        self._touch()
+
+        with self._lock:
+            self._records.pop(key, None)
+            self._size -= self._sizes.pop(key, 0)
+            self._changed.discard(key)
+            self._deleted.add(key)
+
+        self._scheduler.resized(self)
+
+    def iter_keys(self, page_size: int = 512) -> typing.Iterator[str]:
+        """ Iterates over the keys of all of the records, in sorted order,
+        without reading the records themselves. The keys are read from the
+        storage in pages of `page_size` keys, and the changes that weren't
+        saved yet are merged into them (without saving them). Keys that are
+        set or deleted while iterating may or may not be included. """
+
+        last = None     # The last key that was read from the storage
+
+        while True:
+            with self._lock:
+                if last is None:
+                    rows = self._execute(
+                        'SELECT key FROM records ORDER BY key LIMIT ?',
+                        (page_size,),
+                    )
+                else:
+                    rows = self._execute(
+                        'SELECT key FROM records WHERE key > ? '
+                        'ORDER BY key LIMIT ?',
+                        (last, page_size),
+                    )
+
+                stored = [row[0] for row in rows]
+                exhausted = len(stored) < page_size
+                end = None if exhausted else stored[-1]
+
+                # Sqlite compares the keys by their UTF-8 bytes, which is the
+                # same order as of the python strings.
+                changed = [
+                    key for key in self._changed
+                    if (last is None or key > last)
+                    and (end is None or key <= end)
+                ]
+
+                keys = sorted(set(stored).union(changed) - self._deleted)
+
+            yield from keys
+
+            if exhausted:
+                return
+
+            last = end
+
+    def save_data(self,) -> None:
+        """ Writes the changed records into the storage, without removing
+        them from the memory. """
+
+        with self._lock:
+            if not self._changed and not self._deleted:
+                return
+
+            connection = self._connect()
+            with connection:    # A single transaction
+                connection.executemany(
+                    'INSERT OR REPLACE INTO records (key, value) '
+                    'VALUES (?, ?)',
+                    [
+                        (key, json.dumps(self._records[key]))
+                        for key in self._changed
+                    ],
+                )
+                connection.executemany(
+                    'DELETE FROM records WHERE key = ?',
+                    [(key,) for key in self._deleted],
+                )
+
+            self._changed.clear()
+            self._deleted.clear()
+
+        logger.debug("Saved keyed dynamic data: %s", self._filepath)
+
+    def throw_data(self,) -> None:
+        """ Saves the changed records, and removes all of the records from
+        the memory. """
+
+        self._throw_records()
+        self._scheduler.forget(self)
+
+    async def aflush(self,) -> None:
+        """ The same as `save_data`, but runs in an executor. """
+        await asyncio.get_running_loop().run_in_executor(None, self.save_data)
+
+    async def athrow_data(self,) -> None:
+        """ The same as `throw_data`, but the records are saved in an
+        executor. The scheduler is only used from the event loop thread. """
+
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._throw_records)
+        self._scheduler.forget(self)
+
+    # - - - Private & Protected methods - - - #
+
+    def _throw_records(self,) -> None:
+        """ Saves the changed records, removes all of the records from the
+        memory and closes the sqlite file. Can run in an executor. """
+
+        with self._lock:
+            self.save_data()
+            self._records.clear()
+            self._sizes.clear()
+            self._size = 0
+
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _touch(self,) -> None:
+        """ Updates the last accessed time. """
+        self._last_accessed = time.monotonic()
+        self._scheduler.touched(self)
+
+    def _cache(self, key: str, value: JsonSuppored) -> None:
+        """ Holds the given record in the memory. """
+
+        size = estimate_size(value)
+        self._size += size - self._sizes.get(key, 0)
+        self._records[key] = value
+        self._sizes[key] = size
+
+    def _connect(self,) -> sqlite3.Connection:
+        """ Returns the connection to the sqlite file, and opens it (and
+        creates the table) if needed. """
+
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self._filepath, check_same_thread=False)
+
+            # Write-ahead logging, so a crash never corrupts the file.
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS records '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID'
+            )
+
+            logger.debug("Opened keyed dynamic data: %s", self._filepath)
+
+        return self._connection
+
+    def _execute(self, query: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """ Executes the given query on the sqlite file. """
+        return self._connect().execute(query, parameters)
+
+
+class DataScheduler:
+    """ A registry of `DynamicData` (and `KeyedDynamicData`) instances, that
+    evicts their data from the memory. Instead of a timer for each instance,
+    a single task sleeps until the earliest expiration time (kept in a
+    heap). In addition, if a memory
+    budget is set and the estimated size of all of the loaded data exceeds
+    it, the least recently used data is evicted until it fits. """
+
+    _shared: 'DataScheduler' = None
+
+    def __init__(self, memory_budget: int = None):
+        """ `memory_budget` is the maximal number of bytes that the loaded
+        data of all of the instances should take (`None` for no limit). """
+
+        self.memory_budget = memory_budget
+
+        self._instances: typing.Set[DynamicData] = weakref.WeakSet()
+        # The loaded instances, from the least recently used to the most.
+        self._loaded: typing.Dict[int, DynamicData] = \
+            collections.OrderedDict()
+        # The estimated size of each loaded instance, as it was last counted
+        # in the total size.
+        self._sizes: typing.Dict[int, int] = dict()
+        self._loaded_size = 0
+
+        self._heap: typing.List[tuple] = list()
+        self._scheduled: typing.Set[int] = set()
+        self._counter = itertools.count()
+
+        self._task: asyncio.Task = None
+        self._wakeup: asyncio.Event = None
+
+    @classmethod
+    def shared(cls,) -> 'DataScheduler':
+        """ Returns the scheduler that is shared by the whole process. """
+
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @property
+    def loaded_size(self,) -> int:
+        """ The estimated size of all of the loaded data, in bytes. """
+        return self._loaded_size
+
+    def instances(self,) -> typing.List[DynamicData]:
+        """ Returns all of the registered instances. """
+        return list(self._instances)
+
+    def register(self, instance: DynamicData) -> None:
+        """ Called by each `DynamicData` instance when it is created. """
+        self._instances.add(instance)
+
+    def touched(self, instance: DynamicData) -> None:
+        """ Called when the data of the given instance is accessed. """
+
+        key = id(instance)
+        self._loaded[key] = instance
+        self._loaded.move_to_end(key)
+
+        if key not in self._scheduled:
+            expires = instance._last_accessed + instance._hold_for
+            self._schedule(instance, expires)
+        else:
+            self._ensure_running()
+
+        self.resized(instance)
+
+    def resized(self, instance: DynamicData) -> None:
+        """ Called when the estimated size of the data of the given instance
+        might have changed. """
+
+        key = id(instance)
+        if key not in self._loaded:
+            return
+
+        size = instance.estimated_size
+        self._loaded_size += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+        self._enforce_budget()
+
+    def forget(self, instance: DynamicData) -> None:
+        """ Called when the data of the given instance is evicted. """
+
+        key = id(instance)
+        self._loaded.pop(key, None)
+        self._loaded_size -= self._sizes.pop(key, 0)
+
+    # - - - Private & Protected methods - - - #
+
+    def _schedule(self, instance: DynamicData, deadline: float) -> None:
+        """ Adds an expiration check of the given instance to the heap. """
+
+        self._scheduled.add(id(instance))
+        heapq.heappush(self._heap, (deadline, next(self._counter), instance))
+
+        if self._ensure_running() and self._heap[0][2] is instance:
+            self._wakeup.set()   # The new deadline is the earliest one.
+
+    def _ensure_running(self,) -> bool:
+        """ Starts the scheduler task if it isn't running. Returns `True` if
+        the task was already running. """
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # Without an event loop, data is only saved at exit.
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            return False
+
+        return True
+
+    def _enforce_budget(self,) -> None:
+        """ Evicts the least recently used data until the loaded data fits
+        into the memory budget. The most recently used data is never
+        evicted. """
+
+        if self.memory_budget is None:
+            return
+
+        while (
+            self._loaded_size > self.memory_budget
+            and len(self._loaded) > 1
+        ):
+            instance = next(iter(self._loaded.values()))
+            logger.debug(
+                "Evicting dynamic data to fit the memory budget: %s",
+                instance._filepath,
+            )
+            self._evict(instance)
+
+    def _evict(self, instance: DynamicData) -> None:
+        """ Evicts the data of the given instance, in the background if there
+        is a running event loop. The instance is forgotten right away. """
+
+        self.forget(instance)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            instance.throw_data()
+        else:
+            asyncio.create_task(instance.athrow_data())
+
+    async def _run(self,) -> None:
+        """ Sleeps until the earliest deadline, and evicts the data of the
+        instances that weren't accessed since they were scheduled. """
+
+        while self._heap:
+            deadline, _, instance = self._heap[0]
+            delay = deadline - time.monotonic()
+
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            self._scheduled.discard(id(instance))
+
+            if not instance.loaded:
+                continue
+
+            expires = instance._last_accessed + instance._hold_for
+            if expires > time.monotonic():
+                # Accessed since it was scheduled.
+                self._schedule(instance, expires)
+                continue
+
+            try:
+                await instance.athrow_data()
+            except Exception:
+                logger.exception(
+                    "Failed to save dynamic data: %s", instance._filepath)
+
+
 class DataNotLoaded:
     """ Stored as a placeholder (used kind of as a `None`) in the implementation
     of the DynamicData object. """
+
+
+def estimate_size(data: JsonSuppored) -> int:
+    """ Returns a rough estimation of the memory that the given json data
+    takes, in bytes. """
+
+    size = 0
+    stack = [data]
+
+    while stack:
+        value = stack.pop()
+        size += sys.getsizeof(value)
+
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+    return size
+
+
+def _item_size(container: JsonSuppored, key) -> int:
+    """ Returns the estimated size of the given container itself, with the
+    value that is stored under the given key (and the key itself, for dicts)
+    if there is one, so the change of the estimation of the whole data is the
+    change of this value. """
+
+    size = sys.getsizeof(container)
+
+    if isinstance(container, dict):
+        if key in container:
+            size += sys.getsizeof(key) + estimate_size(container[key])
+
+    elif -len(container) <= key < len(container):
+        size += estimate_size(container[key])
+
+    return size
+
+
+def _json_key(container: JsonSuppored, key) -> typing.Any:
+    """ Returns the given key of the given value as json stores it: the keys
+    of dicts are converted into strings the same way `json.dumps` converts
+    them (for example, `1` into `'1'`), and list indexes are kept as they
+    are. """
+
+    if isinstance(container, dict) and not isinstance(key, str):
+        return json.dumps(key)
+    return key
+
+
+def _atomic_write(filepath: str, content: bytes) -> None:
+    """ Replaces the content of the given file. The content is written into
+    a temporary file in the same folder, synced to the disk, and then renamed
+    over the original file, so the file always contains either the old or the
+    new content (and never a part of it). """
+
+    folder = os.path.dirname(os.path.abspath(filepath))
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=folder,
+        prefix=os.path.basename(filepath) + '.',
+        suffix='.tmp',
+    )
+
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp_path, filepath)
+
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        # Sync the folder as well, so the rename itself survives a crash.
+        folder_descriptor = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(folder_descriptor)
+        finally:
+            os.close(folder_descriptor)
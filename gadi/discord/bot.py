@@ -1,8 +1,15 @@
 import typing
 import logging
+import asyncio
 import discord
 
-from .handlers.base import BaseMessageHandler, BaseCommand
+from ..data import DataScheduler
+from ..metrics import MetricsServer
+from .handlers.base import CommandMatch
+from .scoring import MessageScorer
+from .executor import ScoringExecutor
+from .dispatcher import CommandDispatcher, DispatcherStats
+from .logger import DiscordLoggingChannel
 
 logger = logging.getLogger(__name__)
 
@@ -12,18 +19,90 @@ MessageHandlers = (
 
 class GadiBot(discord.Client):
 
-    def __init__(self, config, *args, **options):
+    def __init__(self,
+                 config,
+                 *args,
+                 Handlers: typing.Iterable[type] = MessageHandlers,
+                 **options):
+        """ Creates the bot. `Handlers` are the message handler classes that
+        the bot uses (by default, all of the handlers of the bot). """
+
         super().__init__(*args, **options)
         self._config = config
+        self._config_watcher: typing.Optional[asyncio.Task] = None
+
+        self._threshold = config.bind(
+            'settings', 'score-threshold', default=0.7)
+        self._wake_words = config.bind('settings', 'wake-words')
+        self._wake_word_typos = config.bind(
+            'settings', 'wake-word-typos', default=0)
+
+        budget = config.get_safely('settings', 'data-memory-budget')
+        if budget is not None:
+            # Configured in megabytes
+            DataScheduler.shared().memory_budget = int(budget * 1024 ** 2)
+
+        Handlers = tuple(Handlers)
         self._handlers = {
             Handler(config)
-            for Handler in MessageHandlers
+            for Handler in Handlers
         }
 
+        self._scorer = MessageScorer(self._handlers, config)
+        self._executor = ScoringExecutor.from_config(
+            self._scorer, config, Handlers=Handlers)
+        self._dispatcher = CommandDispatcher.from_config(config)
+
+        for handle in (self._wake_words, self._wake_word_typos):
+            handle.on_change(self._scorer.reload_wake_words)
+
+        # Cached matches are no longer valid if the matching rules change,
+        # and worker processes have to load the new rules.
+        for handle in (
+            self._threshold, self._wake_words, self._wake_word_typos,
+        ):
+            handle.on_change(self._executor.reload_config)
+
+        self._metrics_server = MetricsServer.from_config(config)
+        self._metrics_started = False
+
     async def on_ready(self,) -> None:
         """ Called when the bot finishes to boot up. """
         logger.info("Successfully Logged in: %s", self.user)
 
+        interval = self._config.get_safely(
+            'settings', 'config-reload-interval', default=5)
+
+        if interval and self._config_watcher is None:
+            self._config_watcher = asyncio.create_task(
+                self._config.watch(interval))
+
+        if self._metrics_server is not None and not self._metrics_started:
+            self._metrics_started = True
+            try:
+                await self._metrics_server.start()
+            except OSError:
+                logger.exception("Failed to start the metrics server")
+
+    async def close(self,) -> None:
+        """ Called when the bot is shutting down. """
+        if self._config_watcher is not None:
+            self._config_watcher.cancel()
+
+        await self._dispatcher.close()
+        self._executor.shutdown()
+
+        if self._metrics_server is not None:
+            await self._metrics_server.close()
+
+        # Sends the log records that are still pending, while the bot is
+        # still connected.
+        for handler in logging.getLogger('gadi').handlers:
+            if isinstance(handler, DiscordLoggingChannel):
+                await handler.aclose()
+
+        await super().close()
+
     async def on_message(self, message: discord.Message) -> None:
         """ Called by the `discord` module when a message websocket is
         received. """
@@ -31,24 +110,31 @@ class GadiBot(discord.Client):
         if message.author == self.user:
             return  # If message sent by the bot itself, exits the function.
 
-        command: BaseCommand = max((
-            handler.message_to_command(message)
-            for handler in self._handlers
-        ),
-            key=lambda command: command.score
-        )
-
-        threshold = self._config.get_safely(
-            'settings', 'score-threshold',
-            default=0.7,
-        )
-
-        if command.score >= threshold:
-            await command.message_handle()
-
-            logger.info(
-                "The '%s' command class (matching %d%%) handled the following message: '%s'",
-                command.__class__.__name__,
-                int(command.score * 100),
-                message.content,
-            )
+        # Reserved before scoring, so the messages of each channel are
+        # handled in the order they were received.
+        ticket = self._dispatcher.reserve(message.channel.id)
+
+        if ticket is None:
+            return  # Too many messages of the channel wait to be scored.
+
+        match: typing.Optional[CommandMatch] = None
+
+        try:
+            # Shared by all of the handlers, so the message content is
+            # cleaned (and searched for wake words) only once.
+            context = self._scorer.context(message)
+
+            threshold = self._threshold.value
+
+            match = await self._executor.best_command(context, threshold)
+
+            if match is not None and match.score < threshold:
+                match = None
+
+        finally:
+            # The command is handled (and logged) by the dispatcher.
+            self._dispatcher.fulfill(ticket, match)
+
+    def dispatcher_stats(self,) -> DispatcherStats:
+        """ Returns the current statistics of the message queues. """
+        return self._dispatcher.stats()
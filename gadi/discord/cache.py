@@ -0,0 +1,102 @@
+import time
+import typing
+import collections
+
+from .. import metrics
+
+REQUESTS = metrics.counter(
+    'gadi_match_cache_requests_total',
+    'Lookups in the match cache, by whether the match was cached',
+    ('result', ),
+)
+
+# Returned by `MatchCache.get` when the key isn't cached (`None` is a valid
+# cached value).
+MISSING = object()
+
+
+class MatchCacheStats(typing.NamedTuple):
+    size: int       # Cached matches
+    hits: int
+    misses: int
+
+
+class MatchCache:
+    """ Remembers the command that was matched with recent messages, so
+    repeated messages (like a popular command that many users send) are
+    scored only once. The least recently used matches are removed when the
+    cache is full, and matches expire after `ttl` seconds, so the cache can't
+    serve stale matches for long.
+
+    The keys are built by `MessageScorer.cache_key`, from the normalized
+    content of the message. The cache should be cleared whenever the
+    matching rules change (the handlers, the wake words or the
+    threshold). """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: typing.OrderedDict[typing.Hashable, tuple] = \
+            collections.OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_config(cls, config) -> typing.Optional['MatchCache']:
+        """ Creates a cache as configured in the `match-cache` section of the
+        settings file, or returns `None` if the cache is disabled (its size is
+        0). """
+
+        size = config.get_safely(
+            'settings', 'match-cache', 'size', default=1024)
+        if not size:
+            return None
+
+        return cls(
+            max_size=size,
+            ttl=config.get_safely(
+                'settings', 'match-cache', 'ttl', default=300),
+        )
+
+    def get(self, key: typing.Hashable):
+        """ Returns the cached value of the given key, or `MISSING`. """
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires, value = entry
+
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                REQUESTS.labels('hit').inc()
+                return value
+
+            del self._entries[key]
+
+        self._misses += 1
+        REQUESTS.labels('miss').inc()
+        return MISSING
+
+    def put(self, key: typing.Hashable, value) -> None:
+        """ Caches the given value, and removes the least recently used one
+        if the cache is full. """
+
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self, *_) -> None:
+        """ Removes all of the cached values. Accepts (and ignores) any
+        arguments, so it can be used as a configuration change callback. """
+        self._entries.clear()
+
+    def stats(self,) -> MatchCacheStats:
+        return MatchCacheStats(
+            size=len(self._entries),
+            hits=self._hits,
+            misses=self._misses,
+        )
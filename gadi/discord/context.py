@@ -0,0 +1,128 @@
+import typing
+import discord
+
+import gadi.utils as utils
+from .wakewords import WakeWordDetector, WakeWordMatch
+
+
+class MessageContext:
+    """ Wraps a single received message. Created once by `GadiBot.on_message`
+    and shared between all of the handlers and commands, so the work of
+    cleaning the message content (and finding the wake words in it) is done
+    only once for each message, and not once for each command.
+
+    The wake words are found by the given detector. Without a detector, the
+    bot is never addressed. """
+
+    __slots__ = ('message', 'wake_words', '_variants', '_wake_word_matches', )
+
+    def __init__(self,
+                 message: discord.Message,
+                 wake_words: WakeWordDetector = None,
+                 ):
+        self.message = message
+        self.wake_words = wake_words
+        self._variants: typing.Dict[tuple, str] = dict()
+        self._wake_word_matches: typing.Dict[
+            str, typing.Optional[WakeWordMatch]] = dict()
+
+    @property
+    def content(self,) -> str:
+        """ The raw content of the wrapped message. """
+        return self.message.content
+
+    @property
+    def wake_word(self,) -> typing.Optional[WakeWordMatch]:
+        """ Where the bot is addressed in the (default) cleaned content, or
+        `None` if it isn't addressed. """
+        return self.wake_word_in(self.cleaned())
+
+    def cleaned(self,
+                case_sensitive: bool = False,
+                ignore_markdown: bool = True,
+                ignore_mentions: bool = True,
+                ignore_channel_mentions: bool = True,
+                ignore_whitespaces: bool = True,
+                ignore_niqqud: bool = False,
+                ignore_final_letters: bool = False,
+                ) -> str:
+        """ Returns the content of the message, cleaned as requested by the
+        given flags (see `utils.Normalizer`). Each combination of flags is
+        calculated only once, when it is first requested. """
+
+        key = (
+            case_sensitive,
+            ignore_markdown,
+            ignore_mentions,
+            ignore_channel_mentions,
+            ignore_whitespaces,
+            ignore_niqqud,
+            ignore_final_letters,
+        )
+
+        variant = self._variants.get(key)
+        if variant is None:
+            normalizer = utils.get_normalizer(*key)
+            variant = self._variants[key] = normalizer(self.content)
+
+        return variant
+
+    def cleaned_for(self, pattern) -> str:
+        """ Returns the content of the message, cleaned as requested by the
+        given `CommandPattern`. """
+        return self.cleaned(**pattern.cleaning_flags())
+
+    def wake_word_in(self, variant: str) -> typing.Optional[WakeWordMatch]:
+        """ Returns where the bot is addressed in the given cleaned variant of
+        the content. Each variant is searched only once. """
+
+        if self.wake_words is None:
+            return None
+
+        try:
+            return self._wake_word_matches[variant]
+        except KeyError:
+            match = self._wake_word_matches[variant] = \
+                self.wake_words.detect(variant)
+            return match
+
+    def scored_text(self,
+                    require_keyword: typing.Union[bool, str] = False,
+                    max_length: float = None,
+                    **flags: bool,
+                    ) -> typing.Optional[str]:
+        """ Returns the string that is compared against the phrases of
+        patterns with the given `require_keyword` value and cleaning flags
+        (see `CommandPattern`): the cleaned content, without the wake word if
+        one is required. Returns `None` if a wake word is required, but the
+        bot isn't addressed as required.
+
+        If a wake word is required and `max_length` is given, `None` is
+        returned without searching for the wake words when the string is
+        surely longer than `max_length` (for example, if it is too long to
+        reach the score threshold anyway). """
+
+        variant = self.cleaned(**flags)
+        if not require_keyword:
+            return variant
+
+        if self.wake_words is None or (
+            max_length is not None
+            and self.wake_words.min_remainder_length(variant) > max_length
+        ):
+            return None
+
+        match = self.wake_word_in(variant)
+        if match is None or (require_keyword == 'prefix' and match.start):
+            return None
+
+        return WakeWordDetector.remainder(variant, match)
+
+    def scored_text_for(self,
+                        pattern,
+                        max_length: float = None,
+                        ) -> typing.Optional[str]:
+        """ Returns the string that is compared against the phrase of the
+        given `CommandPattern` (see `scored_text`). """
+        return self.scored_text(
+            pattern.require_keyword, max_length, **pattern.cleaning_flags())
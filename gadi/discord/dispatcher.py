@@ -0,0 +1,377 @@
+import time
+import typing
+import logging
+import asyncio
+import heapq
+import itertools
+
+from .. import metrics
+from .handlers.base import CommandMatch
+
+logger = logging.getLogger(__name__)
+
+HANDLE_SECONDS = metrics.histogram(
+    'gadi_command_handle_seconds',
+    'The time it takes a command to handle a message',
+    ('command', ),
+)
+
+HANDLE_FAILURES = metrics.counter(
+    'gadi_command_handle_failures_total',
+    'Messages that a command failed to handle',
+    ('command', ),
+)
+
+QUEUED = metrics.gauge(
+    'gadi_dispatcher_queued_messages',
+    'Messages that wait in the queues of the channels',
+)
+
+IN_FLIGHT = metrics.gauge(
+    'gadi_dispatcher_in_flight_messages',
+    'Messages that are currently handled by a command',
+)
+
+DROPPED = metrics.counter(
+    'gadi_dispatcher_dropped_messages_total',
+    'Messages that were shed or rejected because their channel was full',
+)
+
+
+class DispatchTicket:
+    """ A place in the queue of a channel, that is reserved for a message
+    while the message is being scored. """
+
+    __slots__ = ('channel_id', 'sequence', 'future', )
+
+    def __init__(self,
+                 channel_id: int,
+                 sequence: int,
+                 future: asyncio.Future,
+                 ):
+        self.channel_id = channel_id
+        self.sequence = sequence
+        self.future = future
+
+    @property
+    def match(self,) -> typing.Optional[CommandMatch]:
+        """ The command that matched the message of the ticket, or `None` if
+        the message wasn't scored yet (or didn't match any command). """
+        return self.future.result() if self.future.done() else None
+
+    @property
+    def score(self,) -> float:
+        """ The score of the command of the ticket, or `None` if the message
+        wasn't scored yet. Tickets without a command are scored as 0. """
+
+        if not self.future.done():
+            return None
+
+        match = self.future.result()
+        return 0 if match is None else match.score
+
+
+class _ChannelQueue:
+    """ The tickets of a single channel, in the order they were reserved.
+    Counts its pending and scored tickets as they change, and keeps the
+    scored tickets in a heap (which is cleaned lazily), so no operation has
+    to scan the whole queue. """
+
+    __slots__ = ('tickets', 'pending', 'scored', '_heap', )
+
+    def __init__(self,):
+        self.tickets: typing.Dict[DispatchTicket, None] = dict()
+        self.pending = 0    # Tickets that wait to be scored
+        self.scored = 0     # Tickets that matched a command
+        self._heap: typing.List[
+            typing.Tuple[float, int, DispatchTicket]] = list()
+
+    def __len__(self,) -> int:
+        return len(self.tickets)
+
+    @property
+    def head(self,) -> DispatchTicket:
+        """ The oldest ticket in the queue. """
+        return next(iter(self.tickets))
+
+    def append(self, ticket: DispatchTicket) -> None:
+        """ Adds a new (pending) ticket to the end of the queue. """
+        self.tickets[ticket] = None
+        self.pending += 1
+
+    def scored_ticket(self, ticket: DispatchTicket) -> None:
+        """ Should be called after the given ticket (which is in the queue)
+        was scored. """
+
+        self.pending -= 1
+        match = ticket.match
+
+        if match is not None:
+            self.scored += 1
+            heapq.heappush(
+                self._heap, (match.score, ticket.sequence, ticket))
+
+    def remove(self, ticket: DispatchTicket) -> None:
+        """ Removes the given ticket from the queue. """
+
+        del self.tickets[ticket]
+
+        if not ticket.future.done():
+            self.pending -= 1
+
+        elif ticket.match is not None:
+            self.scored -= 1
+
+            if len(self._heap) > 2 * self.scored + 16:
+                # Drops the entries of the removed tickets.
+                self._heap = [
+                    entry for entry in self._heap
+                    if entry[2] in self.tickets
+                ]
+                heapq.heapify(self._heap)
+
+    def lowest(self,) -> typing.Optional[DispatchTicket]:
+        """ Returns the scored ticket with the lowest score (the oldest one,
+        if there are a few), except the head of the queue. """
+
+        head = self.head
+        skipped = None
+
+        while self._heap:
+            ticket = self._heap[0][2]
+
+            if ticket is head:
+                skipped = heapq.heappop(self._heap)
+            elif ticket not in self.tickets:
+                heapq.heappop(self._heap)
+            else:
+                break
+
+        lowest = self._heap[0][2] if self._heap else None
+
+        if skipped is not None:
+            heapq.heappush(self._heap, skipped)
+
+        return lowest
+
+
+class DispatcherStats(typing.NamedTuple):
+    channels: int       # Channels that have queued messages
+    queued: int         # Messages in all of the queues
+    max_depth: int      # Messages in the deepest queue
+    in_flight: int      # Commands that are currently handling a message
+    handled: int        # Commands that finished handling a message
+    dropped: int        # Messages that were shed or rejected
+
+
+class CommandDispatcher:
+    """ Runs the `handle` of the selected commands. Each channel has
+    its own queue, so the messages of a channel are always handled in the
+    order they were received, while different channels are handled
+    concurrently, up to a global limit.
+
+    The queues are bounded: messages that wait to be scored keep their place
+    in the queue, but only scored messages that matched a command count
+    towards its depth. When a scored message overflows a queue, the scored
+    message with the lowest score in it is shed (which might be the new
+    message itself), so a flood of messages can't starve the other channels.
+    The number of messages that wait to be scored in each channel is bounded
+    separately (by `max_pending`), and new messages of a channel that
+    reached it are rejected, so a flood can't grow the memory without a
+    limit either. """
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 max_queue_depth: int = 16,
+                 max_pending: int = 64,
+                 ):
+        self._max_queue_depth = max_queue_depth
+        self._max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._queues: typing.Dict[int, _ChannelQueue] = dict()
+        self._workers: typing.Dict[int, asyncio.Task] = dict()
+        self._sequence = itertools.count()
+
+        self._in_flight = 0
+        self._handled = 0
+        self._dropped = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'CommandDispatcher':
+        """ Creates a dispatcher as configured in the `dispatcher` section of
+        the settings file. """
+
+        return cls(
+            max_concurrency=config.get_safely(
+                'settings', 'dispatcher', 'max-concurrency', default=8),
+            max_queue_depth=config.get_safely(
+                'settings', 'dispatcher', 'max-queue-depth', default=16),
+            max_pending=config.get_safely(
+                'settings', 'dispatcher', 'max-pending', default=64),
+        )
+
+    def reserve(self, channel_id: int) -> typing.Optional[DispatchTicket]:
+        """ Reserves a place for a new message in the queue of the given
+        channel. Should be called when the message is received, before it is
+        scored. Returns `None` if too many messages of the channel already
+        wait to be scored, and the new message should be dropped. """
+
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = _ChannelQueue()
+
+        elif queue.pending >= self._max_pending:
+            self._dropped += 1
+            DROPPED.inc()
+            return None
+
+        ticket = DispatchTicket(
+            channel_id,
+            next(self._sequence),
+            asyncio.get_running_loop().create_future(),
+        )
+        queue.append(ticket)
+        QUEUED.inc()
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(
+                self._drain(channel_id))
+
+        return ticket
+
+    def fulfill(self,
+                ticket: DispatchTicket,
+                match: typing.Optional[CommandMatch],
+                ) -> None:
+        """ Sets the command that will handle the message of the given ticket
+        (or `None`, if the message shouldn't be handled). """
+
+        if ticket.future.done():
+            return
+
+        ticket.future.set_result(match)
+
+        queue = self._queues.get(ticket.channel_id)
+        if queue is None or ticket not in queue.tickets:
+            return
+
+        queue.scored_ticket(ticket)
+
+        if queue.head is ticket:
+            return  # The worker of the channel awaits the ticket.
+
+        if match is None:
+            # The message won't be handled, so it doesn't need its place.
+            queue.remove(ticket)
+            QUEUED.dec()
+
+        elif queue.scored > self._max_queue_depth:
+            self._shed(queue)
+
+    def stats(self,) -> DispatcherStats:
+        """ Returns the current statistics of the dispatcher queues. """
+
+        depths = [len(queue) for queue in self._queues.values()]
+
+        return DispatcherStats(
+            channels=len(depths),
+            queued=sum(depths),
+            max_depth=max(depths, default=0),
+            in_flight=self._in_flight,
+            handled=self._handled,
+            dropped=self._dropped,
+        )
+
+    def queue_depths(self,) -> typing.Dict[int, int]:
+        """ Returns the number of queued messages in each channel. """
+        return {
+            channel_id: len(queue)
+            for channel_id, queue in self._queues.items()
+        }
+
+    async def close(self,) -> None:
+        """ Stops handling the queued messages. """
+
+        for worker in self._workers.values():
+            worker.cancel()
+
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+        QUEUED.dec(sum(len(queue) for queue in self._queues.values()))
+        self._queues.clear()
+
+    # - - - Private & Protected methods - - - #
+
+    def _shed(self, queue: _ChannelQueue) -> bool:
+        """ Removes the already scored message with the lowest score from the
+        given queue. The first message in the queue is never removed, since
+        it may be already awaited. Returns `False` if nothing was removed. """
+
+        lowest = queue.lowest()
+
+        if lowest is None:
+            return False
+
+        queue.remove(lowest)
+        self._dropped += 1
+        QUEUED.dec()
+        DROPPED.inc()
+
+        return True
+
+    async def _drain(self, channel_id: int) -> None:
+        """ Handles the messages of a single channel in order, until its queue
+        is empty. """
+
+        queue = self._queues[channel_id]
+
+        try:
+            while queue:
+                ticket = queue.head
+                match = await ticket.future
+                queue.remove(ticket)
+                QUEUED.dec()
+
+                if match is None:
+                    continue
+
+                name = match.name
+
+                async with self._semaphore:
+                    self._in_flight += 1
+                    IN_FLIGHT.inc()
+                    start = time.perf_counter()
+
+                    try:
+                        await match.handle()
+
+                    except Exception:
+                        HANDLE_FAILURES.labels(name).inc()
+                        logger.exception(
+                            "The '%s' command class failed to handle a message",
+                            name,
+                        )
+
+                    else:
+                        logger.info(
+                            "The '%s' command class (matching %d%%) handled the following message: '%s'",
+                            name,
+                            int(match.score * 100),
+                            match.context.content,
+                        )
+
+                    finally:
+                        HANDLE_SECONDS.labels(name).observe(
+                            time.perf_counter() - start)
+                        IN_FLIGHT.dec()
+                        self._in_flight -= 1
+                        self._handled += 1
+
+        finally:
+            self._workers.pop(channel_id, None)
+
+            if not queue:
+                # Forget idle channels, so they don't take any memory.
+                self._queues.pop(channel_id, None)
+
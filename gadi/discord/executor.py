@@ -0,0 +1,272 @@
+import time
+import typing
+import logging
+import asyncio
+import concurrent.futures
+
+from .. import metrics
+from ..config import Config
+from .cache import MatchCache, MISSING
+from .context import MessageContext
+from .scoring import MessageScorer, ScoringReport
+from .handlers.base import CommandMatch
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_TYPES = ('inline', 'thread', 'process', )
+
+MESSAGE_SCORE_SECONDS = metrics.histogram(
+    'gadi_message_score_seconds',
+    'The time it takes to select the best command for a message',
+)
+
+BEST_SCORES = metrics.histogram(
+    'gadi_best_score',
+    'The score of the best matching command of each message',
+    ('command', ),
+    buckets=metrics.SCORE_BUCKETS,
+)
+
+MESSAGES = metrics.counter(
+    'gadi_scored_messages_total',
+    'Scored messages, by their best command and whether it reached the '
+    'threshold',
+    ('command', 'result', ),
+)
+
+
+class MessageSnapshot(typing.NamedTuple):
+    """ A picklable copy of the parts of a message that are sent to scoring
+    worker processes. Commands that are scored in a worker process only see
+    these attributes of the message. """
+    id: int
+    content: str
+
+
+class ScoringExecutor:
+    """ Runs the scoring of incoming messages, so that long messages (and
+    bursts of messages) don't block the event loop that also serves the
+    discord gateway.
+
+    The executor `kind` can be:
+    -   `'inline'`: scores the messages in the event loop itself.
+    -   `'thread'`: scores the messages in a pool of threads.
+    -   `'process'`: scores the messages in a pool of processes, so that
+        multiple cores are used. Each worker process constructs its own
+        handlers (and compiles their commands) once, when it starts, and
+        only a `MessageSnapshot` of each message is sent to it.
+
+    When a configuration that the scoring depends on changes, `reload_config`
+    should be called: it clears the match cache, and starts new worker
+    processes (which load the new configuration). Messages that were being
+    scored during the change are never cached. """
+
+    def __init__(self,
+                 scorer: MessageScorer,
+                 kind: str = 'inline',
+                 workers: int = None,
+                 Handlers: typing.Iterable[type] = (),
+                 config: Config = None,
+                 cache: MatchCache = None,
+                 ):
+        if kind not in EXECUTOR_TYPES:
+            raise ValueError(
+                f"Unknown scoring executor {kind!r}, expected one of: "
+                + ', '.join(EXECUTOR_TYPES))
+
+        self._scorer = scorer
+        self._kind = kind
+        self._workers = workers
+        self._Handlers = tuple(Handlers)
+        self._config = config
+        self._cache = cache
+        self._pool: typing.Optional[concurrent.futures.Executor] = None
+
+        # Increased every time the configuration changes, so matches that
+        # were scored using the old configuration aren't cached.
+        self._generation = 0
+
+        if kind == 'thread':
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='gadi-scoring',
+            )
+
+        elif kind == 'process':
+            self._pool = self._process_pool()
+
+        logger.debug("Using %s message scoring (workers: %s)", kind, workers)
+
+    @classmethod
+    def from_config(cls,
+                    scorer: MessageScorer,
+                    config: Config,
+                    Handlers: typing.Iterable[type] = (),
+                    ) -> 'ScoringExecutor':
+        """ Creates an executor as configured in the `scoring-executor`
+        section of the settings file. """
+
+        return cls(
+            scorer,
+            kind=config.get_safely(
+                'settings', 'scoring-executor', 'type', default='inline'),
+            workers=config.get_safely(
+                'settings', 'scoring-executor', 'workers', default=None),
+            Handlers=Handlers,
+            config=config,
+            cache=MatchCache.from_config(config),
+        )
+
+    @property
+    def cache(self,) -> typing.Optional[MatchCache]:
+        return self._cache
+
+    async def best_command(self,
+                           context: MessageContext,
+                           threshold: float,
+                           ) -> typing.Optional[CommandMatch]:
+        """ Returns the command that best matches the given message (with its
+        score), or `None` if no command can reach the threshold. """
+
+        start = time.perf_counter()
+        match = await self._cached_best_command(context, threshold)
+        MESSAGE_SCORE_SECONDS.observe(time.perf_counter() - start)
+
+        if match is None:
+            MESSAGES.labels('', 'miss').inc()
+        else:
+            BEST_SCORES.labels(match.name).observe(match.score)
+            MESSAGES.labels(
+                match.name,
+                'hit' if match.score >= threshold else 'miss',
+            ).inc()
+
+        return match
+
+    def reload_config(self, *_) -> None:
+        """ Called when a configuration that the scoring depends on changes.
+        Clears the match cache, and replaces the worker processes (the old
+        ones finish the messages that were already sent to them). Accepts
+        (and ignores) any arguments, so it can be used as a configuration
+        change callback. """
+
+        self._generation += 1
+
+        if self._cache is not None:
+            self._cache.clear()
+
+        if self._kind == 'process' and self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = self._process_pool()
+            logger.debug("Restarted the scoring worker processes")
+
+    def shutdown(self,) -> None:
+        """ Stops the worker threads or processes, if there are any. """
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # - - - Private & Protected methods - - - #
+
+    async def _cached_best_command(self,
+                                   context: MessageContext,
+                                   threshold: float,
+                                   ) -> typing.Optional[CommandMatch]:
+        """ Returns the best command from the match cache, and scores the
+        message only if it isn't cached. """
+
+        key = None
+        if self._cache is not None:
+            key = self._scorer.cache_key(context, threshold)
+
+        if key is None:
+            return await self._best_command(context, threshold)
+
+        cached = self._cache.get(key)
+
+        if cached is MISSING:
+            generation = self._generation
+            match = await self._best_command(context, threshold)
+
+            if generation != self._generation:
+                pass    # Scored using a configuration that has changed.
+            elif match is None:
+                self._cache.put(key, None)
+            else:
+                self._cache.put(key, (match.command, match.score))
+
+            return match
+
+        if cached is None:
+            return None
+
+        # The cached command is matched with the new message, with the cached
+        # score.
+        command, score = cached
+        return CommandMatch(command, context, score)
+
+    def _process_pool(self,) -> concurrent.futures.ProcessPoolExecutor:
+        """ Starts a pool of worker processes, that construct the handlers
+        using the current configuration. """
+
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_initialize_worker,
+            initargs=(self._Handlers, self._config),
+        )
+
+    async def _best_command(self,
+                            context: MessageContext,
+                            threshold: float,
+                            ) -> typing.Optional[CommandMatch]:
+
+        if self._pool is None:
+            return self._scorer.best_command(context, threshold)
+
+        loop = asyncio.get_running_loop()
+
+        if self._kind == 'thread':
+            return await loop.run_in_executor(
+                self._pool, self._scorer.best_command, context, threshold)
+
+        message = context.message
+        snapshot = MessageSnapshot(id=message.id, content=message.content)
+
+        selected, report = await loop.run_in_executor(
+            self._pool, _score_in_worker, snapshot, threshold)
+
+        # Metrics are recorded only in the process that updates them.
+        self._scorer.record(report)
+
+        if selected is None:
+            return None
+
+        # The command of this process is matched with the real message, so it
+        # can respond to it. The score isn't recalculated.
+        Command, score = selected
+        return CommandMatch(self._scorer.command(Command), context, score)
+
+
+# - - - Worker processes - - - #
+
+_worker_scorer: MessageScorer = None
+
+
+def _initialize_worker(Handlers: typing.Tuple[type, ...], config: Config):
+    """ Called once in each worker process when it starts. """
+
+    global _worker_scorer
+    _worker_scorer = MessageScorer.from_handler_classes(Handlers, config)
+
+
+def _score_in_worker(snapshot: MessageSnapshot,
+                     threshold: float,
+                     ) -> typing.Tuple[
+                         typing.Optional[typing.Tuple[type, float]],
+                         ScoringReport]:
+    """ Scores a message inside a worker process. Returns the class of the
+    best matching command and its score (or `None`), with the report of the
+    scoring, so its metrics are recorded by the main process. """
+
+    return _worker_scorer.select(_worker_scorer.context(snapshot), threshold)
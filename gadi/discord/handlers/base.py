@@ -1,48 +1,76 @@
 from abc import ABC, abstractmethod
+import time
 import typing
-import itertools
-import re
-import discord
+import functools
 
-import gadi.utils as utils
+from ... import metrics
 from ...config import Config
+from ..context import MessageContext
+from ..selection import select_command
+from .patterns import CommandPattern, CandidateTable
 
 # - - - Typing hints - - - #
 MessageScore = typing.Union[float, int, ]
 
+# The number of compiled tables of undeclared patterns that are kept.
+UNDECLARED_PATTERNS_CACHE_SIZE = 256
+
+SCORE_SECONDS = metrics.histogram(
+    'gadi_command_score_seconds',
+    'The time it takes a command to score a message',
+    ('handler', 'command', ),
+)
+
 
 class BaseCommand(ABC):
+    """ A command of the bot. Each command class is constructed only once,
+    when the bot starts, and the instance is shared by all of the messages:
+    everything about a message is in the `MessageContext` that is passed to
+    the methods, so commands shouldn't store any state of their own.
+    Subclasses should declare `__slots__` too (usually empty), so their
+    instances stay light. """
 
-    _message: discord.Message
-    score: MessageScore
+    __slots__ = ('_config', '_threshold', )
 
-    VALID_KEYWORDS = (
-        'גדי',
-        'gadi',
-    )
+    # The phrases that the command responds to. Compiled into candidate
+    # tables once, when the bot is constructed.
+    PATTERNS: typing.Tuple[CommandPattern, ...] = tuple()
 
-    def __init__(self, message: discord.Message, config: Config):
-        self._message = message
+    _tables: typing.Dict[CommandPattern, CandidateTable]
+
+    # If `True`, the score of the command depends only on the content of the
+    # message, so the matches of the command can be cached. Should be set to
+    # `False` by commands that their score depends on anything else (for
+    # example, the author of the message or the time).
+    CACHEABLE = True
+
+    def __init__(self, config: Config):
         self._config = config
-        self.score = self.calculate_score()
+        self._threshold = config.bind(
+            'settings', 'score-threshold', default=0.7)
+        self.compile_patterns()
 
     @abstractmethod
-    async def message_handle(self,) -> None:
-        """ Respones to the message saved in the `_message` property. It can
-        be, for example, a replay, a direct message, or a reaction. """
+    async def handle(self, context: MessageContext) -> None:
+        """ Respones to the message of the given context. It can be, for
+        example, a replay, a direct message, or a reaction. """
 
-    @abstractmethod
-    def calculate_score(self,) -> MessageScore:
-        """ Recives a message instance, and returns a score between 0 and 1.
+    def score(self, context: MessageContext) -> MessageScore:
+        """ Recives a message context, and returns a score between 0 and 1.
         When the score is 1 (integer), it is guaranteed that the
-        `message_handle` method will be called with the given message.
+        `handle` method will be called with the given message.
         When the score is 0 (integer), it is guaranteed that the
-        `message_handle` method WON'T be called with the given message.
+        `handle` method WON'T be called with the given message.
         With any values between 0 and 1, the discord bot client will
-        automatically pick the message that has the top score and will call
-        `message_handle` on that instance. """
+        automatically pick the command that has the top score and will call
+        `handle` of that command.
+        By default, returns the best score of the patterns declared in
+        `PATTERNS`. """
+
+        return self.patterns_score(context)
 
     def compare_score(self,
+                      context: MessageContext,
                       compare_to: str,
                       require_keyword: typing.Union[bool, str] = 'prefix',
                       allow_word_rearrange: bool = False,
@@ -51,78 +79,167 @@ class BaseCommand(ABC):
                       ignore_mentions: bool = True,
                       ignore_channel_mentions: bool = True,
                       ignore_whitespaces: bool = True,
+                      ignore_niqqud: bool = False,
+                      ignore_final_letters: bool = False,
+                      min_score: float = None,
                       ) -> MessageScore:
         """ Returns a floating score between 0 and 1 that indicates the how
-        similar the message stored in the instance and the given one are. (0 - 
+        similar the message of the given context and the given one are. (0 -
         not similar at all, 1 - the same).
 
-        Arguments:
-        -   `compare_to`: The string that is compared against the one that is
-            stored in the current instance.
-        -   `require_keyword`: Can be `True`, `False`, or the string `'prefix'`.
-            If `True` - requires that the bot keyword will appear in the message.
-            If `False` - calculates the score while ignoring keywords.
-            If `'prefix'` - requires at a keyword at the beggining of the
-            command.
-        -   `allow_word_rearrange`: A boolean value. If `True`, checks all
-            possible rearrangements of words in the `compare_to` string that
-            takes the highest score. If `False`, only compares the given string.
+        The arguments (except `min_score`) are the same as the fields of
+        `CommandPattern`. Phrases that are declared in the `PATTERNS`
+        attribute of the class are compiled only once, when the bot is
+        constructed.
+        -   `min_score`: Scores that are lower than this value are returned as
+            0, which lets the calculation stop early. By default, the
+            configured score threshold is used.
         """
 
-        message = self._message.content
+        pattern = CommandPattern(
+            phrase=compare_to,
+            require_keyword=require_keyword,
+            allow_word_rearrange=allow_word_rearrange,
+            case_sensitive=case_sensitive,
+            ignore_markdown=ignore_markdown,
+            ignore_mentions=ignore_mentions,
+            ignore_channel_mentions=ignore_channel_mentions,
+            ignore_whitespaces=ignore_whitespaces,
+            ignore_niqqud=ignore_niqqud,
+            ignore_final_letters=ignore_final_letters,
+        )
+
+        return self.table_score(
+            context, self.candidate_table(pattern), min_score)
+
+    def patterns_score(self,
+                       context: MessageContext,
+                       min_score: float = None,
+                       ) -> MessageScore:
+        """ Returns the highest score of the message of the given context
+        against any of the patterns declared in `PATTERNS`. """
 
-        if ignore_markdown:
-            message = discord.utils.remove_markdown(message)
+        return max((
+            self.table_score(
+                context, self.candidate_table(pattern), min_score)
+            for pattern in self.PATTERNS
+        ),
+            default=0,
+        )
 
-        if ignore_mentions:
-            message = re.sub(
-                r'<@(everyone|here|[!&]?[0-9]{17,20})>', '', message)
+    def table_score(self,
+                    context: MessageContext,
+                    table: CandidateTable,
+                    min_score: float = None,
+                    ) -> MessageScore:
+        """ Returns the score of the message of the given context against the
+        given compiled candidate table. """
 
-        if ignore_channel_mentions:
-            message = re.sub(r'<#[0-9]{17,20}>', '', message)
+        if min_score is None:
+            min_score = self.score_threshold()
 
-        # Remove duplicate whitespaces
-        if ignore_whitespaces:
-            message = ' '.join(message.split())
+        # A message can't reach `min_score` against candidates that are
+        # shorter than `min_score` times its length.
+        max_length = table.max_length / min_score if min_score > 0 else None
 
-        # Handeling the `case_sensative` argument
+        message = context.scored_text_for(table.pattern, max_length)
+        if message is None:
+            return 0    # A wake word is required, but isn't (usefully) there
 
-        if not case_sensitive:
-            # If not case sensitive, converts every string involved in the
-            # compersation to lower case
-            message = message.lower()
-            compare_to = compare_to.lower()
+        return table.best_score(message, min_score=min_score)
 
-        words_to_compare = tuple(compare_to.split())
-        permutations = {words_to_compare}
+    @staticmethod
+    def clean_message(context: MessageContext,
+                      pattern: CommandPattern,
+                      ) -> str:
+        """ Returns the content of the message of the given context, cleaned
+        as requested by the given pattern. """
+        return context.cleaned_for(pattern)
 
-        # Handeling the `allow_word_rearrange` argument
+    @classmethod
+    def score_bound(cls, context: MessageContext) -> MessageScore:
+        """ Returns an upper bound on the score of the given message, that is
+        much cheaper to calculate than the score itself. Used to score the
+        commands that are more likely to match first, and to skip the
+        commands that can't beat them (see `select_command`).
+        By default, the bound is calculated from the lengths of the message
+        and the candidates of the patterns declared in `PATTERNS`. Commands
+        that calculate their score by themselves should override it, or the
+        bound is 1 (no bound at all). """
 
-        if allow_word_rearrange:
-            permutations = {
-                permutation
-                for permutation in itertools.permutations(words_to_compare)
-            }
+        if not cls.scores_by_patterns():
+            return 1
 
-        # Handeling the `require_keyword` argument
+        bound = 0
+        for pattern in cls.PATTERNS:
+            message = context.scored_text_for(pattern)
+            if message is not None:
+                bound = max(
+                    bound, cls.candidate_table(pattern).score_bound(message))
 
-        if require_keyword is True:
-            permutations = utils.union_permutation_sets(*[
-                utils.add_to_permutations(permutations, keyword)
-                for keyword in self.VALID_KEYWORDS
-            ])
+        return bound
 
-        elif require_keyword == 'prefix':
-            permutations = {
-                [keyword] + permutation
-                for keyword in self.VALID_KEYWORDS
-                for permutation in permutations
-            }
+    @classmethod
+    def scores_by_patterns(cls,) -> bool:
+        """ Returns `True` if the score of the command is calculated only from
+        the patterns declared in `PATTERNS` (the default `score` is not
+        overridden). """
+        return cls.score is BaseCommand.score
 
-        return max(
-            utils.levenshtein_score(message, ' '.join(permutation))
-            for permutation in permutations
-        )
+    @classmethod
+    def compile_patterns(cls,) -> None:
+        """ Compiles the patterns declared in `PATTERNS` into candidate
+        tables. Called when the command is constructed. """
+
+        cls._tables = {
+            pattern: pattern.compile()
+            for pattern in cls.PATTERNS
+        }
+
+    @classmethod
+    def candidate_table(cls, pattern: CommandPattern) -> CandidateTable:
+        """ Returns the compiled candidate table of the given pattern. Patterns
+        that weren't declared in `PATTERNS` (for example, phrases that are
+        built from the message content) are compiled on demand, and only the
+        most recently used ones are kept (see `_compile_undeclared`). """
+
+        table = cls.__dict__.get('_tables', dict()).get(pattern)
+        if table is None:
+            table = _compile_undeclared(pattern)
+
+        return table
+
+    def score_threshold(self,) -> float:
+        """ Returns the minimal score that a command should have in order to
+        handle a message. """
+        return self._threshold.value
+
+
+@functools.lru_cache(maxsize=UNDECLARED_PATTERNS_CACHE_SIZE)
+def _compile_undeclared(pattern: CommandPattern) -> CandidateTable:
+    """ Compiles a pattern that wasn't declared in the `PATTERNS` of a
+    command. The tables are shared by all of the commands, and the cache is
+    bounded, so commands that compare messages against many different
+    phrases don't grow it forever. """
+    return pattern.compile()
+
+
+class CommandMatch(typing.NamedTuple):
+    """ The command that was selected to handle a message, and its score.
+    Created once for each message (and not for each command). """
+
+    command: BaseCommand
+    context: MessageContext
+    score: MessageScore
+
+    @property
+    def name(self,) -> str:
+        """ The name of the class of the command. """
+        return self.command.__class__.__name__
+
+    async def handle(self,) -> None:
+        """ Handles the message with the selected command. """
+        await self.command.handle(self.context)
 
 
 class BaseMessageHandler(ABC):
@@ -134,16 +251,73 @@ class BaseMessageHandler(ABC):
     def __init__(self, config: Config):
         self._config = config
 
+        # Each command is constructed only once, and is shared by all of the
+        # messages.
+        self._commands: typing.Dict[type, BaseCommand] = {
+            Command: Command(config)
+            for Command in self.COMMANDS
+        }
+
+    @property
+    def commands(self,) -> typing.Tuple[BaseCommand, ...]:
+        """ The instances of the commands of the handler. """
+        return tuple(self._commands.values())
+
+    def command(self, Command: type) -> BaseCommand:
+        """ Returns the instance of the given command class. """
+        return self._commands[Command]
+
     def message_to_command(self,
-                           message: discord.Message
-                           ) -> typing.Optional[BaseCommand]:
-        """ Recives a message instance, and returns a command instance that
-        already contains and wraps the message instance. Returns the command
-        that best matches the message. """
+                           context: MessageContext,
+                           commands: typing.Container[type] = None,
+                           threshold: float = 0,
+                           ) -> typing.Optional[CommandMatch]:
+        """ Recives a message context, and returns the command that best
+        matches the message, with its score.
+        If `commands` is provided, only the command classes in it are
+        considered. Commands that can't reach the `threshold` (by their
+        `score_bound`) aren't scored. If no command is scored, returns
+        `None`. """
 
-        return max((
-            Command(message, self._config)
-            for Command in self.COMMANDS
-        ),
-            key=lambda command: command.score,
+        selected = select_command(
+            (
+                (Command.score_bound(context), Command)
+                for Command in self.COMMANDS
+                if commands is None or Command in commands
+            ),
+            lambda Command: self.score_command(Command, context),
+            threshold,
         )
+
+        if selected is None:
+            return None
+
+        Command, score = selected
+        return CommandMatch(self._commands[Command], context, score)
+
+    def score_command(self,
+                      Command: type,
+                      context: MessageContext,
+                      ) -> MessageScore:
+        """ Scores the message of the given context with the instance of the
+        given command class, and records the time it took. """
+
+        score, seconds = self.timed_score(Command, context)
+
+        SCORE_SECONDS.labels(
+            self.__class__.__name__, Command.__name__,
+        ).observe(seconds)
+
+        return score
+
+    def timed_score(self,
+                    Command: type,
+                    context: MessageContext,
+                    ) -> typing.Tuple[MessageScore, float]:
+        """ Scores the message of the given context with the instance of the
+        given command class, and returns the score with the time it took (in
+        seconds), without recording it. """
+
+        start = time.perf_counter()
+        score = self._commands[Command].score(context)
+        return score, time.perf_counter() - start
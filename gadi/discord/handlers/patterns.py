@@ -0,0 +1,191 @@
+import typing
+
+import gadi.utils as utils
+
+
+class CommandPattern(typing.NamedTuple):
+    """ Describes a phrase that a command responds to, and how messages are
+    compared against it. Patterns are declared once (usually in the `PATTERNS`
+    attribute of a command class), and are compiled into a `CandidateTable`
+    when the bot is constructed.
+
+    -   `phrase`: The string that messages are compared against.
+    -   `require_keyword`: Can be `True`, `False`, or the string `'prefix'`.
+        If `True` - requires that one of the wake words (see the `wake-words`
+        setting) will appear in the message.
+        If `False` - calculates the score while ignoring wake words.
+        If `'prefix'` - requires a wake word at the beggining of the message.
+        If a wake word is required, the rest of the message (without the
+        wake word) is compared against the phrase, and messages that don't
+        address the bot are scored 0.
+    -   `allow_word_rearrange`: A boolean value. If `True`, the words of the
+        message are matched with the words of the phrase regardless of their
+        order (see `utils.rearranged_levenshtein_distance`). If `False`, only
+        compares the given phrase.
+    -   The rest of the arguments control how the message content is cleaned
+        before it is compared against the phrase (see `utils.Normalizer`).
+        Case, niqqud and final letters are normalized in the phrase too. """
+
+    phrase: str
+    require_keyword: typing.Union[bool, str] = 'prefix'
+    allow_word_rearrange: bool = False
+    case_sensitive: bool = False
+    ignore_markdown: bool = True
+    ignore_mentions: bool = True
+    ignore_channel_mentions: bool = True
+    ignore_whitespaces: bool = True
+    ignore_niqqud: bool = False
+    ignore_final_letters: bool = False
+
+    def cleaning_flags(self,) -> typing.Dict[str, bool]:
+        """ Returns the flags that the message is cleaned with before it is
+        compared against the pattern (the arguments of
+        `MessageContext.cleaned`). """
+
+        return {
+            'case_sensitive': self.case_sensitive,
+            'ignore_markdown': self.ignore_markdown,
+            'ignore_mentions': self.ignore_mentions,
+            'ignore_channel_mentions': self.ignore_channel_mentions,
+            'ignore_whitespaces': self.ignore_whitespaces,
+            'ignore_niqqud': self.ignore_niqqud,
+            'ignore_final_letters': self.ignore_final_letters,
+        }
+
+    def compile(self,) -> 'CandidateTable':
+        """ Compiles the pattern into the table of the strings that a message
+        is compared against. The wake words aren't a part of the candidates:
+        if the pattern requires a wake word, the message is compared without
+        it (see `MessageContext.scored_text`). """
+
+        # Normalizes the characters of the phrase the same way the message is
+        # normalized.
+        normalizer = utils.get_normalizer(
+            case_sensitive=self.case_sensitive,
+            ignore_markdown=False,
+            ignore_mentions=False,
+            ignore_channel_mentions=False,
+            ignore_whitespaces=False,
+            ignore_niqqud=self.ignore_niqqud,
+            ignore_final_letters=self.ignore_final_letters,
+        )
+
+        words_to_compare = tuple(normalizer(self.phrase).split())
+
+        if self.allow_word_rearrange:
+            # The words are matched regardless of their order when scoring,
+            # so only a single arrangement is stored.
+            return CandidateTable.from_arrangements(self, [words_to_compare])
+
+        return CandidateTable.from_candidates(
+            self, (' '.join(words_to_compare), ))
+
+
+class CandidateTable(typing.NamedTuple):
+    """ An immutable table of all of the strings that a message is compared
+    against for a single `CommandPattern`. """
+
+    pattern: CommandPattern
+    candidates: typing.Tuple[str, ...]
+    lengths: typing.Tuple[int, ...]
+    min_length: int
+    max_length: int
+
+    # Only in tables of patterns that allow word rearrangement: for each
+    # candidate, the words that can be rearranged.
+    arrangements: typing.Optional[typing.Tuple[tuple, ...]] = None
+
+    @classmethod
+    def from_candidates(cls,
+                        pattern: CommandPattern,
+                        candidates: typing.Tuple[str, ...],
+                        ) -> 'CandidateTable':
+        """ Builds a table from the given candidate strings. """
+
+        lengths = tuple(len(candidate) for candidate in candidates)
+
+        return cls(
+            pattern=pattern,
+            candidates=candidates,
+            lengths=lengths,
+            min_length=min(lengths, default=0),
+            max_length=max(lengths, default=0),
+        )
+
+    @classmethod
+    def from_arrangements(cls,
+                          pattern: CommandPattern,
+                          arrangements: typing.List[tuple],
+                          ) -> 'CandidateTable':
+        """ Builds a table for a pattern that allows word rearrangement. The
+        candidate strings are the arrangements in their declared order, and
+        are kept for their lengths (which are the same for any order). """
+
+        arrangements = tuple(sorted(arrangements))
+        candidates = tuple(' '.join(words) for words in arrangements)
+
+        lengths = tuple(len(candidate) for candidate in candidates)
+
+        return cls(
+            pattern=pattern,
+            candidates=candidates,
+            lengths=lengths,
+            min_length=min(lengths, default=0),
+            max_length=max(lengths, default=0),
+            arrangements=arrangements,
+        )
+
+    def score_bound(self, message: str) -> float:
+        """ Returns an upper bound on `best_score` of the given message, from
+        the length differences alone: the edit distance between two strings
+        is at least the difference between their lengths. """
+
+        return max((
+            min(len(message), length) / max(len(message), length)
+            for length in set(self.lengths)
+            if length or message
+        ),
+            default=0,
+        )
+
+    def best_score(self, message: str, min_score: float = 0) -> float:
+        """ Returns the highest score between the given (already cleaned)
+        message and any of the candidates in the table. """
+
+        if self.arrangements is not None:
+            return self._rearranged_best_score(message, min_score)
+
+        return utils.best_levenshtein_score(
+            message, self.candidates,
+            min_score=min_score,
+            backend='python',
+        )
+
+    def _rearranged_best_score(self, message: str, min_score: float) -> float:
+        """ Scores the message against the arrangements of a pattern that
+        allows word rearrangement. The score is on the same scale as
+        `utils.levenshtein_score`, as if the best rearrangement was used. """
+
+        message_words = message.split()
+        best_score = 0
+
+        for words, length in zip(self.arrangements, self.lengths):
+            max_length = max(len(message), length)
+            if max_length == 0:
+                continue
+
+            allowed = utils.max_distance_for_score(
+                max_length, max(min_score, best_score))
+
+            if abs(len(message) - length) > allowed:
+                continue  # The length difference alone is too big.
+
+            distance = utils.rearranged_levenshtein_distance(
+                message_words, words, max_distance=allowed)
+            distance = min(distance, max_length)
+
+            score = (max_length - distance) / max_length
+            if score >= min_score and score > best_score:
+                best_score = score
+
+        return best_score
@@ -0,0 +1,232 @@
+import typing
+import math
+import collections
+
+import gadi.utils as utils
+from .context import MessageContext
+from .handlers.base import BaseMessageHandler, BaseCommand
+from .handlers.patterns import CandidateTable
+
+# - - - Typing hints - - - #
+CommandClass = typing.Type[BaseCommand]
+
+
+class _IndexEntry(typing.NamedTuple):
+    """ A single candidate string in the index. """
+    Command: CommandClass
+    length: int
+    grams: int                  # Number of n-grams in the candidate
+    rearranged: bool            # The n-gram bound doesn't apply to these
+
+
+class _IndexGroup:
+    """ The candidates of all of the patterns that clean messages in the same
+    way (and require a wake word in the same way), so a single string is
+    checked against them all. """
+
+    def __init__(self, flags: dict, require_keyword: typing.Union[bool, str]):
+        self.flags = flags
+        self.require_keyword = require_keyword
+        self.entries: typing.List[_IndexEntry] = list()
+        self.by_length: typing.Dict[int, typing.List[int]] = \
+            collections.defaultdict(list)
+        self.postings: typing.Dict[str, typing.List[tuple]] = \
+            collections.defaultdict(list)
+
+
+class CandidateIndex:
+    """ An index over the candidate strings of all of the commands, that is
+    built once when the bot is constructed. For each message, it finds the
+    commands that can reach the score threshold using cheap lower bounds on
+    the edit distance (the length difference, and the number of shared
+    character n-grams), so only those commands are actually scored. The same
+    bounds give an upper bound on the score of each command, so the commands
+    that are more likely to match are scored first (see `select_command`).
+
+    Patterns that require a wake word are skipped entirely if the message
+    doesn't address the bot.
+
+    Commands that calculate their score by themselves (and don't only rely on
+    their declared `PATTERNS`) can't be indexed, and are always scored. """
+
+    def __init__(self,
+                 handlers: typing.Iterable[BaseMessageHandler],
+                 ngram: int = 2,
+                 ):
+        self._ngram = ngram
+        self._groups: typing.Dict[tuple, _IndexGroup] = dict()
+        self._always: typing.Set[CommandClass] = set()
+
+        for handler in handlers:
+            for Command in handler.COMMANDS:
+                self.add_command(Command)
+
+    def add_command(self, Command: CommandClass) -> None:
+        """ Adds the candidates of all of the patterns of the given command
+        class to the index. """
+
+        if not Command.scores_by_patterns():
+            self._always.add(Command)
+            return
+
+        for pattern in Command.PATTERNS:
+            self._add_table(Command, Command.candidate_table(pattern))
+
+    def candidate_commands(self,
+                           context: MessageContext,
+                           threshold: float,
+                           ) -> typing.Set[CommandClass]:
+        """ Returns the set of command classes that might score the given
+        message with at least `threshold`. Commands that aren't returned are
+        guaranteed to score lower than it. """
+        return set(self.candidate_bounds(context, threshold))
+
+    def candidate_bounds(self,
+                         context: MessageContext,
+                         threshold: float,
+                         ) -> typing.Dict[CommandClass, float]:
+        """ Returns the command classes that might score the given message
+        with at least `threshold`, mapped to an upper bound on their score.
+        Commands that aren't returned are guaranteed to score lower than the
+        threshold. The commands that aren't indexed are bounded by their
+        `score_bound`. """
+
+        if threshold <= 0:
+            return {
+                Command: Command.score_bound(context)
+                for Command in self.all_commands()
+            }
+
+        bounds = dict()
+        for Command in self._always:
+            bound = Command.score_bound(context)
+            if bound >= threshold:
+                bounds[Command] = bound
+
+        for group in self._groups.values():
+            message = context.scored_text(
+                group.require_keyword,
+                max(group.by_length) / threshold,
+                **group.flags,
+            )
+            if message is not None:
+                self._query_group(group, message, threshold, bounds)
+
+        return bounds
+
+    def variants(self, context: MessageContext) -> typing.Tuple[str, ...]:
+        """ Returns the cleaned variants of the given message that the
+        indexed candidates are compared against. """
+
+        return tuple(
+            context.cleaned(**group.flags)
+            for group in self._groups.values()
+        )
+
+    @property
+    def unindexed_commands(self,) -> typing.FrozenSet[CommandClass]:
+        """ The commands that calculate their score by themselves, and are
+        always scored. """
+        return frozenset(self._always)
+
+    def all_commands(self,) -> typing.Set[CommandClass]:
+        """ Returns all of the command classes that are known to the index. """
+
+        commands = set(self._always)
+        for group in self._groups.values():
+            commands.update(entry.Command for entry in group.entries)
+
+        return commands
+
+    # - - - Private & Protected methods - - - #
+
+    def _add_table(self, Command: CommandClass, table: CandidateTable) -> None:
+        """ Adds the candidates of a single candidate table to the index. """
+
+        flags = table.pattern.cleaning_flags()
+        require_keyword = table.pattern.require_keyword
+
+        if require_keyword not in (False, 'prefix'):
+            require_keyword = bool(require_keyword)
+
+        key = tuple(flags.values()) + (require_keyword, )
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _IndexGroup(flags, require_keyword)
+
+        rearranged = table.arrangements is not None
+
+        for candidate, length in zip(table.candidates, table.lengths):
+            entry_id = len(group.entries)
+            group.entries.append(_IndexEntry(
+                Command=Command,
+                length=length,
+                grams=max(length - self._ngram + 1, 0),
+                rearranged=rearranged,
+            ))
+
+            group.by_length[length].append(entry_id)
+
+            if not rearranged:
+                grams = utils.ngram_counts(candidate, self._ngram)
+                for gram, count in grams.items():
+                    group.postings[gram].append((entry_id, count))
+
+    def _query_group(self,
+                     group: _IndexGroup,
+                     message: str,
+                     threshold: float,
+                     bounds: typing.Dict[CommandClass, float],
+                     ) -> None:
+        """ Adds to `bounds` the commands of the given group that have a
+        candidate that can reach the threshold, with the bound of their best
+        candidate. """
+
+        length = len(message)
+
+        # A candidate of length `x` can only reach the threshold if
+        # `|length - x| <= max(length, x) * (1 - threshold)`.
+        min_length = math.ceil(length * threshold - 1e-9)
+        max_length = math.floor(length / threshold + 1e-9)
+
+        feasible = [
+            entry_id
+            for candidate_length, entry_ids in group.by_length.items()
+            if min_length <= candidate_length <= max_length
+            for entry_id in entry_ids
+            if bounds.get(group.entries[entry_id].Command, 0) < 1
+        ]
+
+        if not feasible:
+            return
+
+        # Count the n-grams shared by the message and each candidate.
+        shared = collections.Counter()
+        for gram, count in utils.ngram_counts(message, self._ngram).items():
+            for entry_id, candidate_count in group.postings.get(gram, ()):
+                shared[entry_id] += min(count, candidate_count)
+
+        message_grams = max(length - self._ngram + 1, 0)
+
+        for entry_id in feasible:
+            entry = group.entries[entry_id]
+
+            longest = max(length, entry.length)
+            if longest == 0:
+                bounds[entry.Command] = 1
+                continue
+
+            distance = abs(length - entry.length)
+
+            if not entry.rearranged:
+                # Each edit operation destroys at most `n` of the n-grams, so
+                # this many edits are needed to destroy the missing ones.
+                missing = max(message_grams, entry.grams) - shared[entry_id]
+                distance = max(distance, math.ceil(missing / self._ngram))
+
+            if distance > utils.max_distance_for_score(longest, threshold):
+                continue
+
+            bound = (longest - distance) / longest
+            if bound > bounds.get(entry.Command, 0):
+                bounds[entry.Command] = bound
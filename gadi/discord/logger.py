@@ -1,28 +1,55 @@
 import typing
 import logging
 import asyncio
+import collections
+import time
 import discord
 
 
 class DiscordLoggingChannel(logging.StreamHandler):
 
+    # The maximal number of characters in a single discord message.
+    MESSAGE_LIMIT = 2000
+
+    CODE_BLOCK_START = '```\n'
+    CODE_BLOCK_END = '\n```'
+
     def __init__(self,
                  channel: discord.TextChannel = None,
-                 wait_for: int = 10):
-        """ Creates a new logging stream handler that will log messages to 
+                 wait_for: int = 10,
+                 max_records: int = 1000,
+                 send_interval: float = 1.5,
+                 ):
+        """ Creates a new logging stream handler that will log messages to
         specified discord text channel. The logger squashes a couple of
         logged messages together to avoid spamming with multiple messages in
         every second. The `wait_for` tells the logger how much seconds
         it should wait between each message that is sent (by default, sends
-        messages every 10 seconds). """
+        messages every 10 seconds).
+        At most `max_records` records are kept while waiting: if more records
+        are logged, the oldest ones are dropped (and the number of dropped
+        records is logged instead). If the pending records don't fit into a
+        single discord message, they are sent in multiple messages, at least
+        `send_interval` seconds apart, to respect the rate limits of the
+        channel. """
         super().__init__()
 
         self._channel = channel
-        self._pending_records = list()
+        self._pending_records: typing.Deque[logging.LogRecord] = \
+            collections.deque(maxlen=max_records)
+        self._dropped_records = 0
         self._wait_for = wait_for
+        self._send_interval = send_interval
+        self._last_sent: float = None
+        self._send_lock = asyncio.Lock()
 
         # Start running the logging loop
-        asyncio.create_task(self.__logging_loop())
+        self._loop_task = asyncio.create_task(self.__logging_loop())
+
+    @property
+    def dropped_records(self,) -> int:
+        """ The number of records that were dropped and not reported yet. """
+        return self._dropped_records
 
     def set_logging_channel(self,
                             channel: discord.TextChannel
@@ -38,27 +65,140 @@ class DiscordLoggingChannel(logging.StreamHandler):
 
     def emit(self, record):
         """ Called by the logging module when a message is logged.
-        Adds the message to the `pending_records` list. """
+        Adds the message to the `pending_records` queue. """
+
+        if len(self._pending_records) == self._pending_records.maxlen:
+            self._dropped_records += 1  # The oldest record is dropped
+
         self._pending_records.append(record)
 
-    # - - - Private & Protected methods - - - #
+    async def flush_records(self,) -> None:
+        """ Sends all of the pending log records now. """
 
-    def _send_pending_records(self,):
-        """ If a discord channel is provided, sends the pending log messages. """
+        async with self._send_lock:
+            await self._send_pending_records()
+
+    async def aclose(self,) -> None:
+        """ Stops the logging loop, and sends the records that are still
+        pending. Should be awaited when the bot shuts down. """
+
+        self._loop_task.cancel()
+        await asyncio.gather(self._loop_task, return_exceptions=True)
 
-        if self._channel is not None:
-            message = self._generate_message(self._pending_records)
-            self._channel.send(message)
+        await self.flush_records()
+        self.close()
 
-    def _generate_message(self, records: typing.List[logging.LogRecord]) -> str:
-        """ Generates a single string representing the given log records. """
+    # - - - Private & Protected methods - - - #
 
-        content = '\n'.join([
-            self.format(record)
-            for record in records
-        ])
+    async def _send_pending_records(self,):
+        """ If a discord channel is provided, sends the pending log messages. """
 
-        return f'```\n{content}\n```'
+        if self._channel is None:
+            return
+
+        if not self._pending_records and not self._dropped_records:
+            return
+
+        records = list(self._pending_records)
+        self._pending_records.clear()
+
+        dropped, self._dropped_records = self._dropped_records, 0
+
+        # The records (and the report of the dropped records) that were in
+        # messages that failed to be sent. A record that is split between
+        # a couple of messages is counted once.
+        lost: typing.Set[typing.Optional[int]] = set()
+
+        for message, sources in self._generate_messages(records, dropped):
+            if not await self._send(message):
+                lost.update(sources)
+
+        if None in lost:
+            lost.remove(None)
+            self._dropped_records += dropped
+
+        self._dropped_records += len(lost)
+
+    async def _send(self, message: str) -> bool:
+        """ Sends a single message to the logging channel, waiting between
+        messages as needed. Returns `False` if the message wasn't sent. """
+
+        if self._last_sent is not None:
+            delay = self._last_sent + self._send_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        try:
+            await self._channel.send(message)
+
+        except Exception:
+            # Not only `discord.HTTPException`: connection errors and
+            # timeouts are raised as is. Logging the failure would log into
+            # this handler again, so the records are counted as dropped.
+            return False
+
+        finally:
+            self._last_sent = time.monotonic()
+
+        return True
+
+    def _generate_messages(self,
+                           records: typing.List[logging.LogRecord],
+                           dropped: int = 0,
+                           ) -> typing.List[typing.Tuple[
+                               str, typing.Set[typing.Optional[int]]]]:
+        """ Generates strings representing the given log records, each short
+        enough to be sent as a single discord message. Each string is paired
+        with the indexes of the records that it contains (and `None`, if it
+        contains the number of dropped records). """
+
+        lines = [
+            (line, index)
+            for index, record in enumerate(records)
+            for line in self.format(record).splitlines()
+        ]
+
+        if dropped:
+            lines.insert(0, (f'... {dropped} log records were dropped', None))
+
+        limit = (
+            self.MESSAGE_LIMIT
+            - len(self.CODE_BLOCK_START)
+            - len(self.CODE_BLOCK_END)
+        )
+
+        chunks = list()
+        current = list()
+        current_length = 0
+        sources = set()
+
+        for line, source in lines:
+            # Break lines that are too long to fit in a message by themselves.
+            pieces = [
+                line[start:start + limit]
+                for start in range(0, len(line), limit)
+            ] or ['']
+
+            for piece in pieces:
+                added_length = len(piece) + (1 if current else 0)
+
+                if current and current_length + added_length > limit:
+                    chunks.append(('\n'.join(current), sources))
+                    current, current_length = list(), 0
+                    sources = set()
+                    added_length = len(piece)
+
+                current.append(piece)
+                current_length += added_length
+                sources.add(source)
+
+        if current:
+            chunks.append(('\n'.join(current), sources))
+
+        return [
+            (f'{self.CODE_BLOCK_START}{chunk}{self.CODE_BLOCK_END}', sources)
+            for chunk, sources in chunks
+        ]
 
     async def __logging_loop(self,):
         """ The logging loop. Loops infinitely, and sends a message to the
@@ -67,6 +207,10 @@ class DiscordLoggingChannel(logging.StreamHandler):
         while True:
             await asyncio.sleep(self._wait_for)
 
-            if self._pending_records:
-                self._send_pending_records()
-                self._pending_records = list()   # Clear the pending records list
+            try:
+                await self.flush_records()
+
+            except Exception:
+                # Failures to send are counted by `_send`. Anything else
+                # shouldn't stop the next records from being sent.
+                continue
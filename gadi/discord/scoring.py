@@ -0,0 +1,212 @@
+import typing
+import collections
+
+from .. import metrics
+from ..config import Config
+from .context import MessageContext
+from .index import CandidateIndex
+from .selection import select_command
+from .wakewords import WakeWordDetector
+from .handlers.base import (
+    BaseMessageHandler, BaseCommand, CommandMatch, SCORE_SECONDS)
+
+CANDIDATES = metrics.histogram(
+    'gadi_scoring_candidates',
+    'The number of commands of each handler that are candidates for each '
+    'message',
+    ('handler', ),
+    buckets=metrics.COUNT_BUCKETS,
+)
+
+SCORED = metrics.histogram(
+    'gadi_scoring_scored_commands',
+    'The number of candidate commands that are actually scored for each '
+    'message, before the selection stops early',
+    buckets=metrics.COUNT_BUCKETS,
+)
+
+THRESHOLD_RESULTS = metrics.counter(
+    'gadi_command_threshold_results_total',
+    'Scored commands, by whether their score reached the threshold',
+    ('handler', 'command', 'result', ),
+)
+
+
+class ScoringReport(typing.NamedTuple):
+    """ What was done to select the command of a single message. It is
+    picklable, so worker processes can return it, and the metrics are
+    recorded by the main process. """
+    threshold: float
+    # The handler name and the number of its candidate commands.
+    candidates: typing.Tuple[typing.Tuple[str, int], ...]
+    # The handler and command names, the score and the scoring seconds.
+    scored: typing.Tuple[typing.Tuple[str, str, float, float], ...]
+
+
+class MessageScorer:
+    """ Holds the message handlers of the bot (with the index over their
+    commands, and the detector of the wake words), and selects the command
+    that best matches a message. This is all of the CPU heavy work that is
+    done for each message, and it doesn't touch the discord connection, so it
+    can run outside of the event loop. """
+
+    def __init__(self,
+                 handlers: typing.Iterable[BaseMessageHandler],
+                 config: Config,
+                 ):
+        self._handlers = tuple(handlers)
+        self._config = config
+        self._wake_words = WakeWordDetector.from_config(config)
+
+        # Built after the handlers, since they compile the command patterns.
+        self._index = CandidateIndex(self._handlers)
+
+        # The handler of each command, in the order they are declared.
+        self._handler_of: typing.Dict[type, BaseMessageHandler] = dict()
+        for handler in self._handlers:
+            for Command in handler.COMMANDS:
+                self._handler_of.setdefault(Command, handler)
+
+        self._handler_names = tuple(dict.fromkeys(
+            handler.__class__.__name__ for handler in self._handlers))
+
+        self._cacheable = all(
+            Command.CACHEABLE
+            for handler in self._handlers
+            for Command in handler.COMMANDS
+        )
+
+    @classmethod
+    def from_handler_classes(cls,
+                             Handlers: typing.Iterable[type],
+                             config: Config,
+                             ) -> 'MessageScorer':
+        """ Constructs the given handler classes, and returns a scorer that
+        uses them. """
+        return cls((Handler(config) for Handler in Handlers), config)
+
+    @property
+    def handlers(self,) -> typing.Tuple[BaseMessageHandler, ...]:
+        return self._handlers
+
+    def command(self, Command: type) -> BaseCommand:
+        """ Returns the instance of the given command class. """
+        return self._handler_of[Command].command(Command)
+
+    @property
+    def wake_words(self,) -> WakeWordDetector:
+        """ The detector that the contexts of the scored messages should
+        use. """
+        return self._wake_words
+
+    def reload_wake_words(self, *_) -> None:
+        """ Builds the detector of the wake words again, from the current
+        configuration. Accepts (and ignores) any arguments, so it can be used
+        as a configuration change callback. """
+        self._wake_words = WakeWordDetector.from_config(self._config)
+
+    def context(self, message) -> MessageContext:
+        """ Wraps the given message in a context that uses the wake words of
+        the scorer. """
+        return MessageContext(message, self._wake_words)
+
+    def cache_key(self,
+                  context: MessageContext,
+                  threshold: float,
+                  ) -> typing.Optional[tuple]:
+        """ Returns a key that identifies the match of the given message: two
+        messages with the same key are matched with the same command and
+        score. The key is built from the normalized variants of the message
+        that the commands compare against (the raw content is added only if
+        some commands calculate their score by themselves). Returns `None` if
+        the matches of the commands can't be cached. """
+
+        if not self._cacheable:
+            return None
+
+        key = (threshold, ) + self._index.variants(context)
+
+        if self._index.unindexed_commands:
+            key += (context.content, )
+
+        return key
+
+    def best_command(self,
+                     context: MessageContext,
+                     threshold: float,
+                     ) -> typing.Optional[CommandMatch]:
+        """ Returns the command that best matches the given message (with its
+        score), or `None` if no command can reach the threshold. """
+
+        selected, report = self.select(context, threshold)
+        self.record(report)
+
+        if selected is None:
+            return None
+
+        Command, score = selected
+        return CommandMatch(self.command(Command), context, score)
+
+    def select(self,
+               context: MessageContext,
+               threshold: float,
+               ) -> typing.Tuple[
+                   typing.Optional[typing.Tuple[type, float]], ScoringReport]:
+        """ Returns the class of the command that best matches the given
+        message with its score (or `None` if no command can reach the
+        threshold), and a report of the scoring that should be passed to
+        `record`. """
+
+        # Only commands that can reach the threshold are candidates, and they
+        # are scored from the highest bound down, only while their bound can
+        # beat the best score so far.
+        bounds = self._index.candidate_bounds(context, threshold)
+
+        scored = list()
+
+        def score(Command: type) -> float:
+            handler = self._handler_of[Command]
+            score, seconds = handler.timed_score(Command, context)
+            scored.append((
+                handler.__class__.__name__, Command.__name__, score, seconds))
+            return score
+
+        selected = select_command(
+            (
+                (bounds[Command], Command)
+                for Command in self._handler_of
+                if Command in bounds
+            ),
+            score,
+            threshold,
+        )
+
+        counts = collections.Counter(
+            self._handler_of[Command].__class__.__name__
+            for Command in bounds
+        )
+
+        report = ScoringReport(
+            threshold=threshold,
+            candidates=tuple(
+                (name, counts[name]) for name in self._handler_names),
+            scored=tuple(scored),
+        )
+
+        return selected, report
+
+    @staticmethod
+    def record(report: ScoringReport) -> None:
+        """ Records the metrics of the given scoring report. """
+
+        for name, count in report.candidates:
+            CANDIDATES.labels(name).observe(count)
+
+        SCORED.observe(len(report.scored))
+
+        for handler, command, score, seconds in report.scored:
+            SCORE_SECONDS.labels(handler, command).observe(seconds)
+            THRESHOLD_RESULTS.labels(
+                handler, command,
+                'hit' if score >= report.threshold else 'miss',
+            ).inc()
@@ -0,0 +1,35 @@
+import typing
+
+# - - - Typing hints - - - #
+Key = typing.TypeVar('Key')
+
+
+def select_command(bounds: typing.Iterable[typing.Tuple[float, Key]],
+                   score: typing.Callable[[Key], float],
+                   threshold: float = 0,
+                   ) -> typing.Optional[typing.Tuple[Key, float]]:
+    """ Selects the command with the highest score, using branch and bound.
+
+    Recives pairs of an upper bound on the score of a command and a key, and
+    a function that scores the command of a key. The commands are scored in
+    a descending order of their bounds, and the selection stops as soon as no
+    remaining command can beat the best command that was already scored, or
+    reach the threshold. Commands with equal bounds are scored in the given
+    order, and the first of equally scored commands is selected.
+
+    Returns the key of the best scored command and its score (which might be
+    lower than the threshold), or `None` if no command was scored at all. """
+
+    # A stable sort, so ties are resolved by the given order.
+    ordered = sorted(bounds, key=lambda pair: -pair[0])
+
+    best = None
+    for bound, key in ordered:
+        if bound < threshold or (best is not None and bound <= best[1]):
+            break   # The rest of the bounds are even lower.
+
+        key_score = score(key)
+        if best is None or key_score > best[1]:
+            best = (key, key_score)
+
+    return best
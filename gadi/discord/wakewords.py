@@ -0,0 +1,215 @@
+import typing
+
+import gadi.utils as utils
+
+# Characters that are removed around a wake word, together with it (for
+# example, the comma in "Gadi, what is the time?").
+SEPARATORS = ' \t\n,.:;!?-'
+
+_FINAL_LETTERS = str.maketrans(utils.FINAL_LETTERS)
+
+
+class WakeWordMatch(typing.NamedTuple):
+    """ An occurrence of a wake word in a message. """
+    word: str       # The (normalized) wake word, as configured
+    start: int      # The occurrence is `text[start:end]`
+    end: int
+    typos: int      # The edit distance between the occurrence and the word
+
+    def rank(self,) -> tuple:
+        """ Occurrences with a lower rank are preferred: the first one, then
+        the one with the least typos, and then the longest one. """
+        return self.start, self.typos, self.start - self.end
+
+
+class WakeWordDetector:
+    """ Finds where the bot is addressed in a message. All of the wake words
+    are matched together in a single pass over the message, using an
+    Aho-Corasick automaton (see `utils.AhoCorasick`). Wake words are matched
+    only as whole words, regardless of their case and final letters.
+
+    If `max_typos` is positive, the detector also tolerates small typos in
+    wake words that are long enough (a typo for each `TYPO_MIN_LENGTH`
+    characters, up to `max_typos`). A word with `k` allowed typos is split
+    into `k + 1` pieces, and since `k` edits can't touch all of them, any
+    occurrence of the word contains at least one of the pieces exactly. The
+    automaton finds the pieces, and only the text around them is compared
+    against the word. """
+
+    TYPO_MIN_LENGTH = 4
+
+    __slots__ = (
+        '_words', '_typos', '_seeds', '_automaton', '_max_match_length', )
+
+    def __init__(self, words: typing.Iterable[str], max_typos: int = 0):
+        self._words: typing.List[str] = list()
+        for word in words:
+            word = self._fold(utils.normalize(str(word)))
+            if word and word not in self._words:
+                self._words.append(word)
+
+        self._typos = tuple(
+            min(max_typos, len(word) // self.TYPO_MIN_LENGTH)
+            for word in self._words
+        )
+
+        # For each string in the automaton: the index of its word, and the
+        # offset of the string in the word.
+        self._seeds: typing.List[typing.Tuple[int, int]] = list()
+        strings = list()
+
+        for word_index, (word, typos) in enumerate(
+                zip(self._words, self._typos)):
+            pieces = typos + 1
+            for piece in range(pieces):
+                start = len(word) * piece // pieces
+                end = len(word) * (piece + 1) // pieces
+                strings.append(word[start:end])
+                self._seeds.append((word_index, start))
+
+        self._automaton = utils.AhoCorasick(strings)
+        self._max_match_length = max((
+            len(word) + typos
+            for word, typos in zip(self._words, self._typos)
+        ),
+            default=0,
+        )
+
+    @classmethod
+    def from_config(cls, config) -> 'WakeWordDetector':
+        """ Creates a detector of the wake words in the settings file. """
+
+        return cls(
+            config.get_safely('settings', 'wake-words', default=list()) or (),
+            max_typos=config.get_safely(
+                'settings', 'wake-word-typos', default=0),
+        )
+
+    @property
+    def words(self,) -> typing.Tuple[str, ...]:
+        """ The normalized wake words. """
+        return tuple(self._words)
+
+    def detect(self, text: str) -> typing.Optional[WakeWordMatch]:
+        """ Recives a cleaned message, and returns the first occurrence of a
+        wake word in it (or `None` if the bot isn't addressed). See
+        `WakeWordMatch.rank`. """
+
+        if not self._words:
+            return None
+
+        folded = self._fold(text)
+        best = None
+
+        for start, _, string_index in self._automaton.iter_matches(folded):
+            word_index, offset = self._seeds[string_index]
+
+            if self._typos[word_index]:
+                match = self._approximate_match(
+                    folded, word_index, start - offset)
+
+            else:
+                match = self._exact_match(folded, word_index, start)
+
+            if match is not None and (
+                best is None or match.rank() < best.rank()
+            ):
+                best = match
+
+        return best
+
+    def min_remainder_length(self, text: str) -> int:
+        """ Returns a lower bound on the length of the remainder of the given
+        text (see `remainder`), which is much cheaper than detecting the wake
+        words. Only the occurrence and separators are removed from the text,
+        so the rest of the characters must remain. """
+
+        separators = sum(map(text.count, SEPARATORS))
+        return len(text) - separators - self._max_match_length
+
+    @staticmethod
+    def remainder(text: str, match: WakeWordMatch) -> str:
+        """ Returns the given text, without the given occurrence of a wake
+        word (and the separators around it). """
+
+        before = text[:match.start].rstrip(SEPARATORS)
+        after = text[match.end:].lstrip(SEPARATORS)
+
+        if before and after:
+            return before + ' ' + after
+
+        return before or after
+
+    # - - - Private & Protected methods - - - #
+
+    @staticmethod
+    def _fold(string: str) -> str:
+        """ Lowers the case of the string, and replaces final letters, without
+        changing the positions of the characters. """
+
+        lowered = string.lower()
+        if len(lowered) == len(string):
+            string = lowered
+
+        return string.translate(_FINAL_LETTERS)
+
+    @staticmethod
+    def _is_whole(text: str, start: int, end: int) -> bool:
+        """ Returns `True` if `text[start:end]` isn't a part of a longer
+        word. """
+
+        return (
+            0 <= start < end <= len(text)
+            and (start == 0 or not text[start - 1].isalnum())
+            and (end == len(text) or not text[end].isalnum())
+        )
+
+    def _exact_match(self,
+                     text: str,
+                     word_index: int,
+                     start: int,
+                     ) -> typing.Optional[WakeWordMatch]:
+
+        word = self._words[word_index]
+        end = start + len(word)
+
+        if not self._is_whole(text, start, end):
+            return None
+
+        return WakeWordMatch(word=word, start=start, end=end, typos=0)
+
+    def _approximate_match(self,
+                           text: str,
+                           word_index: int,
+                           aligned_start: int,
+                           ) -> typing.Optional[WakeWordMatch]:
+        """ Compares the word against the text around the place where it
+        should start, if a piece of it was found in its place. The edits
+        before the piece can shift the start by up to the allowed typos, and
+        the edits in the rest of the word can change its length by up to the
+        allowed typos too. """
+
+        word = self._words[word_index]
+        allowed = self._typos[word_index]
+        best = None
+
+        for start in range(aligned_start - allowed,
+                           aligned_start + allowed + 1):
+            for end in range(start + len(word) - allowed,
+                             start + len(word) + allowed + 1):
+
+                if not self._is_whole(text, start, end):
+                    continue
+
+                typos = utils.levenshtein_distance(
+                    text[start:end], word, max_distance=allowed)
+
+                if typos > allowed:
+                    continue
+
+                match = WakeWordMatch(
+                    word=word, start=start, end=end, typos=typos)
+                if best is None or match.rank() < best.rank():
+                    best = match
+
+        return best
@@ -0,0 +1,386 @@
+""" Counters and histograms that describe what the bot is doing, and an
+optional local HTTP endpoint that serves them in the Prometheus text format.
+
+Metrics are created once, at import time, using the shared registry (similar
+to loggers):
+
+    SCORE_SECONDS = metrics.histogram(
+        'gadi_command_score_seconds',
+        'The time it takes a command to score a message',
+        ('command', ),
+    )
+
+    SCORE_SECONDS.labels('HelloCommand').observe(0.001)
+
+Metrics are recorded in the process that updates them: when the scoring
+executor runs in worker processes, the workers return a report of the
+scoring, and its metrics are recorded by the main process. """
+
+import math
+import typing
+import bisect
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+# In seconds, from 10 microseconds to 10 seconds.
+TIME_BUCKETS = (
+    .00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01,
+    .025, .05, .1, .25, .5, 1, 2.5, 5, 10,
+)
+
+SCORE_BUCKETS = (.1, .2, .3, .4, .5, .6, .7, .8, .9, .95, 1, )
+
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, )
+
+Labels = typing.Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """ The base of all metrics. A metric holds a child (with its own value)
+    for each combination of label values. """
+
+    TYPE: str
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: typing.Iterable[str] = (),
+                 ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._children: typing.Dict[Labels, typing.Any] = dict()
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """ Returns the child of the metric with the given label values (in
+        the same order as the label names). """
+
+        child = self._children.get(values)
+        if child is not None:
+            return child
+
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"The {self.name!r} metric expects the labels: "
+                + ', '.join(self.labelnames))
+
+        with self._lock:
+            return self._children.setdefault(
+                tuple(str(value) for value in values), self._new_child())
+
+    def render(self,) -> typing.Iterator[str]:
+        """ Yields the lines that describe the metric in the Prometheus text
+        format. """
+
+        yield f'# HELP {self.name} {_escape_help(self.documentation)}'
+        yield f'# TYPE {self.name} {self.TYPE}'
+
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                yield (
+                    f'{self.name}{suffix}{_format_labels({**labels, **extra})}'
+                    f' {_format_value(value)}'
+                )
+
+    @abstractmethod
+    def _new_child(self,):
+        """ Returns a new child, that holds the value of the metric for a
+        single combination of label values. """
+
+
+class _CounterChild:
+
+    __slots__ = ('value', '_lock', )
+
+    def __init__(self,):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self,):
+        yield '', dict(), self.value
+
+
+class Counter(_Metric):
+    """ A value that only goes up. Names of counters should end with
+    `_total`. """
+
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1) -> None:
+        """ Increments the counter (only for counters without labels). """
+        self.labels().inc(amount)
+
+    def _new_child(self,) -> _CounterChild:
+        return _CounterChild()
+
+
+class _GaugeChild(_CounterChild):
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Gauge(_Metric):
+    """ A value that can go up and down. """
+
+    TYPE = 'gauge'
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _new_child(self,) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class _HistogramChild:
+
+    __slots__ = ('bounds', 'counts', 'sum', '_lock', )
+
+    def __init__(self, bounds: typing.Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # The last one is `+Inf`
+        self.sum = 0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self,) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self,):
+        total = 0
+        for bound, count in zip(self.bounds + (math.inf, ), self.counts):
+            total += count
+            yield '_bucket', {'le': _format_value(bound)}, total
+
+        yield '_sum', dict(), self.sum
+        yield '_count', dict(), total
+
+
+class Histogram(_Metric):
+    """ Counts the observed values in buckets, and sums them. """
+
+    TYPE = 'histogram'
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: typing.Iterable[str] = (),
+                 buckets: typing.Iterable[float] = TIME_BUCKETS,
+                 ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        """ Observes a value (only for histograms without labels). """
+        self.labels().observe(value)
+
+    def _new_child(self,) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+
+class MetricsRegistry:
+    """ Holds all of the metrics, by their names. """
+
+    def __init__(self,):
+        self._metrics: typing.Dict[str, _Metric] = dict()
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """ Adds the given metric to the registry, and returns it. If a metric
+        with the same name and type is already registered, returns the
+        registered metric instead. """
+
+        with self._lock:
+            registered = self._metrics.setdefault(metric.name, metric)
+
+        if type(registered) is not type(metric):
+            raise ValueError(
+                f"A {registered.TYPE} named {metric.name!r} already exists")
+
+        return registered
+
+    def get(self, name: str) -> typing.Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self,) -> str:
+        """ Returns all of the metrics in the Prometheus text format. """
+
+        lines = [
+            line
+            for metric in list(self._metrics.values())
+            for line in metric.render()
+        ]
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str,
+            documentation: str,
+            labelnames: typing.Iterable[str] = (),
+            ) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str,
+          documentation: str,
+          labelnames: typing.Iterable[str] = (),
+          ) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str,
+              documentation: str,
+              labelnames: typing.Iterable[str] = (),
+              buckets: typing.Iterable[float] = TIME_BUCKETS,
+              ) -> Histogram:
+    return REGISTRY.register(
+        Histogram(name, documentation, labelnames, buckets))
+
+
+class MetricsServer:
+    """ A minimal HTTP server that serves the metrics of a registry (on any
+    path), so they can be scraped by Prometheus. It is meant to be reachable
+    only locally. """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self,
+                 registry: MetricsRegistry = REGISTRY,
+                 host: str = '127.0.0.1',
+                 port: int = 9464,
+                 ):
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+
+    @classmethod
+    def from_config(cls, config) -> typing.Optional['MetricsServer']:
+        """ Creates a server as configured in the `metrics` section of the
+        settings file, or returns `None` if the server isn't enabled. """
+
+        if not config.get_safely('settings', 'metrics', 'enabled'):
+            return None
+
+        return cls(
+            host=config.get_safely(
+                'settings', 'metrics', 'host', default='127.0.0.1'),
+            port=config.get_safely(
+                'settings', 'metrics', 'port', default=9464),
+        )
+
+    async def start(self,) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self._host, self._port)
+
+        logger.info(
+            "Serving metrics on http://%s:%s/metrics", self._host, self._port)
+
+    async def close(self,) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # - - - Private & Protected methods - - - #
+
+    async def _handle(self,
+                      reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter,
+                      ) -> None:
+        """ Responds to a single HTTP request with all of the metrics. """
+
+        try:
+            request = await reader.readline()
+
+            # Skips the headers of the request.
+            while (await reader.readline()).strip():
+                pass
+
+            if request.split(b' ', 1)[0] in (b'GET', b'HEAD'):
+                status = '200 OK'
+                body = self._registry.render().encode()
+            else:
+                status = '405 Method Not Allowed'
+                body = b''
+
+            writer.write((
+                f'HTTP/1.1 {status}\r\n'
+                f'Content-Type: {self.CONTENT_TYPE}\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n'
+                '\r\n'
+            ).encode())
+
+            if not request.startswith(b'HEAD'):
+                writer.write(body)
+
+            await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels: typing.Dict[str, str]) -> str:
+    if not labels:
+        return ''
+
+    return '{' + ','.join(
+        f'{name}="{_escape_label(value)}"'
+        for name, value in labels.items()
+    ) + '}'
+
+
+def _escape_label(value: str) -> str:
+    return (
+        value
+        .replace('\\', r'\\')
+        .replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def _escape_help(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n')
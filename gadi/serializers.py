@@ -0,0 +1,266 @@
+""" Formats that `DynamicData` files can be stored in. Apart from plain json,
+every format starts with a short header line (`#gadi:<name>:<version>`), so
+the format of a file can always be detected when it is read. """
+
+from abc import ABC, abstractmethod
+import typing
+import json
+import gzip
+import zlib
+import pickle
+import marshal
+import timeit
+
+HEADER_PREFIX = b'#gadi:'
+
+
+class Serializer(ABC):
+    """ Converts json-like data to bytes, and back. """
+
+    NAME: str
+    EXTENTION: str
+    VERSION: int = 1
+
+    @abstractmethod
+    def dumps_body(self, data) -> bytes:
+        """ Returns the serialized data (without the header). """
+
+    @abstractmethod
+    def loads_body(self, content: bytes):
+        """ Returns the data from the serialized content (without the
+        header). """
+
+    @property
+    def header(self,) -> bytes:
+        return HEADER_PREFIX + f'{self.NAME}:{self.VERSION}\n'.encode()
+
+    def dumps(self, data) -> bytes:
+        """ Returns the serialized data, including the header. """
+        return self.header + self.dumps_body(data)
+
+    def loads(self, content: bytes):
+        """ Returns the data from the serialized content. Raises a
+        `SerializerFormatError` if the content wasn't created by this
+        serializer. """
+
+        if not content.startswith(self.header):
+            raise SerializerFormatError(
+                f"The content isn't in the {self.NAME!r} format")
+
+        return self.loads_body(content[len(self.header):])
+
+
+class JsonSerializer(Serializer):
+    """ Plain json, the same as `json.dump` creates by default. Doesn't have
+    a header, so files in this format can be edited by hand. """
+
+    NAME = 'json'
+    EXTENTION = '.json'
+
+    def dumps_body(self, data) -> bytes:
+        return json.dumps(data).encode()
+
+    def loads_body(self, content: bytes):
+        return json.loads(content)
+
+    def dumps(self, data) -> bytes:
+        return self.dumps_body(data)
+
+    def loads(self, content: bytes):
+        return self.loads_body(content)
+
+
+class CompactJsonSerializer(Serializer):
+    """ Json without any whitespaces between the tokens. """
+
+    NAME = 'compact-json'
+    EXTENTION = '.json'
+
+    def dumps_body(self, data) -> bytes:
+        return json.dumps(
+            data, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def loads_body(self, content: bytes):
+        return json.loads(content)
+
+
+class PickleSerializer(Serializer):
+    """ The binary `pickle` format. Only files that are created by the bot
+    itself should be loaded using it (loading a pickle can run code). """
+
+    NAME = 'pickle'
+    EXTENTION = '.pickle'
+
+    def dumps_body(self, data) -> bytes:
+        # The protocol is stored in the pickle itself.
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads_body(self, content: bytes):
+        return pickle.loads(content)
+
+
+class MarshalSerializer(Serializer):
+    """ The binary `marshal` format, which is the fastest one but can change
+    between Python versions (a different version is detected by the
+    header). """
+
+    NAME = 'marshal'
+    EXTENTION = '.marshal'
+    VERSION = marshal.version
+
+    def dumps_body(self, data) -> bytes:
+        return marshal.dumps(data, self.VERSION)
+
+    def loads_body(self, content: bytes):
+        return marshal.loads(content)
+
+
+class CompressedSerializer(Serializer):
+    """ Compresses the output of another serializer, using `zlib` or
+    `gzip`. """
+
+    METHODS = ('zlib', 'gzip', )
+
+    def __init__(self,
+                 inner: Serializer,
+                 method: str = 'zlib',
+                 level: int = 6,
+                 ):
+        if method not in self.METHODS:
+            raise ValueError(
+                f"Unknown compression method {method!r}, expected one of: "
+                + ', '.join(self.METHODS))
+
+        self._inner = inner
+        self._method = method
+        self._level = level
+
+        self.NAME = f'{inner.NAME}+{method}'
+        self.EXTENTION = (
+            inner.EXTENTION + ('.gz' if method == 'gzip' else '.z'))
+        self.VERSION = inner.VERSION
+
+    def dumps_body(self, data) -> bytes:
+        content = self._inner.dumps_body(data)
+
+        if self._method == 'gzip':
+            return gzip.compress(content, compresslevel=self._level, mtime=0)
+        return zlib.compress(content, self._level)
+
+    def loads_body(self, content: bytes):
+        if self._method == 'gzip':
+            content = gzip.decompress(content)
+        else:
+            content = zlib.decompress(content)
+
+        return self._inner.loads_body(content)
+
+
+SERIALIZERS: typing.Dict[str, typing.Callable[[], Serializer]] = {
+    'json': JsonSerializer,
+    'compact-json': CompactJsonSerializer,
+    'pickle': PickleSerializer,
+    'marshal': MarshalSerializer,
+}
+
+for _name, _Serializer in list(SERIALIZERS.items()):
+    if _name != 'json':
+        for _method in CompressedSerializer.METHODS:
+            SERIALIZERS[f'{_name}+{_method}'] = (
+                lambda Inner=_Serializer, method=_method:
+                CompressedSerializer(Inner(), method)
+            )
+
+
+def get_serializer(name: typing.Union[str, Serializer]) -> Serializer:
+    """ Returns the serializer with the given name (for example `'pickle'` or
+    `'compact-json+gzip'`). Serializer instances are returned as they are. """
+
+    if isinstance(name, Serializer):
+        return name
+
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown serializer {name!r}, expected one of: "
+            + ', '.join(SERIALIZERS)) from None
+
+
+def detect_serializer(content: bytes) -> Serializer:
+    """ Returns the serializer that created the given content, using its
+    header. Content without a header is treated as plain json. """
+
+    if not content.startswith(HEADER_PREFIX):
+        return JsonSerializer()
+
+    header = content[len(HEADER_PREFIX):content.find(b'\n')]
+    name, _, version = header.decode().rpartition(':')
+
+    serializer = get_serializer(name)
+    if str(serializer.VERSION) != version:
+        raise SerializerFormatError(
+            f"Version {version} of the {name!r} format is not supported")
+
+    return serializer
+
+
+def loads(content: bytes):
+    """ Returns the data from the given content, in any supported format. """
+    return detect_serializer(content).loads(content)
+
+
+class SerializerStats(typing.NamedTuple):
+    name: str
+    size: int           # In bytes
+    dump_time: float    # In seconds, for a single dump
+    load_time: float    # In seconds, for a single load
+
+
+def compare_serializers(data,
+                        names: typing.Iterable[str] = None,
+                        repeat: int = 3,
+                        ) -> typing.List[SerializerStats]:
+    """ Dumps and loads the given data using each of the serializers, and
+    returns the size and the time of each, sorted from the fastest load to
+    the slowest. """
+
+    results = list()
+
+    for name in (names or SERIALIZERS):
+        serializer = get_serializer(name)
+        content = serializer.dumps(data)
+
+        dump_time = min(timeit.repeat(
+            lambda: serializer.dumps(data), number=1, repeat=repeat))
+        load_time = min(timeit.repeat(
+            lambda: serializer.loads(content), number=1, repeat=repeat))
+
+        results.append(SerializerStats(
+            name=name,
+            size=len(content),
+            dump_time=dump_time,
+            load_time=load_time,
+        ))
+
+    return sorted(results, key=lambda stats: stats.load_time)
+
+
+class SerializerFormatError(ValueError):
+    """ Raised when content can't be loaded using a serializer, because it is
+    in a different format. """
+
+
+if __name__ == '__main__':
+    # Usage: python -m gadi.serializers <data file>
+    import sys
+
+    with open(sys.argv[1], 'rb') as file:
+        data = loads(file.read())
+
+    print(f"{'format':<22}{'size':>12}{'dump (ms)':>12}{'load (ms)':>12}")
+    for stats in compare_serializers(data):
+        print(
+            f"{stats.name:<22}{stats.size:>12}"
+            f"{stats.dump_time * 1000:>12.2f}{stats.load_time * 1000:>12.2f}"
+        )
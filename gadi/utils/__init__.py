@@ -1,3 +1,6 @@
 from .strings import *
+from .assignment import *
 from .premutations import *
+from .ahocorasick import *
+from .normalizer import *
 from .discord import *
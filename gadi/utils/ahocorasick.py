@@ -0,0 +1,80 @@
+import typing
+import collections
+
+
+class AhoCorasick:
+    """ An Aho-Corasick automaton, that finds all of the occurrences of
+    multiple strings in a text in a single pass over the text (instead of a
+    pass for each string).
+    https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm """
+
+    __slots__ = ('_strings', '_goto', '_fail', '_output', )
+
+    def __init__(self, strings: typing.Iterable[str]):
+        """ Builds the automaton of the given strings. Empty strings are
+        ignored. """
+
+        self._strings = tuple(strings)
+
+        # The trie of the strings: the transitions of each state, and the
+        # indices of the strings that end in it.
+        self._goto: typing.List[typing.Dict[str, int]] = [dict()]
+        self._output: typing.List[typing.Tuple[int, ...]] = [()]
+
+        for index, string in enumerate(self._strings):
+            state = 0
+            for char in string:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append(dict())
+                    self._output.append(())
+                state = next_state
+
+            if string:
+                self._output[state] += (index, )
+
+        # The failure links: the state of the longest proper suffix of each
+        # state that is also a prefix of some string. Built in breadth first
+        # order, so the links of shorter states are always ready.
+        self._fail = [0] * len(self._goto)
+        queue = collections.deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                link = self._goto[fail].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                self._output[next_state] += self._output[
+                    self._fail[next_state]]
+
+    @property
+    def strings(self,) -> typing.Tuple[str, ...]:
+        return self._strings
+
+    def iter_matches(self,
+                     text: str,
+                     ) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        """ Yields a tuple of the start index, the end index and the index of
+        the string (in the order they were given to the constructor) for each
+        occurrence of any of the strings in the given text. Occurrences are
+        yielded in the order of their end index. """
+
+        goto, fail, output = self._goto, self._fail, self._output
+        strings = self._strings
+        state = 0
+
+        for end, char in enumerate(text, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for index in output[state]:
+                yield end - len(strings[index]), end, index
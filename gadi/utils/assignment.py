@@ -0,0 +1,89 @@
+""" An implementation of the assignment problem, used to match words between
+two strings regardless of their order. """
+
+import typing
+
+
+def min_cost_assignment(costs: typing.Sequence[typing.Sequence[float]],
+                        ) -> typing.Tuple[float, typing.List[int]]:
+    """ Receives a cost matrix with at most as many rows as columns, and
+    assigns a different column to each row so that the total cost is minimal.
+    Returns a tuple of the total cost, and a list that contains the column
+    that is assigned to each row.
+
+    Uses the Hungarian algorithm (with potentials), which runs in
+    `O(rows^2 * columns)` time.
+    https://en.wikipedia.org/wiki/Hungarian_algorithm """
+
+    rows = len(costs)
+    if rows == 0:
+        return 0, list()
+
+    columns = len(costs[0])
+    if rows > columns:
+        raise ValueError("The cost matrix can't have more rows than columns")
+
+    infinity = float('inf')
+
+    # The arrays are 1-indexed. Column 0 is a virtual column that is used
+    # while augmenting.
+    row_potential = [0] * (rows + 1)
+    column_potential = [0] * (columns + 1)
+    column_owner = [0] * (columns + 1)
+    previous_column = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        column_owner[0] = row
+        current_column = 0
+        min_slack = [infinity] * (columns + 1)
+        visited = [False] * (columns + 1)
+
+        while True:
+            visited[current_column] = True
+            current_row = column_owner[current_column]
+            row_costs = costs[current_row - 1]
+            delta = infinity
+            next_column = 0
+
+            for column in range(1, columns + 1):
+                if visited[column]:
+                    continue
+
+                slack = (
+                    row_costs[column - 1]
+                    - row_potential[current_row]
+                    - column_potential[column]
+                )
+
+                if slack < min_slack[column]:
+                    min_slack[column] = slack
+                    previous_column[column] = current_column
+
+                if min_slack[column] < delta:
+                    delta = min_slack[column]
+                    next_column = column
+
+            for column in range(columns + 1):
+                if visited[column]:
+                    row_potential[column_owner[column]] += delta
+                    column_potential[column] -= delta
+                else:
+                    min_slack[column] -= delta
+
+            current_column = next_column
+            if column_owner[current_column] == 0:
+                break
+
+        # Flip the augmenting path
+        while current_column:
+            previous = previous_column[current_column]
+            column_owner[current_column] = column_owner[previous]
+            current_column = previous
+
+    assigned = [0] * rows
+    for column in range(1, columns + 1):
+        if column_owner[column]:
+            assigned[column_owner[column] - 1] = column - 1
+
+    total = sum(costs[row][column] for row, column in enumerate(assigned))
+    return total, assigned
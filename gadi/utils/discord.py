@@ -1,6 +1,11 @@
-import re
 import discord
 
+from .normalizer import (
+    remove_markdown,
+    remove_mentions,
+    remove_channel_mentions,
+)
+
 
 async def replay_to_message(
         message: discord.Message,
@@ -42,16 +47,16 @@ async def is_author_admin(message: discord.Message) -> bool:
 async def message_remove_mentions(content: str) -> str:
     """ Removes any mentions from the given message content string, and
     returns the newly generated string. """
-    return re.sub(r'<@(everyone|here|[!&]?[0-9]{17,20})>', '', content)
+    return remove_mentions(content)
 
 
 async def message_remove_channel_mentions(content: str) -> str:
     """ Removes any channel mentions from the given message content string,
     and returns the newly generated string. """
-    return re.sub(r'<#[0-9]{17,20}>', '', content)
+    return remove_channel_mentions(content)
 
 
 async def message_remove_markdown(content: str) -> str:
     """ Removes any markdown syntex from the given message content string,
     and returns the newly generated string. """
-    return discord.utils.remove_markdown(content)
+    return remove_markdown(content)
@@ -0,0 +1,180 @@
+import re
+import functools
+
+# The same patterns that `discord.utils.remove_markdown` uses (links are
+# kept, while markdown characters, quotes and masked links are removed).
+URL_PATTERN = (
+    r'(?P<url><[^: >]+:\/[^ >]+>'
+    r'|(?:https?|steam):\/\/[^\s<]+[^<.,:;\"\'\]\s])'
+)
+MARKDOWN_PATTERN = r'[_\\~|\*`]|^>(?:>>)?\s|\[.+\]\(.+\)'
+
+MENTION_PATTERN = r'<@(?:everyone|here|[!&]?[0-9]{17,20})>'
+CHANNEL_MENTION_PATTERN = r'<#[0-9]{17,20}>'
+
+# Hebrew cantillation marks and vowel points (without the punctuation marks
+# in the same unicode block, like the maqaf).
+NIQQUD = ''.join(map(chr, (
+    *range(0x0591, 0x05BE),     # Cantillation marks and points, meteg
+    0x05BF, 0x05C1, 0x05C2, 0x05C4, 0x05C5, 0x05C7,
+)))
+
+FINAL_LETTERS = {
+    'ך': 'כ',
+    'ם': 'מ',
+    'ן': 'נ',
+    'ף': 'פ',
+    'ץ': 'צ',
+}
+
+
+class Normalizer:
+    """ Cleans strings as configured by the constructor flags. Everything is
+    compiled when the normalizer is created: markdown, mentions and channel
+    mentions are removed together by a single combined pattern, and Hebrew
+    niqqud and final letters are replaced by a single translation table.
+
+    Use `get_normalizer` to get a shared normalizer for a combination of
+    flags, instead of creating a new one. """
+
+    __slots__ = (
+        'case_sensitive',
+        'ignore_markdown',
+        'ignore_mentions',
+        'ignore_channel_mentions',
+        'ignore_whitespaces',
+        'ignore_niqqud',
+        'ignore_final_letters',
+        '_pattern',
+        '_url_pattern',
+        '_table',
+    )
+
+    def __init__(self,
+                 case_sensitive: bool = False,
+                 ignore_markdown: bool = True,
+                 ignore_mentions: bool = True,
+                 ignore_channel_mentions: bool = True,
+                 ignore_whitespaces: bool = True,
+                 ignore_niqqud: bool = False,
+                 ignore_final_letters: bool = False,
+                 ):
+        self.case_sensitive = case_sensitive
+        self.ignore_markdown = ignore_markdown
+        self.ignore_mentions = ignore_mentions
+        self.ignore_channel_mentions = ignore_channel_mentions
+        self.ignore_whitespaces = ignore_whitespaces
+        self.ignore_niqqud = ignore_niqqud
+        self.ignore_final_letters = ignore_final_letters
+
+        patterns = list()
+
+        if ignore_mentions:
+            patterns.append(MENTION_PATTERN)
+
+        if ignore_channel_mentions:
+            patterns.append(CHANNEL_MENTION_PATTERN)
+
+        if ignore_markdown:
+            patterns.append(MARKDOWN_PATTERN)
+
+        self._pattern = self._url_pattern = None
+
+        if patterns:
+            self._pattern = re.compile('|'.join(patterns), re.MULTILINE)
+
+        if ignore_markdown:
+            # Links are matched first (and put back), so markdown characters
+            # inside of them are kept. Putting the links back is slow, so
+            # this pattern is used only for strings that might have links.
+            self._url_pattern = re.compile(
+                '|'.join([URL_PATTERN] + patterns), re.MULTILINE)
+
+        table = dict()
+        if ignore_niqqud:
+            table.update(dict.fromkeys(map(ord, NIQQUD)))
+        if ignore_final_letters:
+            table.update(str.maketrans(FINAL_LETTERS))
+
+        self._table = table or None
+
+    def __call__(self, string: str) -> str:
+        """ Returns the normalized string. """
+
+        if self._url_pattern is not None and ':/' in string:
+            string = self._url_pattern.sub(r'\g<url>', string)
+
+        elif self._pattern is not None:
+            string = self._pattern.sub('', string)
+
+        if self._table is not None:
+            string = string.translate(self._table)
+
+        # Remove duplicate whitespaces
+        if self.ignore_whitespaces:
+            string = ' '.join(string.split())
+
+        if not self.case_sensitive:
+            string = string.casefold()
+
+        return string
+
+
+@functools.lru_cache(maxsize=None)
+def get_normalizer(case_sensitive: bool = False,
+                   ignore_markdown: bool = True,
+                   ignore_mentions: bool = True,
+                   ignore_channel_mentions: bool = True,
+                   ignore_whitespaces: bool = True,
+                   ignore_niqqud: bool = False,
+                   ignore_final_letters: bool = False,
+                   ) -> Normalizer:
+    """ Returns the normalizer of the given flags. Each combination of flags
+    is compiled only once. """
+
+    return Normalizer(
+        case_sensitive=case_sensitive,
+        ignore_markdown=ignore_markdown,
+        ignore_mentions=ignore_mentions,
+        ignore_channel_mentions=ignore_channel_mentions,
+        ignore_whitespaces=ignore_whitespaces,
+        ignore_niqqud=ignore_niqqud,
+        ignore_final_letters=ignore_final_letters,
+    )
+
+
+def normalize(string: str, **flags: bool) -> str:
+    """ Normalizes the given string, using the normalizer of the given flags
+    (see `Normalizer`). """
+    return get_normalizer(**flags)(string)
+
+
+# Normalizers that only remove a single kind of syntax.
+_KEEP_ALL = dict(
+    case_sensitive=True,
+    ignore_markdown=False,
+    ignore_mentions=False,
+    ignore_channel_mentions=False,
+    ignore_whitespaces=False,
+)
+
+_MARKDOWN_REMOVER = get_normalizer(**{**_KEEP_ALL, 'ignore_markdown': True})
+_MENTIONS_REMOVER = get_normalizer(**{**_KEEP_ALL, 'ignore_mentions': True})
+_CHANNEL_MENTIONS_REMOVER = get_normalizer(
+    **{**_KEEP_ALL, 'ignore_channel_mentions': True})
+
+
+def remove_markdown(string: str) -> str:
+    """ Removes any markdown syntax from the given string (links are
+    kept). """
+    return _MARKDOWN_REMOVER(string)
+
+
+def remove_mentions(string: str) -> str:
+    """ Removes any user and role mentions from the given string. """
+    return _MENTIONS_REMOVER(string)
+
+
+def remove_channel_mentions(string: str) -> str:
+    """ Removes any channel mentions from the given string. """
+    return _CHANNEL_MENTIONS_REMOVER(string)
@@ -1,9 +1,66 @@
 """ A collection of utility functions that are used with strings. """
 
+import typing
+import itertools
 
-def levenshtein_distance(string1: str, string2: str) -> int:
+from .assignment import min_cost_assignment
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, and only speeds up batch scoring.
+    numpy = None
+
+
+# Strings that are shorter than this are compared using the classic table
+# algorithm, since building the bit vectors isn't worth it for them.
+MYERS_MIN_LENGTH = 2
+
+LEVENSHTEIN_ALGORITHMS = ('auto', 'myers', 'table', )
+
+# When scoring a string against less candidates than this, the overhead of
+# building NumPy arrays is bigger than the time that is saved by them.
+NUMPY_MIN_CANDIDATES = 16
+
+SCORE_BACKENDS = ('auto', 'numpy', 'python', )
+
+
+def levenshtein_distance(string1: str,
+                         string2: str,
+                         max_distance: int = None,
+                         algorithm: str = 'auto',
+                         ) -> int:
     """ Returns the edit distance between the two given strings.
-    https://en.wikipedia.org/wiki/Levenshtein_distance """
+    https://en.wikipedia.org/wiki/Levenshtein_distance
+
+    If `max_distance` is provided, the calculation stops as soon as it is
+    known that the distance is bigger than `max_distance`, and in that case
+    `max_distance + 1` is returned instead of the real distance.
+
+    `algorithm` can be `'myers'` (bit-parallel), `'table'` (the classic
+    dynamic programming table) or `'auto'`, which picks one of them by the
+    length of the strings. """
+
+    if algorithm == 'auto':
+        longest = max(len(string1), len(string2))
+        algorithm = 'myers' if longest >= MYERS_MIN_LENGTH else 'table'
+
+    if algorithm == 'myers':
+        return myers_levenshtein_distance(string1, string2, max_distance)
+
+    if algorithm != 'table':
+        raise ValueError(
+            f"Unknown algorithm {algorithm!r}, expected one of: "
+            + ', '.join(LEVENSHTEIN_ALGORITHMS))
+
+    if max_distance is not None:
+        return bounded_levenshtein_distance(string1, string2, max_distance)
+
+    return table_levenshtein_distance(string1, string2)
+
+
+def table_levenshtein_distance(string1: str, string2: str) -> int:
+    """ Returns the edit distance between the two given strings, by filling
+    the whole dynamic programming table row by row. """
 
     if min(len(string1), len(string2)) == 0:
         return max(len(string1), len(string2))
@@ -25,15 +82,478 @@ def levenshtein_distance(string1: str, string2: str) -> int:
     return current_row[-1]
 
 
-def levenshtein_score(string1: str, string2: str) -> float:
+def bounded_levenshtein_distance(string1: str,
+                                 string2: str,
+                                 max_distance: int,
+                                 ) -> int:
+    """ Returns the edit distance between the two given strings, if it is
+    smaller or equal to `max_distance`. Otherwise, returns `max_distance + 1`.
+
+    Only the diagonal band of width `2 * max_distance + 1` of the table is
+    calculated (Ukkonen's cut-off), and the calculation stops as soon as a
+    whole row exceeds `max_distance`. """
+
+    if max_distance < 0:
+        return 0 if string1 == string2 else max_distance + 1
+
+    len1, len2 = len(string1), len(string2)
+    out_of_bound = max_distance + 1
+
+    if abs(len1 - len2) > max_distance:
+        # The length difference alone requires too many insertions.
+        return out_of_bound
+
+    if min(len1, len2) == 0:
+        return max(len1, len2)
+
+    previous_row = [
+        j if j <= max_distance else out_of_bound
+        for j in range(len2 + 1)
+    ]
+
+    for i, c1 in enumerate(string1, start=1):
+        start = max(1, i - max_distance)
+        end = min(len2, i + max_distance)
+
+        current_row = [out_of_bound] * (len2 + 1)
+        if i <= max_distance:
+            current_row[0] = i
+        row_minimum = current_row[start - 1]
+
+        for j in range(start, end + 1):
+
+            insertions = previous_row[j] + 1
+            deletions = current_row[j - 1] + 1
+            substitutions = previous_row[j - 1] + (c1 != string2[j - 1])
+
+            value = min(insertions, deletions, substitutions, out_of_bound)
+            current_row[j] = value
+
+            if value < row_minimum:
+                row_minimum = value
+
+        if row_minimum > max_distance:
+            # Every path through this row is already too expensive.
+            return out_of_bound
+
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def myers_levenshtein_distance(string1: str,
+                                string2: str,
+                                max_distance: int = None,
+                                ) -> int:
+    """ Returns the edit distance between the two given strings, using the
+    bit-parallel algorithm of Myers (as adapted to the edit distance by
+    Hyyrö). A column of the table is stored as bit vectors of vertical
+    deltas in Python integers, so each character of the text is processed
+    using a constant number of integer operations.
+    https://doi.org/10.1145/316542.316550
+
+    `max_distance` has the same meaning as in `levenshtein_distance`. """
+
+    if len(string1) < len(string2):
+        # The longer string is encoded as the bit vectors, so the loop runs
+        # over the shorter one.
+        string1, string2 = string2, string1
+
+    length, remaining = len(string1), len(string2)
+
+    if max_distance is not None:
+        if max_distance < 0:
+            return 0 if string1 == string2 else max_distance + 1
+
+        if length - remaining > max_distance:
+            return max_distance + 1
+
+    if remaining == 0:
+        return length
+
+    # Bit `i` of `peq[c]` is set when `string1[i] == c`.
+    peq = dict()
+    for i, char in enumerate(string1):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    mask = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+
+    positive_vertical = mask
+    negative_vertical = 0
+    distance = length
+
+    for char in string2:
+        equal = peq.get(char, 0)
+        remaining -= 1
+
+        x_vertical = equal | negative_vertical
+        x_horizontal = (
+            ((equal & positive_vertical) + positive_vertical)
+            ^ positive_vertical
+        ) | equal
+
+        positive_horizontal = (
+            negative_vertical | ~(x_horizontal | positive_vertical))
+        negative_horizontal = positive_vertical & x_horizontal
+
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+
+        if max_distance is not None and distance - remaining > max_distance:
+            # Each of the remaining characters can lower the distance by one
+            # at most, so the bound can't be reached anymore.
+            return max_distance + 1
+
+        positive_horizontal = (positive_horizontal << 1) | 1
+        negative_horizontal <<= 1
+
+        positive_vertical = (
+            negative_horizontal | ~(x_vertical | positive_horizontal)
+        ) & mask
+        negative_vertical = positive_horizontal & x_vertical
+
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+
+    return distance
+
+
+def max_distance_for_score(length: int, min_score: float) -> int:
+    """ Returns the biggest edit distance that two strings, where the longest
+    one is of the given length, can have while still reaching `min_score`
+    when passed to `levenshtein_score`. """
+
+    # The small epsilon protects against floating point errors, for example
+    # 10 * (1 - 0.7) is evaluated to 2.9999999999999996.
+    return int(length * (1 - min_score) + 1e-9)
+
+
+def ngram_counts(string: str, n: int = 2) -> typing.Dict[str, int]:
+    """ Returns a dictionary that maps each substring of length `n` of the
+    given string to the number of times it appears in the string. """
+
+    counts = dict()
+    for i in range(len(string) - n + 1):
+        gram = string[i:i + n]
+        counts[gram] = counts.get(gram, 0) + 1
+
+    return counts
+
+
+def rearranged_levenshtein_distance(words1: typing.Sequence[str],
+                                    words2: typing.Sequence[str],
+                                    max_distance: int = None,
+                                    ) -> int:
+    """ Returns the edit distance between the words of `words1` joined by
+    spaces, and the closest rearrangement of the words of `words2` joined by
+    spaces.
+
+    Instead of trying each one of the `n!` rearrangements, each word of the
+    shorter sequence is matched with a word of the other one by solving an
+    assignment problem, and words that are left without a match are inserted
+    or deleted (together with their separating space). This takes polynomial
+    time.
+
+    Words that were split or merged by a typo (a missing or an extra space)
+    don't line up one to one, so the assignment is also solved with each two
+    adjacent words of `words1` merged into a single word (with the space
+    between them), and with each two words of `words2` merged (in any order,
+    since they can be rearranged next to each other). The words in their
+    given order are one of the rearrangements too. The result is the exact
+    distance of some rearrangement, so it is never lower than the true
+    minimum.
+
+    If `max_distance` is provided and the distance is bigger than it,
+    `max_distance + 1` is returned instead (like `levenshtein_distance`), and
+    rearrangements that can't be closer are skipped. """
+
+    joined1, joined2 = ' '.join(words1), ' '.join(words2)
+    longest = max(len(joined1), len(joined2))
+
+    # Any two strings are at most as far as the longest of them.
+    best = longest
+    if max_distance is not None:
+        best = min(best, max_distance + 1)
+
+    if not words1 or not words2:
+        return best
+
+    best = min(best, levenshtein_distance(
+        joined1, joined2, max_distance=max_distance))
+
+    # No rearrangement is closer than the difference between the lengths.
+    lower_bound = abs(len(joined1) - len(joined2))
+
+    # The distances between pairs of words, that are shared between all of
+    # the merged variants.
+    distances: typing.Dict[typing.Tuple[str, str], int] = dict()
+
+    for merged1, merged2 in _merged_words(tuple(words1), tuple(words2)):
+        if best <= lower_bound:
+            break
+
+        best = min(
+            best, _assigned_distance(merged1, merged2, distances, best))
+
+    return best
+
+
+def _merged_words(words1: tuple,
+                  words2: tuple,
+                  ) -> typing.Iterator[typing.Tuple[tuple, tuple]]:
+    """ Yields the given words as they are, and then with two words merged
+    (see `rearranged_levenshtein_distance`). A typo that splits a word adds
+    a word to `words1`, and a typo that merges two words removes one, so
+    only the side with more words is merged. """
+
+    yield words1, words2
+
+    if len(words1) > len(words2):
+        for index in range(len(words1) - 1):
+            merged = words1[index] + ' ' + words1[index + 1]
+            yield words1[:index] + (merged, ) + words1[index + 2:], words2
+
+    elif len(words1) < len(words2):
+        for first, second in itertools.permutations(range(len(words2)), 2):
+            merged = words2[first] + ' ' + words2[second]
+            rest = tuple(
+                word for index, word in enumerate(words2)
+                if index not in (first, second)
+            )
+            yield words1, rest + (merged, )
+
+
+def _assigned_distance(words1: typing.Sequence[str],
+                       words2: typing.Sequence[str],
+                       distances: typing.Dict[typing.Tuple[str, str], int],
+                       upper_bound: int,
+                       ) -> int:
+    """ The distance of the arrangement that matches the words of the two
+    sequences by solving an assignment problem. The distances between pairs
+    of words are cached in `distances`. If the distance can't be lower than
+    `upper_bound`, `upper_bound` is returned without solving the
+    assignment. """
+
+    if len(words1) > len(words2):
+        words1, words2 = words2, words1
+
+    # The cost of inserting or deleting every word, and then the gain of
+    # matching two words instead (which is always negative, so every word of
+    # the shorter sequence gets a match).
+    unmatched_cost = (
+        sum(len(word) + 1 for word in words1)
+        + sum(len(word) + 1 for word in words2)
+    )
+
+    gains = list()
+    for word1 in words1:
+        row = list()
+        for word2 in words2:
+            distance = distances.get((word1, word2))
+            if distance is None:
+                distance = distances[word1, word2] = distances[
+                    word2, word1] = levenshtein_distance(word1, word2)
+
+            row.append(distance - len(word1) - len(word2) - 2)
+
+        gains.append(row)
+
+    # Matching each word with its best match, even if some of them share a
+    # match, can only have a lower cost than a real assignment.
+    if unmatched_cost + sum(map(min, gains)) >= upper_bound:
+        return upper_bound
+
+    gain, _ = min_cost_assignment(gains)
+    return unmatched_cost + gain
+
+
+def levenshtein_score(string1: str,
+                      string2: str,
+                      min_score: float = 0,
+                      ) -> float:
     """ Returns a floating number between 0 and 1. If the number is 0,
     The two given strings are totally different. However, if the returned
-    number is 1, the two given strings the the same. """
+    number is 1, the two given strings the the same.
+
+    If `min_score` is provided, any score that is lower than it is returned
+    as 0. This allows the calculation to stop as soon as it is known that the
+    strings are not similar enough. """
 
     max_distance = max(len(string1), len(string2))
     if max_distance == 0:
         # Special case: if both strings are empty (length zero).
         return 0
 
-    distance = levenshtein_distance(string1, string2)
+    if min_score <= 0:
+        distance = levenshtein_distance(string1, string2)
+
+    else:
+        allowed = max_distance_for_score(max_distance, min_score)
+        distance = levenshtein_distance(string1, string2, allowed)
+
+        if distance > allowed:
+            return 0
+
     return (max_distance - distance) / max_distance
+
+
+def levenshtein_scores(string: str,
+                       candidates: typing.Sequence[str],
+                       min_score: float = 0,
+                       backend: str = 'auto',
+                       ) -> typing.List[float]:
+    """ Returns a list that contains the `levenshtein_score` of the given
+    string and each one of the candidates, in the same order.
+
+    `backend` can be `'numpy'` (the distances to all of the candidates are
+    calculated together, using vectorized operations), `'python'` (the
+    candidates are scored one by one) or `'auto'`, which uses NumPy when it
+    is installed and there are enough candidates. """
+
+    if backend == 'auto':
+        use_numpy = (
+            numpy is not None
+            and len(candidates) >= NUMPY_MIN_CANDIDATES
+        )
+        backend = 'numpy' if use_numpy else 'python'
+
+    if backend == 'python':
+        return [
+            levenshtein_score(string, candidate, min_score=min_score)
+            for candidate in candidates
+        ]
+
+    if backend != 'numpy':
+        raise ValueError(
+            f"Unknown backend {backend!r}, expected one of: "
+            + ', '.join(SCORE_BACKENDS))
+
+    if numpy is None:
+        raise ModuleNotFoundError(
+            "The 'numpy' scoring backend requires NumPy to be installed")
+
+    if not candidates:
+        return list()
+
+    codes, lengths = encode_strings(candidates)
+    return numpy_levenshtein_scores(string, codes, lengths, min_score)
+
+
+def best_levenshtein_score(string: str,
+                           candidates: typing.Iterable[str],
+                           min_score: float = 0,
+                           backend: str = 'auto',
+                           ) -> float:
+    """ Returns the highest `levenshtein_score` between the given string and
+    any of the candidates, or 0 if there are no candidates (or if none of them
+    reaches `min_score`). """
+
+    candidates = tuple(candidates)
+
+    if backend == 'auto' and (
+        numpy is None or len(candidates) < NUMPY_MIN_CANDIDATES
+    ):
+        backend = 'python'
+
+    if backend == 'python':
+        best_score = 0
+        for candidate in candidates:
+            # Only a score that is higher than the current best one is
+            # interesting, so the bound tightens as better matches are found.
+            score = levenshtein_score(
+                string, candidate,
+                min_score=max(min_score, best_score),
+            )
+
+            if score > best_score:
+                best_score = score
+
+        return best_score
+
+    return max(
+        levenshtein_scores(string, candidates, min_score, backend),
+        default=0,
+    )
+
+
+def encode_strings(strings: typing.Sequence[str]) -> tuple:
+    """ Receives a sequence of strings, and returns a tuple of two NumPy
+    arrays: a matrix of the unicode code points of the strings (one string
+    in each row, padded with `-1`), and an array of the lengths of the
+    strings. """
+
+    lengths = numpy.fromiter(
+        (len(string) for string in strings),
+        dtype=numpy.int32, count=len(strings),
+    )
+
+    codes = numpy.full(
+        (len(strings), int(lengths.max(initial=0))), -1, dtype=numpy.int32)
+
+    for row, string in enumerate(strings):
+        codes[row, :len(string)] = [ord(char) for char in string]
+
+    return codes, lengths
+
+
+def numpy_levenshtein_scores(string: str,
+                             codes,
+                             lengths,
+                             min_score: float = 0,
+                             ) -> typing.List[float]:
+    """ Returns the `levenshtein_score` between the given string and each one
+    of the strings that are encoded by `encode_strings`.
+
+    The dynamic programming table is calculated for all of the encoded
+    strings at once: a row of the table is updated once for each character
+    of `string`, using whole-matrix operations. """
+
+    count, width = codes.shape
+    columns = numpy.arange(width + 1, dtype=numpy.int32)[:, numpy.newaxis]
+
+    max_lengths = numpy.maximum(lengths, len(string))
+    allowed = numpy.floor(
+        max_lengths * (1 - min_score) + 1e-9).astype(numpy.int32)
+
+    # The table is stored transposed (a column for each candidate), so the
+    # running minimum below runs over all of the candidates together.
+    codes = codes.T
+    row = numpy.broadcast_to(columns, (width + 1, count)).copy()
+
+    for i, char in enumerate(string, start=1):
+        mismatches = codes != ord(char)
+
+        current = numpy.empty_like(row)
+        current[0] = i
+        numpy.minimum(
+            row[:-1] + mismatches,  # substitutions
+            row[1:] + 1,            # deletions
+            out=current[1:],
+        )
+
+        # Insertions: current[j] = min(current[k] + (j - k)) for k <= j,
+        # which is a running minimum after subtracting the index.
+        current -= columns
+        numpy.minimum.accumulate(current, axis=0, out=current)
+        current += columns
+
+        row = current
+
+        if min_score > 0 and (row.min(axis=0) > allowed).all():
+            # None of the candidates can reach the minimal score anymore.
+            return [0] * count
+
+    distances = row[lengths, numpy.arange(count)]
+
+    scores = numpy.where(
+        max_lengths == 0, 0,
+        (max_lengths - distances) / numpy.maximum(max_lengths, 1),
+    )
+
+    if min_score > 0:
+        scores = numpy.where(distances > allowed, 0, scores)
+
+    return scores.tolist()
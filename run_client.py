@@ -1,5 +1,10 @@
+import time
 import logging
-from gadi import GadiBot, Config
+from gadi import Config
+
+# If importing the bot takes longer than this (in seconds), a warning is
+# logged. Can be changed using the `import-time-budget` setting.
+IMPORT_TIME_BUDGET = 2
 
 
 def configure_logging():
@@ -14,6 +19,29 @@ def configure_logging():
     return logger
 
 
+def import_bot(config: Config, logger: logging.Logger = logging.getLogger()):
+    """ Imports and returns the bot class, and checks that importing it didn't
+    exceed the import time budget. """
+
+    start = time.perf_counter()
+    from gadi import GadiBot
+    import_time = time.perf_counter() - start
+
+    budget = config.get_safely(
+        'settings', 'import-time-budget', default=IMPORT_TIME_BUDGET)
+
+    if budget is not None and import_time > budget:
+        logger.warning(
+            'Importing the bot took %.2f seconds (the budget is %.2f seconds)',
+            import_time, budget,
+        )
+
+    else:
+        logger.debug('Imported the bot in %.2f seconds', import_time)
+
+    return GadiBot
+
+
 def run_client(logger: logging.Logger = logging.getLogger()):
     config = Config()
     token = config.get_safely('token')
@@ -24,6 +52,7 @@ def run_client(logger: logging.Logger = logging.getLogger()):
 
     else:
         logger.info('Loaded Discord bot token from ./config/token.yml')
+        GadiBot = import_bot(config, logger)
         GadiBot(config=config).run(token)
 
 
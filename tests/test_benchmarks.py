@@ -0,0 +1,18 @@
+import pytest
+
+from benchmarks.__main__ import parse_arguments
+from benchmarks.layers import measure
+
+
+def test_count_of_a_single_message_is_rejected():
+    with pytest.raises(SystemExit):
+        parse_arguments(['--count', '1'])
+
+    assert parse_arguments(['--count', '2']).count == 2
+
+
+def test_measure_without_items():
+    with pytest.raises(ValueError):
+        measure('empty', len, [], repeat=3)
+
+    assert measure('single', len, ['item'], repeat=3).ops == 1
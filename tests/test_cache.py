@@ -0,0 +1,106 @@
+import random
+
+from benchmarks.commands import BenchmarkHandler, HelloCommand
+from benchmarks.stubs import StubMessage, stub_config
+from gadi.discord import cache
+from gadi.discord.cache import MISSING, MatchCache
+from gadi.discord.handlers.base import BaseCommand, BaseMessageHandler
+from gadi.discord.handlers.patterns import CommandPattern
+from gadi.discord.scoring import MessageScorer
+
+
+class _PatternsHandler(BaseMessageHandler):
+    COMMANDS = (HelloCommand, )
+
+
+class _AuthorCommand(BaseCommand):
+
+    __slots__ = ()
+
+    CACHEABLE = False
+    PATTERNS = (CommandPattern('hello'), )
+
+    async def handle(self, context) -> None:
+        pass
+
+
+class _AuthorHandler(BaseMessageHandler):
+    COMMANDS = (_AuthorCommand, )
+
+
+def _key(scorer: MessageScorer, content: str, threshold: float = 0.7):
+    return scorer.cache_key(scorer.context(StubMessage(content)), threshold)
+
+
+def test_key_ignores_what_the_commands_ignore():
+    config = stub_config()
+    scorer = MessageScorer((_PatternsHandler(config), ), config)
+
+    key = _key(scorer, 'gadi hello')
+    assert _key(scorer, 'Gadi   **HELLO**') == key
+    assert _key(scorer, 'gadi hello!') != key
+    assert _key(scorer, 'gadi hello', threshold=0.8) != key
+
+
+def test_key_of_commands_that_score_by_themselves():
+    config = stub_config()
+    scorer = MessageScorer((BenchmarkHandler(config), ), config)
+
+    # `DiceCommand` compares the raw content by itself.
+    assert _key(scorer, 'gadi hello') != _key(scorer, 'gadi HELLO')
+
+
+def test_uncacheable_commands():
+    config = stub_config()
+    scorer = MessageScorer((_AuthorHandler(config), ), config)
+
+    assert _key(scorer, 'hello') is None
+
+
+def test_equal_keys_have_equal_matches():
+    config = stub_config()
+    scorer = MessageScorer((BenchmarkHandler(config), ), config)
+    rng = random.Random(0)
+    matches = dict()
+
+    for _ in range(500):
+        content = ''.join(
+            rng.choice(['gadi', 'Gadi', 'hello', 'HeLLo', ' ', '  ', '*'])
+            for _ in range(rng.randint(1, 5))
+        )
+        context = scorer.context(StubMessage(content))
+        key = scorer.cache_key(context, 0.7)
+
+        match = scorer.best_command(context, 0.7)
+        result = None if match is None else (type(match.command), match.score)
+
+        assert matches.setdefault(key, result) == result
+
+
+def test_least_recently_used_match_is_removed():
+    match_cache = MatchCache(max_size=2)
+
+    match_cache.put('a', 1)
+    match_cache.put('b', 2)
+    assert match_cache.get('a') == 1
+    match_cache.put('c', None)
+
+    assert match_cache.get('b') is MISSING
+    assert match_cache.get('a') == 1
+    assert match_cache.get('c') is None
+    assert match_cache.stats() == (2, 3, 1)
+
+
+def test_matches_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+
+    match_cache = MatchCache(ttl=10)
+    match_cache.put('a', 1)
+
+    now[0] += 9
+    assert match_cache.get('a') == 1
+
+    now[0] += 2
+    assert match_cache.get('a') is MISSING
+    assert match_cache.stats().size == 0
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import stat
+
+import pytest
+
+from gadi.config import Config
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    # Json is valid yaml, so the files are parsed without importing yaml.
+    monkeypatch.setattr(
+        Config, '_parse_file',
+        staticmethod(lambda filepath: json.loads(open(filepath).read())),
+    )
+
+    for name, content in {
+        'token': 'secret',
+        'settings': {'score-threshold': 0.7},
+    }.items():
+        path = tmp_path / (name + Config.FILES_EXTENTION)
+        path.write_text(json.dumps(content))
+        os.chmod(path, 0o600)
+
+    return tmp_path
+
+
+def test_secrets_are_never_cached(folder):
+    config = Config(str(folder))
+    assert config.get('token') == 'secret'
+    assert config.get('settings', 'score-threshold') == 0.7
+
+    cache_folder = folder / Config.CACHE_FOLDER
+    assert sorted(os.listdir(cache_folder)) == ['settings.yml.pickle']
+
+    mode = stat.S_IMODE(os.stat(cache_folder / 'settings.yml.pickle').st_mode)
+    assert mode & 0o077 == 0
+
+    # Loaded from the cache.
+    assert Config(str(folder)).get('settings') == {'score-threshold': 0.7}
+
+
+def test_get_everything_loads_only_missing_files(folder):
+    config = Config(str(folder))
+    settings = config.get('settings')
+
+    content = config.get()
+    assert content['token'] == 'secret'
+    assert content['settings'] is settings
+
+
+def test_watch_survives_a_failed_check(folder):
+    config = Config(str(folder))
+    assert config.get('settings', 'score-threshold') == 0.7
+
+    read_changes = config._read_changes
+    calls = list()
+
+    def fail_once():
+        calls.append(None)
+        if len(calls) == 1:
+            raise OSError('Stale file handle')
+        return read_changes()
+
+    config._read_changes = fail_once
+
+    path = folder / ('settings' + Config.FILES_EXTENTION)
+    path.write_text(json.dumps({'score-threshold': 0.8}))
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+
+    async def checked():
+        # The checks are sequential, so the second one was applied.
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+
+    async def watch():
+        task = asyncio.ensure_future(config.watch(interval=0.01))
+        try:
+            await asyncio.wait_for(checked(), timeout=5)
+        finally:
+            task.cancel()
+
+    asyncio.run(watch())
+    assert config.get('settings', 'score-threshold') == 0.8
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import threading
+
+from gadi.data import (
+    DataScheduler, DynamicData, KeyedDynamicData, estimate_size)
+
+
+def _dynamic(path, **kwargs) -> DynamicData:
+    return DynamicData(
+        str(path),
+        save_atexit=False,
+        scheduler=DataScheduler(),
+        default_data=dict(),
+        **kwargs,
+    )
+
+
+def test_journal_round_trip_through_compaction(tmp_path):
+    path = tmp_path / 'data.json'
+    data = _dynamic(path, journal=True, compact_ratio=1000)
+
+    data.set('users', value=dict())
+    data.throw_data()
+
+    data = _dynamic(path, journal=True, compact_ratio=1000)
+    data.set('users', 1, value={'name': 'first'})
+    data.set('users', 2, value={'name': 'second', 'scores': [1, 2]})
+    data.set('users', 2, 'scores', 0, value=3)
+    data.throw_data()
+
+    # Only the journal was appended after the first snapshot.
+    assert os.path.isfile(data.journal_filepath)
+
+    data = _dynamic(path, journal=True, compact_ratio=1000)
+    assert data.get('users', 1) == {'name': 'first'}
+    assert data.get('users', '2', 'scores') == [3, 2]
+
+    data.delete('users', 1)
+    data.set('users', 2, 'name', value='renamed')
+    data.throw_data()
+
+    # Folds the journal into a new snapshot.
+    data = _dynamic(path, journal=True, compact_ratio=0)
+    data.set('users', 3, value=None)
+    data.throw_data()
+    assert not os.path.isfile(data.journal_filepath)
+
+    expected = {
+        'users': {
+            '2': {'name': 'renamed', 'scores': [3, 2]},
+            '3': None,
+        },
+    }
+
+    with open(path) as file:
+        assert json.load(file) == expected
+
+    assert _dynamic(path, journal=True).get() == expected
+
+
+def test_old_journal_records_with_integer_keys(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'users': {'1': 'old'}}))
+
+    with open(str(path) + DynamicData.JOURNAL_EXTENTION, 'w') as file:
+        file.write(json.dumps(['set', ['users', 1], 'new']) + '\n')
+
+    assert _dynamic(path, journal=True).get('users') == {'1': 'new'}
+
+
+def test_default_format_keeps_the_filepath(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_text(json.dumps({'key': 'value'}))
+
+    data = _dynamic(path)
+    data.set('key', value='changed')
+    data.throw_data()
+
+    assert os.listdir(tmp_path) == ['data.txt']
+    assert json.loads(path.read_text()) == {'key': 'changed'}
+
+
+def test_other_format_migrates_the_file(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'key': 'value'}))
+
+    data = _dynamic(path, serializer='pickle+gzip')
+    assert data.get('key') == 'value'
+    data.throw_data()
+
+    assert os.listdir(tmp_path) == ['data.pickle.gz']
+
+    data = _dynamic(tmp_path / 'data.pickle.gz', serializer='pickle+gzip')
+    assert data.get() == {'key': 'value'}
+
+
+def test_keyed_records_survive_concurrent_throws(tmp_path):
+    data = KeyedDynamicData(
+        str(tmp_path / 'records.sqlite'),
+        save_atexit=False,
+        scheduler=DataScheduler(),
+    )
+    stop = threading.Event()
+
+    def throw_repeatedly():
+        while not stop.is_set():
+            data.throw_data()
+
+    thread = threading.Thread(target=throw_repeatedly)
+    thread.start()
+
+    try:
+        for index in range(2000):
+            key = str(index % 50)
+            data.set(key, value=index)
+            assert data.get(key) == index
+
+    finally:
+        stop.set()
+        thread.join()
+
+    data.throw_data()
+    assert {key: data.get(key) for key in data.iter_keys()} == {
+        str(index % 50): index for index in range(1950, 2000)}
+
+
+def test_keyed_eviction_forgets_on_the_loop_thread(tmp_path):
+    class RecordingScheduler(DataScheduler):
+        def forget(self, instance):
+            threads.append(threading.get_ident())
+            super().forget(instance)
+
+    threads = list()
+    data = KeyedDynamicData(
+        str(tmp_path / 'records.sqlite'),
+        save_atexit=False,
+        scheduler=RecordingScheduler(),
+    )
+
+    async def evict():
+        data.set('key', value=1)
+        await data.athrow_data()
+
+    asyncio.run(evict())
+
+    assert threads == [threading.get_ident()]
+    assert not data.loaded
+    assert data.get('key') == 1
+
+
+def test_failed_eviction_keeps_the_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'k': 'old'}))
+    data = _dynamic(path)
+
+    def fail(*_):
+        raise OSError('No space left on device')
+
+    async def evict():
+        data.set('k', value='new')
+
+        monkeypatch.setattr('gadi.data._atomic_write', fail)
+        try:
+            await data.athrow_data()
+        except OSError:
+            pass
+        else:
+            raise AssertionError('The write should have failed')
+
+        assert data.loaded
+        assert data.get('k') == 'new'
+
+        monkeypatch.undo()
+        await data.athrow_data()
+
+    asyncio.run(evict())
+
+    assert not data.loaded
+    assert json.loads(path.read_text()) == {'k': 'new'}
+
+
+def test_keyed_keys_include_unsaved_changes(tmp_path):
+    data = KeyedDynamicData(
+        str(tmp_path / 'records.sqlite'),
+        save_atexit=False,
+        scheduler=DataScheduler(),
+    )
+
+    for index in range(0, 20, 2):
+        data.set(f'{index:02}', value=index)
+    data.save_data()
+
+    for index in range(1, 20, 4):
+        data.set(f'{index:02}', value=index)
+    data.delete('00')
+    data.delete('10')
+    data.set('99', value=99)
+
+    expected = sorted((
+        {f'{index:02}' for index in range(0, 20, 2)}
+        | {f'{index:02}' for index in range(1, 20, 4)}
+        | {'99'}
+    ) - {'00', '10'})
+
+    for page_size in (1, 3, 4, 512):
+        assert list(data.iter_keys(page_size=page_size)) == expected
+
+    # The changes are still pending.
+    assert '99' in data._changed
+    assert data._deleted == {'00', '10'}
+
+
+def test_growth_through_set_is_counted_in_the_budget(tmp_path):
+    scheduler = DataScheduler(memory_budget=20000)
+    first = DynamicData(
+        str(tmp_path / 'first.json'), save_atexit=False,
+        scheduler=scheduler, default_data=dict())
+    second = DynamicData(
+        str(tmp_path / 'second.json'), save_atexit=False,
+        scheduler=scheduler, default_data=dict())
+
+    first.set('key', value='value')
+    for index in range(10):
+        second.set(str(index), value='x' * 100)
+
+    assert first.loaded
+    assert scheduler.loaded_size == (
+        estimate_size(first.get()) + estimate_size(second.get()))
+
+    second.delete('0')
+    assert scheduler.loaded_size == (
+        estimate_size(first.get()) + estimate_size(second.get()))
+
+    # Only grows through `set`, without loading anything new.
+    for index in range(200):
+        second.set(str(index), value='x' * 100)
+
+    assert not first.loaded
+    assert scheduler.loaded_size == estimate_size(second.get())
+
+
+def test_size_estimation_follows_the_changes(tmp_path):
+    data = _dynamic(tmp_path / 'data.json')
+
+    data.set('list', value=[1, 'two', [3]])
+    data.set('list', 1, value='changed')
+    data.delete('list', 0)
+    data.set('dict', value={'a': 'b'})
+    data.delete('dict', 'a')
+    assert data.estimated_size == estimate_size(data.get())
+
+    data.data()['added'] = 'x' * 1000
+    data.get()  # Estimated again at the next access.
+    assert data.estimated_size == estimate_size(data.get())
@@ -0,0 +1,81 @@
+import asyncio
+
+from gadi.discord.dispatcher import CommandDispatcher
+from gadi.discord.handlers.base import CommandMatch
+
+
+def _match(score: float) -> CommandMatch:
+    return CommandMatch(command=None, context=None, score=score)
+
+
+def test_pending_messages_are_never_rejected():
+    async def flood():
+        dispatcher = CommandDispatcher(max_queue_depth=2)
+
+        # Reserved before any of them is scored.
+        tickets = [dispatcher.reserve(1) for _ in range(10)]
+        assert all(ticket is not None for ticket in tickets)
+
+        for ticket in tickets[1:-1]:
+            dispatcher.fulfill(ticket, None)
+
+        # Messages without a command give their place back.
+        assert dispatcher.queue_depths() == {1: 2}
+
+        dispatcher.fulfill(tickets[-1], _match(0.9))
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return stats
+
+    stats = asyncio.run(flood())
+    assert stats.dropped == 0
+
+
+def test_lowest_scored_message_is_shed():
+    async def flood():
+        dispatcher = CommandDispatcher(max_queue_depth=3)
+        first = dispatcher.reserve(1)
+        tickets = [dispatcher.reserve(1) for _ in range(3)]
+
+        dispatcher.fulfill(first, _match(0.8))
+        for ticket, score in zip(tickets, (0.75, 0.95, 0.9)):
+            dispatcher.fulfill(ticket, _match(score))
+
+        queued = [
+            ticket for ticket in tickets
+            if ticket in dispatcher._queues[1].tickets
+        ]
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return tickets, queued, stats
+
+    tickets, queued, stats = asyncio.run(flood())
+
+    # The first message may be already awaited, so it is never shed.
+    assert queued == tickets[1:]
+    assert stats.dropped == 1
+    assert stats.queued == 3
+
+
+def test_flood_of_unscored_messages_is_bounded():
+    async def flood():
+        dispatcher = CommandDispatcher(max_queue_depth=4, max_pending=8)
+        tickets = [dispatcher.reserve(1) for _ in range(5000)]
+        accepted = [ticket for ticket in tickets if ticket is not None]
+
+        assert len(accepted) == 8
+        assert dispatcher.stats().queued == 8
+
+        for index, ticket in enumerate(accepted):
+            dispatcher.fulfill(ticket, _match(index / 10))
+
+        # Scoring the pending messages makes room for new ones.
+        assert dispatcher.reserve(1) is not None
+
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return stats
+
+    stats = asyncio.run(flood())
+    assert stats.queued == 4 + 1
+    assert stats.dropped == 4992 + 4
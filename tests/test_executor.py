@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from benchmarks.commands import BenchmarkHandler, HelloCommand
+from benchmarks.stubs import StubMessage, stub_config
+from gadi.config import Config
+from gadi.discord.bot import GadiBot
+from gadi.discord.scoring import CANDIDATES, THRESHOLD_RESULTS
+
+
+def _write_settings(config: Config, settings: dict) -> None:
+    path = os.path.join(config._folder, 'settings' + Config.FILES_EXTENTION)
+    with open(path) as file:
+        content = json.load(file)
+
+    content.update(settings)
+    with open(path, 'w', encoding='utf8') as file:
+        json.dump(content, file, ensure_ascii=False)
+
+    # Makes sure that the change is detected.
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize('kind', ['inline', 'thread', 'process'])
+def test_wake_word_reload_reaches_the_scoring(kind):
+    config = stub_config({
+        'wake-words': ['gadi'],
+        'wake-word-typos': 0,
+        'scoring-executor': {'type': kind, 'workers': 1},
+    })
+
+    async def score(bot: GadiBot, content: str):
+        """ Returns the match that the bot would handle, if any. """
+        context = bot._scorer.context(StubMessage(content))
+        match = await bot._executor.best_command(context, 0.7)
+        return match if match is not None and match.score >= 0.7 else None
+
+    async def run():
+        bot = GadiBot(config, Handlers=(BenchmarkHandler, ))
+
+        try:
+            assert (await score(bot, 'gadi hello')).score == 1
+            assert await score(bot, 'robot hello') is None
+
+            _write_settings(config, {'wake-words': ['robot']})
+            assert 'settings' in config.reload_changed()
+
+            match = await score(bot, 'robot hello')
+            assert isinstance(match.command, HelloCommand)
+            assert match.score == 1
+            assert await score(bot, 'gadi hello') is None
+
+            _write_settings(config, {'wake-word-typos': 1})
+            config.reload_changed()
+
+            assert (await score(bot, 'robor hello')) is not None
+
+        finally:
+            await bot.close()
+
+    asyncio.run(run())
+
+
+def test_matches_scored_during_a_reload_are_not_cached():
+    config = stub_config({'scoring-executor': {'type': 'thread'}})
+
+    async def run():
+        bot = GadiBot(config, Handlers=(BenchmarkHandler, ))
+        executor = bot._executor
+
+        try:
+            context = bot._scorer.context(StubMessage('gadi hello'))
+            scoring = asyncio.ensure_future(
+                executor.best_command(context, 0.7))
+
+            await asyncio.sleep(0)  # Sent to the scoring thread.
+            executor.reload_config()
+            assert (await scoring).score == 1
+            assert executor.cache.stats().size == 0
+
+            await executor.best_command(context, 0.7)
+            assert executor.cache.stats().size == 1
+
+        finally:
+            await bot.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('kind', ['inline', 'process'])
+def test_scoring_metrics_are_recorded_per_command(kind):
+    config = stub_config({
+        'scoring-executor': {'type': kind, 'workers': 1},
+    })
+    hits = THRESHOLD_RESULTS.labels('BenchmarkHandler', 'HelloCommand', 'hit')
+    candidates = CANDIDATES.labels('BenchmarkHandler')
+
+    async def run():
+        bot = GadiBot(config, Handlers=(BenchmarkHandler, ))
+
+        try:
+            context = bot._scorer.context(StubMessage('gadi hello'))
+            await bot._executor.best_command(context, 0.7)
+
+        finally:
+            await bot.close()
+
+    before = hits.value, candidates.count
+    asyncio.run(run())
+
+    # Recorded by the main process, even when scored by a worker process.
+    assert (hits.value, candidates.count) == (before[0] + 1, before[1] + 1)
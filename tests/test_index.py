@@ -0,0 +1,114 @@
+import random
+
+from benchmarks.commands import BenchmarkHandler, PHRASES
+from benchmarks.stubs import StubMessage, stub_config
+from gadi.discord.handlers.base import BaseCommand, BaseMessageHandler
+from gadi.discord.handlers.patterns import CommandPattern
+from gadi.discord.scoring import MessageScorer
+
+
+class _ReplyCommand(BaseCommand):
+
+    __slots__ = ()
+
+    async def handle(self, context) -> None:
+        pass
+
+
+class AnywhereCommand(_ReplyCommand):
+    __slots__ = ()
+    PATTERNS = (
+        CommandPattern('good morning everyone', require_keyword=False),
+        CommandPattern('בוקר טוב', require_keyword=False),
+    )
+
+
+class KeywordCommand(_ReplyCommand):
+    __slots__ = ()
+    PATTERNS = (
+        CommandPattern('play some music', require_keyword=True),
+        CommandPattern('Stop The Music', case_sensitive=True),
+    )
+
+
+class RearrangedCommand(_ReplyCommand):
+    __slots__ = ()
+    PATTERNS = (
+        CommandPattern(
+            'show me the weather today', allow_word_rearrange=True,
+            require_keyword=False,
+        ),
+    )
+
+
+class _Handler(BaseMessageHandler):
+    COMMANDS = (AnywhereCommand, KeywordCommand, RearrangedCommand)
+
+
+def _messages(seed: int, count: int):
+    rng = random.Random(seed)
+    phrases = [
+        'good morning everyone', 'בוקר טוב', 'play some music',
+        'Stop The Music', 'show me the weather today', 'today weather me',
+        *PHRASES['en'], *PHRASES['he'],
+    ]
+    prefixes = ('', 'gadi ', 'Gadi, ', 'גדי ', 'hey gadi ', 'gdi ')
+
+    for _ in range(count):
+        message = list(rng.choice(phrases))
+        for _ in range(rng.randint(0, 4)):
+            index = rng.randint(0, len(message))
+            operation = rng.randrange(3)
+            if operation == 0:
+                message.insert(index, rng.choice('abcdeמשה '))
+            elif message and operation == 1:
+                del message[min(index, len(message) - 1)]
+            elif message:
+                message[min(index, len(message) - 1)] = rng.choice('xyzש ')
+
+        yield rng.choice(prefixes) + ''.join(message)
+
+
+def test_bounds_are_upper_bounds_of_the_scores():
+    config = stub_config()
+    scorer = MessageScorer(
+        (_Handler(config), BenchmarkHandler(config)), config)
+    commands = [
+        command
+        for handler in scorer.handlers
+        for command in handler.commands
+    ]
+
+    checked = 0
+    for content in _messages(seed=0, count=400):
+        context = scorer.context(StubMessage(content))
+
+        for threshold in (0.3, 0.5, 0.7, 0.9):
+            bounds = scorer._index.candidate_bounds(context, threshold)
+
+            for command in commands:
+                score = command.score(context)
+                if score < threshold:
+                    continue
+
+                checked += 1
+                assert type(command) in bounds, (content, command)
+                assert bounds[type(command)] >= score - 1e-9
+
+    assert checked > 100
+
+
+def test_unrelated_messages_have_no_indexed_candidates():
+    config = stub_config()
+    scorer = MessageScorer((_Handler(config), ), config)
+
+    context = scorer.context(StubMessage(
+        'the quick brown fox jumps over the lazy dog, again and again'))
+    assert scorer._index.candidate_bounds(context, 0.7) == {}
+
+    # Without the wake word, only the patterns that don't require it count.
+    context = scorer.context(StubMessage('play some music'))
+    assert KeywordCommand not in scorer._index.candidate_bounds(context, 0.7)
+
+    context = scorer.context(StubMessage('gadi play some music'))
+    assert scorer._index.candidate_bounds(context, 0.7)[KeywordCommand] == 1
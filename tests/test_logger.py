@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+import discord
+
+from gadi.discord.logger import DiscordLoggingChannel
+
+
+class _Channel:
+    """ Fails to send the messages that contain the given text. """
+
+    def __init__(self, fail_on: str, error: Exception = None):
+        self.fail_on = fail_on
+        self.error = error
+        self.sent = list()
+
+    async def send(self, message: str) -> None:
+        if self.fail_on in message:
+            raise self.error or discord.HTTPException.__new__(
+                discord.HTTPException)
+        self.sent.append(message)
+
+
+class _SmallLoggingChannel(DiscordLoggingChannel):
+    MESSAGE_LIMIT = 40
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.LogRecord(
+        'test', logging.INFO, __file__, 0, message, None, None)
+
+
+def _log(channel: _Channel, messages, dropped: int = 0) -> int:
+    async def log():
+        handler = _SmallLoggingChannel(
+            channel, wait_for=3600, send_interval=0)
+        handler._dropped_records = dropped
+
+        for message in messages:
+            handler.emit(_record(message))
+
+        await handler.flush_records()
+        dropped_records = handler.dropped_records
+        await handler.aclose()
+        return dropped_records
+
+    return asyncio.run(log())
+
+
+def test_failed_message_counts_all_of_its_records():
+    # Each message fits two records.
+    channel = _Channel(fail_on='second')
+    messages = [
+        f'{name:<12}'
+        for name in ('first', 'second', 'third', 'fourth', 'fifth', 'sixth')
+    ]
+
+    assert _log(channel, messages) == 2
+    assert 'first' not in ''.join(channel.sent)
+    assert 'third' in ''.join(channel.sent)
+
+
+def test_split_record_is_counted_once():
+    channel = _Channel(fail_on='x')
+
+    assert _log(channel, ['x' * 100, 'short']) == 2
+
+
+def test_lost_report_of_dropped_records_is_kept():
+    channel = _Channel(fail_on='dropped')
+
+    assert _log(channel, ['a', 'b'], dropped=7) == 7 + 1
+
+
+def test_connection_errors_are_counted_and_logging_goes_on():
+    channel = _Channel(fail_on='lost', error=OSError('Connection reset'))
+
+    async def log():
+        handler = _SmallLoggingChannel(
+            channel, wait_for=0.01, send_interval=0)
+
+        handler.emit(_record('lost'))
+        await asyncio.sleep(0.05)
+        handler.emit(_record('sent'))
+        await asyncio.sleep(0.05)
+
+        dropped_records = handler.dropped_records
+        await handler.aclose()
+        return dropped_records
+
+    dropped_records = asyncio.run(log())
+
+    # The lost record is reported with the next message.
+    assert dropped_records == 0
+    assert '1 log records were dropped' in ''.join(channel.sent)
+    assert 'sent' in ''.join(channel.sent)
@@ -0,0 +1,39 @@
+from gadi.discord.handlers.base import (
+    BaseCommand,
+    UNDECLARED_PATTERNS_CACHE_SIZE,
+    _compile_undeclared,
+)
+from gadi.discord.handlers.patterns import CommandPattern
+
+
+class _Command(BaseCommand):
+
+    __slots__ = ()
+
+    PATTERNS = (CommandPattern('hello'), )
+
+    async def handle(self, context) -> None:
+        pass
+
+
+def test_declared_patterns_are_compiled_once():
+    _Command.compile_patterns()
+    pattern = _Command.PATTERNS[0]
+
+    assert _Command.candidate_table(pattern) is _Command._tables[pattern]
+    assert _Command.candidate_table(pattern).candidates == ('hello', )
+
+
+def test_undeclared_patterns_cache_is_bounded():
+    _Command.compile_patterns()
+
+    for index in range(UNDECLARED_PATTERNS_CACHE_SIZE * 2):
+        pattern = CommandPattern(f'phrase number {index}')
+        table = _Command.candidate_table(pattern)
+        assert table.candidates == (f'phrase number {index}', )
+
+    assert len(_Command._tables) == len(_Command.PATTERNS)
+    assert (
+        _compile_undeclared.cache_info().currsize
+        <= UNDECLARED_PATTERNS_CACHE_SIZE
+    )
@@ -0,0 +1,119 @@
+import itertools
+import random
+
+import pytest
+
+from gadi.discord.handlers.patterns import CommandPattern
+from gadi.utils import (
+    levenshtein_distance,
+    min_cost_assignment,
+    rearranged_levenshtein_distance,
+)
+
+
+def _closest_permutation_distance(words1, words2):
+    joined = ' '.join(words1)
+    return min(
+        levenshtein_distance(joined, ' '.join(permutation))
+        for permutation in itertools.permutations(words2)
+    )
+
+
+def _mutate(rng, string, edits):
+    for _ in range(edits):
+        index = rng.randrange(len(string) + 1)
+        char = rng.choice('abcdefgh ')
+        operation = rng.randrange(3)
+
+        if operation == 0:
+            string = string[:index] + char + string[index:]
+        elif operation == 1:
+            string = string[:index] + string[index + 1:]
+        else:
+            string = string[:index] + char + string[index + 1:]
+
+    return string
+
+
+def test_min_cost_assignment_is_optimal():
+    rng = random.Random(0)
+
+    for _ in range(300):
+        rows = rng.randint(1, 5)
+        columns = rng.randint(rows, 6)
+        costs = [
+            [rng.randint(-10, 10) for _ in range(columns)]
+            for _ in range(rows)
+        ]
+
+        cost, assigned = min_cost_assignment(costs)
+
+        assert len(set(assigned)) == rows
+        assert cost == sum(costs[row][assigned[row]] for row in range(rows))
+        assert cost == min(
+            sum(costs[row][column] for row, column in enumerate(assignment))
+            for assignment in itertools.permutations(range(columns), rows)
+        )
+
+
+def test_min_cost_assignment_rejects_more_rows_than_columns():
+    with pytest.raises(ValueError):
+        min_cost_assignment([[1], [2]])
+
+
+@pytest.mark.parametrize('message', [
+    'what is thetime',
+    'whatis the time',
+    'thetime what is',
+    'ti me what is the',
+    'the time is what',
+])
+def test_split_and_merged_words(message):
+    pattern = CommandPattern('what is the time', allow_word_rearrange=True)
+    table = pattern.compile()
+
+    words = tuple('what is the time'.split())
+    assert rearranged_levenshtein_distance(message.split(), words) <= 1
+    assert table.best_score(message) >= 0.9
+
+
+def test_single_typo_matches_closest_permutation():
+    rng = random.Random(1)
+
+    for _ in range(1000):
+        words = [
+            ''.join(rng.choice('abcdefg') for _ in range(rng.randint(1, 6)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        shuffled = rng.sample(words, len(words))
+        message = _mutate(rng, ' '.join(shuffled), edits=1).split()
+
+        assert (
+            rearranged_levenshtein_distance(message, words)
+            == _closest_permutation_distance(message, words)
+        )
+
+
+def test_distance_is_achievable():
+    """ The distance is the distance of some rearrangement, so it is never
+    lower than the closest one, and is bounded like `levenshtein_distance`
+    when `max_distance` is given. """
+
+    rng = random.Random(2)
+
+    for _ in range(500):
+        words = [
+            ''.join(rng.choice('abcdefg') for _ in range(rng.randint(1, 5)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        shuffled = rng.sample(words, len(words))
+        message = _mutate(rng, ' '.join(shuffled), edits=3).split()
+        expected = _closest_permutation_distance(message, words)
+
+        distance = rearranged_levenshtein_distance(message, words)
+        assert distance >= expected
+
+        max_distance = rng.randint(0, 4)
+        bounded = rearranged_levenshtein_distance(
+            message, words, max_distance=max_distance)
+        assert bounded == min(distance, max_distance + 1)
@@ -0,0 +1,86 @@
+import random
+
+from benchmarks.commands import BenchmarkHandler
+from benchmarks.stubs import StubMessage, stub_config
+from gadi.discord.scoring import MessageScorer
+from gadi.discord.selection import select_command
+
+
+def test_selection_equals_the_naive_maximum():
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        scores = [
+            rng.choice((0, 0.5, 0.7, 0.8, 1, rng.random()))
+            for _ in range(rng.randint(0, 8))
+        ]
+        # Valid bounds: never lower than the real scores.
+        bounds = [
+            (min(1, score + rng.choice((0, 0, 0.1, rng.random()))), key)
+            for key, score in enumerate(scores)
+        ]
+        threshold = rng.choice((0, 0.5, 0.7))
+        scored = list()
+
+        def score(key):
+            scored.append(key)
+            return scores[key]
+
+        result = select_command(bounds, score, threshold)
+        assert len(scored) == len(set(scored))
+
+        reachable = [key for bound, key in bounds if bound >= threshold]
+        if not reachable:
+            assert result is None
+            continue
+
+        best = max(scores[key] for key in reachable)
+        if best < threshold:
+            # Every command might be scored, but none reaches the threshold.
+            assert result is None or result[1] < threshold
+            continue
+
+        key, key_score = result
+        assert key_score == best == scores[key]
+
+        # The first of the equally scored commands is selected.
+        ordered = sorted(bounds, key=lambda pair: -pair[0])
+        assert key == next(
+            key for _, key in ordered if scores[key] == best)
+
+
+def test_selection_stops_early():
+    scored = list()
+
+    def score(key):
+        scored.append(key)
+        return {'a': 0.9, 'b': 0.8, 'c': 0.95}[key]
+
+    bounds = [(0.85, 'b'), (1, 'a'), (0.9, 'c')]
+    assert select_command(bounds, score, 0.5) == ('a', 0.9)
+    assert scored == ['a']
+
+
+def test_best_command_equals_scoring_every_command():
+    config = stub_config()
+    scorer = MessageScorer((BenchmarkHandler(config), ), config)
+    commands = scorer.handlers[0].commands
+    rng = random.Random(1)
+
+    words = ('gadi', 'גדי', 'hello', 'what', 'is', 'the', 'time', 'tell',
+             'me', 'a', 'joke', 'roll', 'dice', 'מה', 'השעה', 'שלום', 'helo')
+
+    for _ in range(500):
+        content = ' '.join(
+            rng.choice(words) for _ in range(rng.randint(1, 6)))
+        context = scorer.context(StubMessage(content))
+
+        for threshold in (0.5, 0.7):
+            best = max(command.score(context) for command in commands)
+            match = scorer.best_command(context, threshold)
+
+            if best < threshold:
+                assert match is None or match.score < threshold
+            else:
+                assert match.score == best
+                assert match.command.score(context) == best
@@ -0,0 +1,58 @@
+import pytest
+
+from gadi import serializers
+
+DATA = {
+    'users': {'1': {'name': 'גדי', 'scores': [1, 2.5, None, True]}},
+    'empty': [],
+}
+
+
+@pytest.mark.parametrize('name', list(serializers.SERIALIZERS))
+def test_round_trip_and_detection(name):
+    serializer = serializers.get_serializer(name)
+    content = serializer.dumps(DATA)
+
+    assert serializer.loads(content) == DATA
+    assert serializers.detect_serializer(content).NAME == serializer.NAME
+    assert serializers.loads(content) == DATA
+
+
+@pytest.mark.parametrize('name', [
+    name for name in serializers.SERIALIZERS if name != 'json'
+])
+def test_header(name):
+    serializer = serializers.get_serializer(name)
+    content = serializer.dumps(DATA)
+
+    header, _, _ = content.partition(b'\n')
+    assert header == b'#gadi:%s:%d' % (
+        serializer.NAME.encode(), serializer.VERSION)
+
+
+def test_plain_json_has_no_header():
+    content = serializers.get_serializer('json').dumps(DATA)
+
+    assert not content.startswith(serializers.HEADER_PREFIX)
+    assert serializers.detect_serializer(content).NAME == 'json'
+
+
+def test_other_format_is_rejected():
+    content = serializers.get_serializer('pickle').dumps(DATA)
+
+    with pytest.raises(serializers.SerializerFormatError):
+        serializers.get_serializer('marshal').loads(content)
+
+
+def test_unsupported_version_is_rejected():
+    content = serializers.get_serializer('marshal').dumps(DATA)
+    content = content.replace(b':%d\n' % serializers.MarshalSerializer.VERSION,
+                              b':999\n', 1)
+
+    with pytest.raises(serializers.SerializerFormatError):
+        serializers.detect_serializer(content)
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        serializers.get_serializer('yaml')
@@ -0,0 +1,172 @@
+import random
+
+import pytest
+
+from gadi.utils import (
+    best_levenshtein_score,
+    bounded_levenshtein_distance,
+    levenshtein_distance,
+    levenshtein_score,
+    levenshtein_scores,
+    max_distance_for_score,
+    myers_levenshtein_distance,
+    table_levenshtein_distance,
+)
+
+ALPHABETS = ('ab', 'abcdef ', 'אבגדה ', 'ab😀ְ')
+
+
+def _reference_distance(string1: str, string2: str) -> int:
+    """ The textbook dynamic programming, with the whole table. """
+
+    table = [[0] * (len(string2) + 1) for _ in range(len(string1) + 1)]
+
+    for i in range(len(string1) + 1):
+        table[i][0] = i
+    for j in range(len(string2) + 1):
+        table[0][j] = j
+
+    for i in range(1, len(string1) + 1):
+        for j in range(1, len(string2) + 1):
+            table[i][j] = min(
+                table[i - 1][j] + 1,
+                table[i][j - 1] + 1,
+                table[i - 1][j - 1] + (string1[i - 1] != string2[j - 1]),
+            )
+
+    return table[-1][-1]
+
+
+def _random_pairs(seed: int, count: int, max_length: int = 20):
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        alphabet = rng.choice(ALPHABETS)
+        string1 = ''.join(
+            rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+        if rng.random() < 0.5:
+            # A similar string, so small distances are common too.
+            string2 = list(string1)
+            for _ in range(rng.randint(0, 3)):
+                index = rng.randint(0, len(string2))
+                string2.insert(index, rng.choice(alphabet))
+                if string2 and rng.random() < 0.5:
+                    del string2[rng.randrange(len(string2))]
+            string2 = ''.join(string2)
+
+        else:
+            string2 = ''.join(
+                rng.choice(alphabet)
+                for _ in range(rng.randint(0, max_length))
+            )
+
+        yield string1, string2
+
+
+def test_table_distance():
+    for string1, string2 in _random_pairs(seed=0, count=500):
+        assert (
+            table_levenshtein_distance(string1, string2)
+            == _reference_distance(string1, string2)
+        )
+
+
+def test_bounded_distance():
+    for string1, string2 in _random_pairs(seed=1, count=1000):
+        expected = _reference_distance(string1, string2)
+
+        for max_distance in range(-1, 8):
+            assert bounded_levenshtein_distance(
+                string1, string2, max_distance
+            ) == min(expected, max_distance + 1)
+
+            assert levenshtein_distance(
+                string1, string2, max_distance, algorithm='table'
+            ) == min(expected, max_distance + 1)
+
+
+@pytest.mark.parametrize('max_length', [20, 70, 150])
+def test_myers_distance(max_length):
+    """ Strings that are longer than a machine word are covered too. """
+
+    for string1, string2 in _random_pairs(
+            seed=max_length, count=100, max_length=max_length):
+        expected = _reference_distance(string1, string2)
+
+        assert myers_levenshtein_distance(string1, string2) == expected
+        assert levenshtein_distance(
+            string1, string2, algorithm='myers') == expected
+
+        for max_distance in (0, 1, 3, 10):
+            assert myers_levenshtein_distance(
+                string1, string2, max_distance
+            ) == min(expected, max_distance + 1)
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        levenshtein_distance('a', 'b', algorithm='unknown')
+
+
+def test_score_with_min_score():
+    for string1, string2 in _random_pairs(seed=2, count=500):
+        longest = max(len(string1), len(string2))
+        if longest == 0:
+            assert levenshtein_score(string1, string2) == 0
+            continue
+
+        score = (longest - _reference_distance(string1, string2)) / longest
+        assert levenshtein_score(string1, string2) == pytest.approx(score)
+
+        for min_score in (0.3, 0.5, 0.7, 0.9, 1):
+            expected = score if score >= min_score - 1e-9 else 0
+            assert levenshtein_score(
+                string1, string2, min_score) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('length', range(0, 40))
+def test_max_distance_for_score(length):
+    for min_score in (0, 0.25, 0.5, 0.7, 0.75, 0.9, 1):
+        allowed = max_distance_for_score(length, min_score)
+
+        # The largest distance that still reaches the score.
+        assert length == 0 or (length - allowed) / length >= min_score - 1e-9
+        assert (
+            allowed + 1 > length
+            or (length - allowed - 1) / length < min_score
+        )
+
+
+@pytest.mark.parametrize('min_score', [0, 0.5, 0.7, 1])
+def test_batch_scores(min_score):
+    pytest.importorskip('numpy')
+    rng = random.Random(3)
+
+    for _ in range(50):
+        pairs = list(_random_pairs(seed=rng.random(), count=40))
+        string = pairs[0][0]
+        candidates = [candidate for _, candidate in pairs]
+
+        expected = levenshtein_scores(
+            string, candidates, min_score, backend='python')
+        scores = levenshtein_scores(
+            string, candidates, min_score, backend='numpy')
+
+        assert scores == pytest.approx(expected)
+        assert best_levenshtein_score(
+            string, candidates, min_score, backend='numpy'
+        ) == pytest.approx(max(expected))
+
+
+def test_batch_scores_without_candidates():
+    pytest.importorskip('numpy')
+
+    assert levenshtein_scores('abc', [], backend='numpy') == []
+    assert best_levenshtein_score('abc', [], backend='numpy') == 0
+    assert levenshtein_scores('', ['', 'a'], backend='numpy') == [0, 0]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        levenshtein_scores('a', ['b'], backend='unknown')
@@ -0,0 +1,98 @@
+import random
+
+from gadi.discord.wakewords import WakeWordDetector, WakeWordMatch
+from gadi.utils import AhoCorasick, levenshtein_distance
+
+
+def test_aho_corasick_finds_all_occurrences():
+    rng = random.Random(0)
+
+    for _ in range(500):
+        strings = [
+            ''.join(rng.choice('abc') for _ in range(rng.randint(0, 4)))
+            for _ in range(rng.randint(1, 6))
+        ]
+        text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 30)))
+
+        expected = sorted(
+            (start, start + len(string), index)
+            for index, string in enumerate(strings) if string
+            for start in range(len(text) - len(string) + 1)
+            if text.startswith(string, start)
+        )
+
+        matches = list(AhoCorasick(strings).iter_matches(text))
+        assert sorted(matches) == expected
+        assert [end for _, end, _ in matches] == sorted(
+            end for _, end, _ in matches)
+
+
+def _closest_occurrence(detector: WakeWordDetector, text: str):
+    """ Compares each wake word against every whole word substring. """
+
+    text = detector._fold(text)
+    best = None
+
+    for word, typos in zip(detector.words, detector._typos):
+        for start in range(len(text)):
+            for end in range(start + 1, len(text) + 1):
+                if not detector._is_whole(text, start, end):
+                    continue
+
+                distance = levenshtein_distance(text[start:end], word)
+                if distance > typos:
+                    continue
+
+                match = WakeWordMatch(word, start, end, distance)
+                if best is None or match.rank() < best.rank():
+                    best = match
+
+    return best
+
+
+def test_detection_matches_brute_force():
+    rng = random.Random(1)
+    words = ('gadi', 'hey gadi', 'גדי', 'bot', 'gadibot')
+
+    for max_typos in (0, 1, 2):
+        detector = WakeWordDetector(words, max_typos=max_typos)
+
+        for _ in range(300):
+            parts = [
+                rng.choice(words + ('hello', 'gdi', 'gaadi', 'גדיי', 'x'))
+                for _ in range(rng.randint(0, 4))
+            ]
+            text = list(rng.choice(' ,.').join(parts))
+            for _ in range(rng.randint(0, 2)):
+                if text:
+                    text[rng.randrange(len(text))] = rng.choice('abgi ')
+            text = ''.join(text)
+
+            match = detector.detect(text)
+            expected = _closest_occurrence(detector, text)
+
+            if expected is None:
+                assert match is None, text
+            else:
+                assert match is not None, text
+                assert match.rank() == expected.rank(), text
+
+
+def test_wake_words_are_whole_words():
+    detector = WakeWordDetector(['gadi'], max_typos=1)
+
+    assert detector.detect('Gadi, what is the time?') == WakeWordMatch(
+        'gadi', 0, 4, 0)
+    assert detector.detect('gadiel is here') is None
+    assert detector.detect('hey gdai') is None      # A swap is two typos
+    assert detector.detect('hey gadii').typos == 1
+
+
+def test_remainder():
+    detector = WakeWordDetector(['gadi'])
+    text = 'so, Gadi! what is the time?'
+    match = detector.detect(text)
+
+    assert WakeWordDetector.remainder(text, match) == 'so what is the time?'
+    assert detector.min_remainder_length(text) <= len(
+        WakeWordDetector.remainder(text, match).replace(' ', ''))